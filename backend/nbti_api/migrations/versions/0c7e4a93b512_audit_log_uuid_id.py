@@ -0,0 +1,40 @@
+"""Store audit log IDs as uuid instead of text
+
+Revision ID: 0c7e4a93b512
+Revises: e5b81c47d2a9
+Create Date: 2026-10-15 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c7e4a93b512'
+down_revision = 'e5b81c47d2a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ALTER TABLE audit_log ALTER COLUMN id TYPE uuid USING id::uuid')
+        return
+
+    # Non-native Uuid is stored as 32 hex digits without dashes
+    op.execute("UPDATE audit_log SET id = replace(id, '-', '')")
+    with op.batch_alter_table('audit_log', schema=None) as batch_op:
+        batch_op.alter_column('id', existing_type=sa.String(length=36), type_=sa.Uuid())
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ALTER TABLE audit_log ALTER COLUMN id TYPE varchar(36) USING id::text')
+        return
+
+    with op.batch_alter_table('audit_log', schema=None) as batch_op:
+        batch_op.alter_column('id', existing_type=sa.Uuid(), type_=sa.String(length=36))
+    op.execute(
+        "UPDATE audit_log SET id = substr(id, 1, 8) || '-' || substr(id, 9, 4) || '-' || "
+        "substr(id, 13, 4) || '-' || substr(id, 17, 4) || '-' || substr(id, 21)"
+    )
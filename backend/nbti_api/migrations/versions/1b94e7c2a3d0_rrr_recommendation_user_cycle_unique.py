@@ -0,0 +1,41 @@
+"""One RRR recommendation per user per promotion cycle
+
+Revision ID: 1b94e7c2a3d0
+Revises: f3d6a0b9e218
+Create Date: 2026-10-15 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b94e7c2a3d0'
+down_revision = 'f3d6a0b9e218'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all() in the app factory already adds it to new databases
+    existing = {c['name'] for c in sa.inspect(op.get_bind()).get_unique_constraints('rrr_recommendation')}
+    if 'uq_rrr_recommendation_user_cycle' in existing:
+        return
+
+    # Earlier allocation runs could write a user twice in the same cycle;
+    # keep only the newest row of each pair so the constraint can be added
+    op.execute(
+        'DELETE FROM rrr_recommendation WHERE id NOT IN ('
+        'SELECT max_id FROM (SELECT MAX(id) AS max_id FROM rrr_recommendation '
+        'GROUP BY user_id, promotion_cycle) AS newest)'
+    )
+
+    with op.batch_alter_table('rrr_recommendation', schema=None) as batch_op:
+        batch_op.create_unique_constraint(
+            'uq_rrr_recommendation_user_cycle', ['user_id', 'promotion_cycle']
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('rrr_recommendation', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_rrr_recommendation_user_cycle', type_='unique')
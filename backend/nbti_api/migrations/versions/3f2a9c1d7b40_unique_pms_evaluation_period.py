@@ -0,0 +1,33 @@
+"""Add unique constraint on PMS evaluation staff/quarter/year
+
+Revision ID: 3f2a9c1d7b40
+Revises: 
+Create Date: 2026-10-15 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all() in the app factory already adds it to new databases
+    existing = {c['name'] for c in sa.inspect(op.get_bind()).get_unique_constraints('pms_evaluations')}
+    if 'uq_pms_evaluation_staff_period' in existing:
+        return
+
+    with op.batch_alter_table('pms_evaluations', schema=None) as batch_op:
+        batch_op.create_unique_constraint(
+            'uq_pms_evaluation_staff_period', ['staff_id', 'quarter', 'year']
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('pms_evaluations', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_pms_evaluation_staff_period', type_='unique')
@@ -0,0 +1,56 @@
+"""Store audit action and entity types as enums
+
+Revision ID: 6a2f9d18c4e7
+Revises: 0c7e4a93b512
+Create Date: 2026-10-15 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a2f9d18c4e7'
+down_revision = '0c7e4a93b512'
+branch_labels = None
+depends_on = None
+
+audit_action = sa.Enum(
+    'CREATE', 'UPDATE', 'DELETE', 'VIEW', 'LOGIN', 'LOGOUT', 'PASSWORD_CHANGE',
+    'START', 'SUBMIT', 'GRADE', 'APPROVE', 'REJECT', 'ALLOCATE', 'PROMOTE',
+    'INCREMENT_STEP', 'BULK_IMPORT',
+    name='audit_action'
+)
+audit_entity = sa.Enum(
+    'User', 'PMSEvaluation', 'EMMExam', 'EMMExamSubmission',
+    'RRRRecommendation', 'Promotion',
+    name='audit_entity'
+)
+
+
+def upgrade():
+    # Elsewhere Enum is a plain VARCHAR, so only PostgreSQL changes
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # create_all() in the app factory already creates the types on new databases
+    audit_action.create(op.get_bind(), checkfirst=True)
+    audit_entity.create(op.get_bind(), checkfirst=True)
+    op.execute(
+        'ALTER TABLE audit_log '
+        'ALTER COLUMN action_type TYPE audit_action USING action_type::audit_action, '
+        'ALTER COLUMN entity_type TYPE audit_entity USING entity_type::audit_entity'
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute(
+        'ALTER TABLE audit_log '
+        'ALTER COLUMN action_type TYPE varchar(50) USING action_type::text, '
+        'ALTER COLUMN entity_type TYPE varchar(50) USING entity_type::text'
+    )
+    audit_entity.drop(op.get_bind())
+    audit_action.drop(op.get_bind())
@@ -0,0 +1,35 @@
+"""Store the PMS percentage on each evaluation
+
+Revision ID: 7d05c3e9a1f6
+Revises: 1b94e7c2a3d0
+Create Date: 2026-10-15 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d05c3e9a1f6'
+down_revision = '1b94e7c2a3d0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all() in the app factory already adds it to new databases
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('pms_evaluations')}
+    if 'pms_percentage' not in columns:
+        with op.batch_alter_table('pms_evaluations', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('pms_percentage', sa.Float(), nullable=True))
+
+    # Backfill evaluations that already have a final score (1-5 scale)
+    op.execute(
+        'UPDATE pms_evaluations SET pms_percentage = final_score / 5.0 * 100 '
+        'WHERE final_score IS NOT NULL'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('pms_evaluations', schema=None) as batch_op:
+        batch_op.drop_column('pms_percentage')
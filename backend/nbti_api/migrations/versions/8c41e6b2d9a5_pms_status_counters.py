@@ -0,0 +1,45 @@
+"""Add pms_status_counters summary table for dashboards
+
+Revision ID: 8c41e6b2d9a5
+Revises: 3f2a9c1d7b40
+Create Date: 2026-10-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41e6b2d9a5'
+down_revision = '3f2a9c1d7b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all() in the app factory may already have created the (empty) table
+    if not sa.inspect(op.get_bind()).has_table('pms_status_counters'):
+        op.create_table(
+            'pms_status_counters',
+            sa.Column('scope_type', sa.String(length=20), nullable=False),
+            sa.Column('scope_id', sa.Integer(), nullable=False),
+            sa.Column('status', sa.String(length=255), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('scope_type', 'scope_id', 'status')
+        )
+
+    # Backfill from existing evaluations, replacing any partial counts
+    op.execute("DELETE FROM pms_status_counters")
+    op.execute(
+        "INSERT INTO pms_status_counters (scope_type, scope_id, status, count) "
+        "SELECT 'staff', staff_id, status, COUNT(*) FROM pms_evaluations GROUP BY staff_id, status"
+    )
+    op.execute(
+        "INSERT INTO pms_status_counters (scope_type, scope_id, status, count) "
+        "SELECT 'supervisor', supervisor_id, status, COUNT(*) FROM pms_evaluations "
+        "WHERE supervisor_id IS NOT NULL GROUP BY supervisor_id, status"
+    )
+
+
+def downgrade():
+    op.drop_table('pms_status_counters')
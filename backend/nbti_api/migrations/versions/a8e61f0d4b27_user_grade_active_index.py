@@ -0,0 +1,27 @@
+"""Index users by grade and active flag for candidate queries
+
+Revision ID: a8e61f0d4b27
+Revises: 7d05c3e9a1f6
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8e61f0d4b27'
+down_revision = '7d05c3e9a1f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all() in the app factory already adds it to new databases
+    existing = {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('user')}
+    if 'ix_user_grade_active' not in existing:
+        op.create_index('ix_user_grade_active', 'user', ['conraiss_grade', 'is_active'])
+
+
+def downgrade():
+    op.drop_index('ix_user_grade_active', table_name='user')
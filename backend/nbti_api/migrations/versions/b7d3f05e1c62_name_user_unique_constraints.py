@@ -0,0 +1,47 @@
+"""Give user username/email unique constraints predictable names
+
+Revision ID: b7d3f05e1c62
+Revises: 8c41e6b2d9a5
+Create Date: 2026-10-15 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d3f05e1c62'
+down_revision = '8c41e6b2d9a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # Constraints created by create_all() carry the default names
+        op.execute('ALTER TABLE "user" DROP CONSTRAINT IF EXISTS user_username_key')
+        op.execute('ALTER TABLE "user" DROP CONSTRAINT IF EXISTS user_email_key')
+
+    # create_all() in the app factory already adds them to new databases
+    existing = {c['name'] for c in sa.inspect(op.get_bind()).get_unique_constraints('user')}
+    missing = [
+        (name, column)
+        for name, column in (('uq_user_username', 'username'), ('uq_user_email', 'email'))
+        if name not in existing
+    ]
+    if not missing:
+        return
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        for name, column in missing:
+            batch_op.create_unique_constraint(name, [column])
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_user_email', type_='unique')
+        batch_op.drop_constraint('uq_user_username', type_='unique')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ALTER TABLE "user" ADD CONSTRAINT user_username_key UNIQUE (username)')
+        op.execute('ALTER TABLE "user" ADD CONSTRAINT user_email_key UNIQUE (email)')
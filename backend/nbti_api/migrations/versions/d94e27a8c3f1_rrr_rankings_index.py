@@ -0,0 +1,33 @@
+"""Index RRR recommendations for the per-grade rankings readout
+
+Revision ID: d94e27a8c3f1
+Revises: b7d3f05e1c62
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd94e27a8c3f1'
+down_revision = 'b7d3f05e1c62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all() in the app factory already adds it to new databases
+    existing = {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('rrr_recommendation')}
+    if 'ix_rrr_recommendation_grade_cycle_rank' in existing:
+        return
+
+    op.create_index(
+        'ix_rrr_recommendation_grade_cycle_rank',
+        'rrr_recommendation',
+        ['conraiss_grade', 'promotion_cycle', 'rank_in_grade']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_rrr_recommendation_grade_cycle_rank', table_name='rrr_recommendation')
@@ -0,0 +1,48 @@
+"""Composite and partial indexes for audit log queries
+
+Revision ID: e5b81c47d2a9
+Revises: d94e27a8c3f1
+Create Date: 2026-10-15 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b81c47d2a9'
+down_revision = 'd94e27a8c3f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all() in the app factory already adds them to new databases
+    existing = {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('audit_log')}
+
+    if 'ix_audit_entity' not in existing:
+        op.create_index(
+            'ix_audit_entity',
+            'audit_log',
+            ['entity_type', 'entity_id', 'timestamp']
+        )
+    if 'ix_audit_user_time' not in existing:
+        op.create_index(
+            'ix_audit_user_time',
+            'audit_log',
+            ['user_id', sa.text('"timestamp" DESC')]
+        )
+    if 'ix_audit_sensitive' not in existing:
+        op.create_index(
+            'ix_audit_sensitive',
+            'audit_log',
+            [sa.text('"timestamp" DESC')],
+            postgresql_where=sa.text('is_sensitive'),
+            sqlite_where=sa.text('is_sensitive')
+        )
+
+
+def downgrade():
+    op.drop_index('ix_audit_sensitive', table_name='audit_log')
+    op.drop_index('ix_audit_user_time', table_name='audit_log')
+    op.drop_index('ix_audit_entity', table_name='audit_log')
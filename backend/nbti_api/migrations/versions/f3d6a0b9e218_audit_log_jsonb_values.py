@@ -0,0 +1,39 @@
+"""Store audit log old/new values as JSONB
+
+Revision ID: f3d6a0b9e218
+Revises: 6a2f9d18c4e7
+Create Date: 2026-10-15 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3d6a0b9e218'
+down_revision = '6a2f9d18c4e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Other databases keep the generic JSON type
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute(
+        'ALTER TABLE audit_log '
+        'ALTER COLUMN old_value TYPE jsonb USING old_value::jsonb, '
+        'ALTER COLUMN new_value TYPE jsonb USING new_value::jsonb'
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute(
+        'ALTER TABLE audit_log '
+        'ALTER COLUMN old_value TYPE json USING old_value::json, '
+        'ALTER COLUMN new_value TYPE json USING new_value::json'
+    )
@@ -0,0 +1,74 @@
+"""
+JWT Verification Cache
+Remembers recently verified access tokens so successive requests from the
+same client skip signature verification.
+
+Entries are keyed by a digest of the Authorization header and expire after
+JWT_CACHE_TTL seconds or when the token itself expires, whichever is
+sooner. The digest is only a lookup key; a token is always fully verified
+the first time it is seen by this process.
+"""
+
+import hashlib
+import threading
+import time
+
+from cachetools import TTLCache
+from flask import g, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+# Upper bound on how long a verified token is trusted without re-checking
+JWT_CACHE_TTL = 30
+
+_jwt_cache = TTLCache(maxsize=10000, ttl=JWT_CACHE_TTL)
+_jwt_cache_lock = threading.Lock()
+
+
+def _cache_key(authorization: str) -> bytes:
+    return hashlib.blake2b(authorization.encode(), digest_size=16).digest()
+
+
+def verified_identity() -> str:
+    """
+    Verify the request's access token and return its identity.
+
+    Behaves like verify_jwt_in_request() followed by get_jwt_identity(),
+    and leaves the decoded token on the request context so get_jwt() and
+    get_jwt_identity() keep working in the view.
+
+    Returns:
+        JWT identity (the 'sub' claim)
+
+    Raises:
+        Any flask_jwt_extended / PyJWT error raised for an invalid token
+    """
+    authorization = request.headers.get('Authorization')
+    if not authorization:
+        # Token not in the header (or missing): nothing to key on
+        verify_jwt_in_request()
+        return get_jwt_identity()
+
+    key = _cache_key(authorization)
+    now = time.time()
+    with _jwt_cache_lock:
+        entry = _jwt_cache.get(key)
+
+    if entry is not None and entry['expires_at'] > now:
+        g._jwt_extended_jwt_user = entry['user']
+        g._jwt_extended_jwt_header = entry['header']
+        g._jwt_extended_jwt = entry['data']
+        g._jwt_extended_jwt_location = entry['location']
+        return entry['data']['sub']
+
+    verify_jwt_in_request()
+    data = g._jwt_extended_jwt
+    expires_at = min(data.get('exp', now + JWT_CACHE_TTL), now + JWT_CACHE_TTL)
+    with _jwt_cache_lock:
+        _jwt_cache[key] = {
+            'user': g._jwt_extended_jwt_user,
+            'header': g._jwt_extended_jwt_header,
+            'data': data,
+            'location': g._jwt_extended_jwt_location,
+            'expires_at': expires_at
+        }
+    return data['sub']
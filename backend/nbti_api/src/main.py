@@ -1,6 +1,7 @@
 import os
 import sys
 from datetime import timedelta
+import click
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -13,14 +14,16 @@ from flask import Flask, send_from_directory, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
+from sqlalchemy.engine import make_url
 
 # Import security module
 from src.security import init_security, SecurityMiddleware
+from src.observability import init_observability
 
 # Import all models to ensure they are registered
 from src.models import (
     db, User, Role,
-    PMSEvaluation, PMSGoal, PMSCycle, Appeal, DevelopmentNeed,
+    PMSEvaluation, PMSGoal, PMSStatusCounter, PMSCycle, Appeal, DevelopmentNeed,
     EMMQuestion, EMMOption, EMMExam, EMMExamSubmission, EMMSubmissionAnswer,
     SalaryScale, StepIncrementLog,
     RRRVacancy, RRRRecommendation,
@@ -57,6 +60,7 @@ def create_app():
     app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 16777216))
     app.config['LOG_LEVEL'] = os.getenv('LOG_LEVEL', 'INFO')
     app.config['LOG_FILE'] = os.getenv('LOG_FILE')
+    app.config['PER_REQUEST_LOGGING'] = os.getenv('PER_REQUEST_LOGGING', 'True').lower() == 'true'
     
     # Database configuration
     database_url = os.getenv('DATABASE_URL', 'sqlite:///app.db')
@@ -65,6 +69,24 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = database_url
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # Connection pool tuning (SQLite uses its own single-connection pools)
+    if not database_url.startswith('sqlite'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_size': int(os.getenv('DB_POOL_SIZE', 20)),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 30)),
+            'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+            'pool_pre_ping': True,
+            'pool_use_lifo': True
+        }
+        if make_url(database_url).get_driver_name() == 'psycopg2':
+            # Send executemany() as multi-row VALUES (INSERT) or execute_batch
+            # pages (UPDATE/DELETE) instead of one round trip per row
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'].update({
+                'executemany_mode': 'values_plus_batch',
+                'insertmanyvalues_page_size': 1000,
+                'executemany_batch_page_size': 500
+            })
+    
     # Initialize extensions
     db.init_app(app)
     migrate = Migrate(app, db)
@@ -81,6 +103,9 @@ def create_app():
     init_security(app)
     SecurityMiddleware(app)
     
+    # Prometheus metrics (/metrics)
+    init_observability(app)
+    
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(user_bp, url_prefix='/api')
@@ -164,6 +189,15 @@ def create_app():
             }
         }), 200
     
+    @app.cli.command('rebuild-pms-counters')
+    def rebuild_pms_counters():
+        """Recompute the PMS dashboard counters from the evaluation table."""
+        # Run once by hand (e.g. for databases built with create_all); doing it
+        # at startup would race across every gunicorn worker
+        PMSStatusCounter.rebuild()
+        db.session.commit()
+        click.echo('PMS status counters rebuilt')
+    
     # Create tables and initialize default data
     with app.app_context():
         db.create_all()
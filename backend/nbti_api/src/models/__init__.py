@@ -10,7 +10,7 @@ from .user import db
 from .user import User, Role, user_roles
 
 # PMS models
-from .pms import PMSEvaluation, PMSGoal
+from .pms import PMSEvaluation, PMSGoal, PMSStatusCounter
 from .pms_extended import PMSCycle, Appeal, DevelopmentNeed
 
 # EMM models
@@ -42,6 +42,7 @@ __all__ = [
     # PMS models
     'PMSEvaluation',
     'PMSGoal',
+    'PMSStatusCounter',
     'PMSCycle',
     'Appeal',
     'DevelopmentNeed',
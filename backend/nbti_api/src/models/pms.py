@@ -1,17 +1,25 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy import event, func, literal, update, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm.attributes import get_history
 from src.models.user import db
 
 class PMSEvaluation(db.Model):
     __tablename__ = 'pms_evaluations'
+    __table_args__ = (
+        db.UniqueConstraint('staff_id', 'quarter', 'year', name='uq_pms_evaluation_staff_period'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    staff_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    supervisor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    staff_id = db.column_property(db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False), active_history=True)
+    supervisor_id = db.column_property(db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False), active_history=True)
     quarter = db.Column(db.String(255), nullable=False)
     year = db.Column(db.Integer, nullable=False)
-    status = db.Column(db.String(255), nullable=False, default='Pending')  # Pending, In Progress, Completed
+    status = db.column_property(db.Column(db.String(255), nullable=False, default='Pending'), active_history=True)  # Pending, In Progress, Completed
     final_score = db.Column(db.Float, nullable=True)
+    # final_score as a 0-100 percentage, kept in step with final_score on write
+    pms_percentage = db.Column(db.Float, nullable=True)
     
     # Cycle Management
     cycle_id = db.Column(db.Integer, db.ForeignKey('pms_cycle.id'), nullable=True)
@@ -41,29 +49,31 @@ class PMSEvaluation(db.Model):
 
     def calculate_final_score(self):
         """Calculate the final score based on weighted average of goal ratings."""
-        agreed_goals = [goal for goal in self.goals if goal.agreed and goal.rating is not None]
+        self.final_score = self.final_score_from_goals(self.goals)
+        return self.final_score
+    
+    @staticmethod
+    def final_score_from_goals(goals):
+        """Weighted average rating (out of 5) of the agreed, rated goals."""
+        agreed_goals = [goal for goal in goals if goal.agreed and goal.rating is not None]
         
         if not agreed_goals:
-            self.final_score = 0.0
-            return self.final_score
+            return 0.0
         
         total_weighted_score = sum(goal.rating * goal.weight for goal in agreed_goals)
         total_weight = sum(goal.weight for goal in agreed_goals)
         
         if total_weight == 0:
-            self.final_score = 0.0
-            return self.final_score
+            return 0.0
         
         # Average score (out of 5)
-        average_score = total_weighted_score / total_weight
-        self.final_score = average_score
-        return self.final_score
+        return total_weighted_score / total_weight
     
     def get_pms_percentage(self):
         """Get PMS score as percentage (0-100)."""
         if self.final_score is None:
             self.calculate_final_score()
-        return (self.final_score / 5.0) * 100 if self.final_score else 0
+        return pms_percentage_for(self.final_score)
 
     def to_dict(self):
         return {
@@ -90,6 +100,20 @@ class PMSEvaluation(db.Model):
             'goals': [goal.to_dict() for goal in self.goals]
         }
 
+def pms_percentage_for(final_score):
+    """Convert a final score (1-5 scale) to a percentage (0-100)."""
+    return (final_score / 5.0) * 100 if final_score else 0
+
+
+@event.listens_for(PMSEvaluation, 'before_insert')
+@event.listens_for(PMSEvaluation, 'before_update')
+def _store_pms_percentage(mapper, connection, target):
+    # Persisting the percentage alongside the score lets rankings read it
+    # as a column instead of recomputing it from the goals
+    final_score = target.final_score
+    target.pms_percentage = None if final_score is None else pms_percentage_for(final_score)
+
+
 class PMSGoal(db.Model):
     __tablename__ = 'pms_goals'
     
@@ -137,3 +161,125 @@ class PMSGoal(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+
+class PMSStatusCounter(db.Model):
+    """
+    Running evaluation counts per status, kept up to date on every write
+    so dashboards don't have to aggregate the whole evaluation table.
+
+    scope_type is 'staff' or 'supervisor'. There is no stored system-wide
+    row: every write would queue on its lock, so the system totals are
+    summed from the staff rows when read.
+    """
+    __tablename__ = 'pms_status_counters'
+
+    scope_type = db.Column(db.String(20), primary_key=True)
+    scope_id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(255), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<PMSStatusCounter {self.scope_type}:{self.scope_id} {self.status}={self.count}>'
+
+    @classmethod
+    def counts_for(cls, scope_type, scope_id=0):
+        """Get {status: count} for a scope, or system-wide for 'system'."""
+        if scope_type == 'system':
+            # Every evaluation has exactly one staff member, so this counts each once
+            rows = db.session.query(cls.status, func.sum(cls.count)).filter_by(
+                scope_type='staff'
+            ).group_by(cls.status).all()
+        else:
+            rows = db.session.query(cls.status, cls.count).filter_by(
+                scope_type=scope_type, scope_id=scope_id
+            ).all()
+        return {status: int(count) for status, count in rows}
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute all counters from the evaluation table."""
+        db.session.execute(db.delete(cls))
+        scopes = (
+            ('staff', PMSEvaluation.staff_id),
+            ('supervisor', PMSEvaluation.supervisor_id),
+        )
+        for scope_type, scope_column in scopes:
+            source = db.select(
+                literal(scope_type), scope_column, PMSEvaluation.status, func.count()
+            ).group_by(scope_column, PMSEvaluation.status)
+            db.session.execute(
+                insert(cls).from_select(['scope_type', 'scope_id', 'status', 'count'], source)
+            )
+
+
+def status_counter_keys(staff_id, supervisor_id, status):
+    """Counter keys an evaluation with these attributes contributes to."""
+    keys = {('staff', staff_id, status)}
+    if supervisor_id is not None:
+        keys.add(('supervisor', supervisor_id, status))
+    return keys
+
+
+def _bump_counter(connection, scope_type, scope_id, status, delta):
+    table = PMSStatusCounter.__table__
+    values = dict(scope_type=scope_type, scope_id=scope_id, status=status)
+    dialect_insert = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}.get(connection.dialect.name)
+
+    if dialect_insert is not None:
+        stmt = dialect_insert(table).values(count=delta, **values).on_conflict_do_update(
+            index_elements=[table.c.scope_type, table.c.scope_id, table.c.status],
+            set_={'count': table.c.count + delta}
+        )
+        connection.execute(stmt)
+        return
+
+    result = connection.execute(
+        update(table).filter_by(**values).values(count=table.c.count + delta)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(table).values(count=delta, **values))
+
+
+def adjust_status_counters(connection, old_keys, new_keys):
+    """
+    Move evaluation counts from old (scope, status) keys to new ones.
+
+    Called from the mapper events below; Core UPDATEs that change
+    evaluation status bypass those events and must call this directly.
+    """
+    for key in old_keys - new_keys:
+        _bump_counter(connection, *key, -1)
+    for key in new_keys - old_keys:
+        _bump_counter(connection, *key, 1)
+
+
+def _previous_value(target, attribute):
+    history = get_history(target, attribute)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, attribute)
+
+
+@event.listens_for(PMSEvaluation, 'after_insert')
+def _count_inserted_evaluation(mapper, connection, target):
+    adjust_status_counters(
+        connection, set(), status_counter_keys(target.staff_id, target.supervisor_id, target.status)
+    )
+
+
+@event.listens_for(PMSEvaluation, 'after_update')
+def _count_updated_evaluation(mapper, connection, target):
+    old_keys = status_counter_keys(
+        _previous_value(target, 'staff_id'),
+        _previous_value(target, 'supervisor_id'),
+        _previous_value(target, 'status')
+    )
+    new_keys = status_counter_keys(target.staff_id, target.supervisor_id, target.status)
+    adjust_status_counters(connection, old_keys, new_keys)
+
+
+@event.listens_for(PMSEvaluation, 'after_delete')
+def _count_deleted_evaluation(mapper, connection, target):
+    adjust_status_counters(
+        connection, status_counter_keys(target.staff_id, target.supervisor_id, target.status), set()
+    )
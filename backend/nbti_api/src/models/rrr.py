@@ -56,6 +56,14 @@ class RRRRecommendation(db.Model):
     Tracks combined scores, ranking, and RRR allocations.
     """
     __tablename__ = 'rrr_recommendation'
+    __table_args__ = (
+        # Backs the per-grade rankings readout (filter + ORDER BY rank)
+        db.Index('ix_rrr_recommendation_grade_cycle_rank',
+                 'conraiss_grade', 'promotion_cycle', 'rank_in_grade'),
+        # One recommendation per user per cycle
+        db.UniqueConstraint('user_id', 'promotion_cycle',
+                            name='uq_rrr_recommendation_user_cycle'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
@@ -1,9 +1,22 @@
 """
 Salary Scale and Step Increment Models
 """
+import threading
+import time
+from array import array
 from datetime import datetime
+from sqlalchemy import event
 from .user import db
 
+# Seconds a process trusts its in-memory copy of the salary scale; writes
+# made through this process clear it straight away
+SALARY_CACHE_TTL = 300
+
+# (salary table, running-maximum salaries by grade), loaded together
+_salary_table = None
+_salary_table_loaded_at = 0.0
+_salary_table_lock = threading.Lock()
+
 
 class SalaryScale(db.Model):
     """
@@ -29,6 +42,71 @@ class SalaryScale(db.Model):
     def __repr__(self):
         return f'<SalaryScale Grade {self.conraiss_grade} Step {self.step}: ₦{self.annual_salary}>'
     
+    @classmethod
+    def _cached_scale(cls):
+        global _salary_table, _salary_table_loaded_at
+        
+        with _salary_table_lock:
+            if _salary_table is not None and time.monotonic() - _salary_table_loaded_at < SALARY_CACHE_TTL:
+                return _salary_table
+        
+        rows = db.session.execute(
+            db.select(cls.conraiss_grade, cls.step, cls.annual_salary)
+            .where(cls.is_active.is_(True))
+            .order_by(cls.id)
+        )
+        table = {}
+        for grade, step, annual_salary in rows:
+            # Same row a filter_by(...).first() lookup would have picked
+            table.setdefault((grade, step), float(annual_salary))
+        
+        # Per grade, the highest salary among steps 1..n at index n-1; it
+        # never decreases, so it can be bisected even if the scale dips
+        top_steps = {}
+        for grade, step in table:
+            top_steps[grade] = max(top_steps.get(grade, 0), step)
+        ceilings = {}
+        for grade, top_step in top_steps.items():
+            running = float('-inf')
+            grade_ceilings = array('d')
+            for step in range(1, top_step + 1):
+                # A missing or zero salary never counts as an increase
+                running = max(running, table.get((grade, step)) or float('-inf'))
+                grade_ceilings.append(running)
+            ceilings[grade] = grade_ceilings
+        
+        scale = (table, ceilings)
+        with _salary_table_lock:
+            _salary_table = scale
+            _salary_table_loaded_at = time.monotonic()
+        return scale
+    
+    @classmethod
+    def salary_table(cls):
+        """
+        Get the active salary scale as {(grade, step): annual salary}.
+        
+        The whole table (at most a few hundred rows) is loaded in one query
+        and kept in memory for SALARY_CACHE_TTL seconds.
+        """
+        return cls._cached_scale()[0]
+    
+    @classmethod
+    def salary_ceilings(cls, grade):
+        """
+        Get a grade's running maximum salary by step.
+        
+        Index n - 1 holds the highest active salary among steps 1..n, so
+        bisect_right(ceilings, salary) is the number of leading steps that
+        pay no more than salary. Empty for a grade with no active salaries.
+        """
+        return cls._cached_scale()[1].get(grade, array('d'))
+    
+    @classmethod
+    def annual_salary_for(cls, grade, step):
+        """Get the active annual salary for a grade and step, or None."""
+        return cls.salary_table().get((grade, step))
+    
     def to_dict(self):
         """Convert salary scale object to dictionary."""
         return {
@@ -43,6 +121,20 @@ class SalaryScale(db.Model):
         }
 
 
+def invalidate_salary_table():
+    """Drop this process's cached salary scale."""
+    global _salary_table
+    with _salary_table_lock:
+        _salary_table = None
+
+
+@event.listens_for(SalaryScale, 'after_insert')
+@event.listens_for(SalaryScale, 'after_update')
+@event.listens_for(SalaryScale, 'after_delete')
+def _salary_scale_changed(mapper, connection, target):
+    invalidate_salary_table()
+
+
 class StepIncrementLog(db.Model):
     """
     Log of all step increments (annual and promotion-related)
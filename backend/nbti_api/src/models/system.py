@@ -2,6 +2,7 @@
 System Configuration and Audit Models
 """
 from datetime import datetime
+from sqlalchemy.dialects.postgresql import JSONB
 from .user import db
 import uuid
 
@@ -68,6 +69,18 @@ class SystemConfiguration(db.Model):
         }
 
 
+# Audit vocabularies; stored as PostgreSQL enums (4 bytes per value)
+AUDIT_ACTION_TYPES = (
+    'CREATE', 'UPDATE', 'DELETE', 'VIEW', 'LOGIN', 'LOGOUT', 'PASSWORD_CHANGE',
+    'START', 'SUBMIT', 'GRADE', 'APPROVE', 'REJECT', 'ALLOCATE', 'PROMOTE',
+    'INCREMENT_STEP', 'BULK_IMPORT'
+)
+AUDIT_ENTITY_TYPES = (
+    'User', 'PMSEvaluation', 'EMMExam', 'EMMExamSubmission',
+    'RRRRecommendation', 'Promotion'
+)
+
+
 class AuditLog(db.Model):
     """
     Forensic-level audit logging for all system actions
@@ -75,17 +88,20 @@ class AuditLog(db.Model):
     """
     __tablename__ = 'audit_log'
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # Native 16-byte uuid on PostgreSQL (CHAR(32) elsewhere)
+    id = db.Column(db.Uuid, primary_key=True, default=uuid.uuid4)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
     
     # Action Details
-    action_type = db.Column(db.String(50), nullable=False, index=True)  # CREATE/UPDATE/DELETE/VIEW/APPROVE/REJECT
-    entity_type = db.Column(db.String(50), nullable=False, index=True)  # Evaluation/Goal/Exam/User/RRR
+    action_type = db.Column(db.Enum(*AUDIT_ACTION_TYPES, name='audit_action', validate_strings=True),
+                            nullable=False, index=True)
+    entity_type = db.Column(db.Enum(*AUDIT_ENTITY_TYPES, name='audit_entity', validate_strings=True),
+                            nullable=False, index=True)
     entity_id = db.Column(db.Integer, index=True)
     
-    # Change Tracking (JSON format for flexibility)
-    old_value = db.Column(db.JSON)
-    new_value = db.Column(db.JSON)
+    # Change Tracking (JSON format for flexibility; binary JSONB on PostgreSQL)
+    old_value = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'))
+    new_value = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'))
     
     # Security Context
     ip_address = db.Column(db.String(45))
@@ -98,6 +114,17 @@ class AuditLog(db.Model):
     # Timestamp
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     
+    __table_args__ = (
+        # Entity history (filter + ORDER BY timestamp)
+        db.Index('ix_audit_entity', 'entity_type', 'entity_id', 'timestamp'),
+        # Per-user activity, newest first
+        db.Index('ix_audit_user_time', 'user_id', timestamp.desc()),
+        # Sensitive entries are a small slice of the table
+        db.Index('ix_audit_sensitive', timestamp.desc(),
+                 postgresql_where=db.text('is_sensitive'),
+                 sqlite_where=db.text('is_sensitive')),
+    )
+    
     # Relationships
     user = db.relationship('User', foreign_keys=[user_id])
     
@@ -107,7 +134,7 @@ class AuditLog(db.Model):
     def to_dict(self):
         """Convert audit log to dictionary."""
         return {
-            'id': self.id,
+            'id': str(self.id),
             'user_id': self.user_id,
             'action_type': self.action_type,
             'entity_type': self.entity_type,
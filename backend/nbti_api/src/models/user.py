@@ -4,6 +4,9 @@ import bcrypt
 
 db = SQLAlchemy()
 
+# bcrypt cost for passwords users choose or keep
+PASSWORD_ROUNDS = 12
+
 # Association table for many-to-many relationship between users and roles
 user_roles = db.Table('user_roles',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
@@ -11,9 +14,17 @@ user_roles = db.Table('user_roles',
 )
 
 class User(db.Model):
+    __table_args__ = (
+        # Named so integrity errors can be mapped back to the offending field
+        db.UniqueConstraint('username', name='uq_user_username'),
+        db.UniqueConstraint('email', name='uq_user_email'),
+        # Backs the per-grade candidate queries (grade + active flag)
+        db.Index('ix_user_grade_active', 'conraiss_grade', 'is_active'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(255), unique=True, nullable=False)
-    email = db.Column(db.String(255), unique=True, nullable=False)
+    username = db.Column(db.String(255), nullable=False)
+    email = db.Column(db.String(255), nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     first_name = db.Column(db.String(255), nullable=True)
     last_name = db.Column(db.String(255), nullable=True)
@@ -84,12 +95,22 @@ class User(db.Model):
 
     def set_password(self, password):
         """Hash and set the user's password."""
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.password_hash = self.hash_password(password)
+    
+    @staticmethod
+    def hash_password(password, rounds=PASSWORD_ROUNDS):
+        """Hash a password for storage in password_hash."""
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
 
     def check_password(self, password):
         """Check if the provided password matches the user's password."""
         return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
 
+    def password_needs_rehash(self):
+        """Whether password_hash uses a lower bcrypt cost than PASSWORD_ROUNDS."""
+        # bcrypt hashes look like $2b$<cost>$<salt+hash>
+        return int(self.password_hash.split('$')[2]) < PASSWORD_ROUNDS
+
     def has_role(self, role_name):
         """Check if the user has a specific role."""
         return any(role.name == role_name for role in self.roles)
@@ -129,12 +150,17 @@ class User(db.Model):
         from .salary import SalaryScale
         if not self.conraiss_grade or not self.conraiss_step:
             return 0
-        salary_record = SalaryScale.query.filter_by(
-            conraiss_grade=self.conraiss_grade,
-            step=self.conraiss_step,
-            is_active=True
-        ).first()
-        return float(salary_record.annual_salary) if salary_record else 0
+        salary = SalaryScale.annual_salary_for(self.conraiss_grade, self.conraiss_step)
+        return salary if salary is not None else 0
+    
+    def seniority_sort_key(self):
+        """Sort key ordering users from most to least senior."""
+        return (
+            -self.conraiss_step if self.conraiss_step else 0,  # Higher step first
+            self.confirmation_date if self.confirmation_date else datetime.max.date(),  # Earlier date first
+            self.date_of_birth if self.date_of_birth else datetime.max.date(),  # Older first
+            self.file_no if self.file_no else 'ZZZZ'  # Lower file number first
+        )
     
     def calculate_seniority_score(self, candidates_in_same_grade):
         """Calculate seniority score using priority-based ranking."""
@@ -142,12 +168,7 @@ class User(db.Model):
             return 100
         
         # Sort candidates by priority hierarchy
-        sorted_candidates = sorted(candidates_in_same_grade, key=lambda x: (
-            -x.conraiss_step if x.conraiss_step else 0,  # Higher step first
-            x.confirmation_date if x.confirmation_date else datetime.max.date(),  # Earlier date first
-            x.date_of_birth if x.date_of_birth else datetime.max.date(),  # Older first
-            x.file_no if x.file_no else 'ZZZZ'  # Lower file number first
-        ))
+        sorted_candidates = sorted(candidates_in_same_grade, key=User.seniority_sort_key)
         
         # Find user's rank (1-indexed)
         try:
@@ -0,0 +1,92 @@
+"""
+Observability
+Prometheus metrics for the API's cache and database layers.
+
+Per-endpoint cache hit/miss counters and a histogram of SQL statements
+issued per request are exposed at /metrics. A rising
+db_query_count_per_request for an endpoint (e.g. above 10) usually means
+a new N+1 query pattern.
+"""
+
+import os
+from contextvars import ContextVar
+
+from flask import Response, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+REDIS_PIPELINE_LATENCY = Histogram(
+    'redis_pipeline_latency_ms',
+    'Round-trip time of pipelined Redis cache lookups in milliseconds',
+    buckets=(0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500)
+)
+
+CACHE_HITS = Counter(
+    'cache_hits_total',
+    'Responses served from the response cache',
+    ['endpoint']
+)
+
+CACHE_MISSES = Counter(
+    'cache_misses_total',
+    'Responses that had to be rebuilt by the view',
+    ['endpoint']
+)
+
+DB_QUERY_COUNT = Histogram(
+    'db_query_count_per_request',
+    'SQL statements executed while handling one request',
+    ['endpoint'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+)
+
+# Statements executed by the current request; None outside a request
+_query_count = ContextVar('query_count', default=None)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    count = _query_count.get()
+    if count is not None:
+        _query_count.set(count + 1)
+
+
+def record_cache_result(hit: bool) -> None:
+    """Count a response cache hit or miss for the current endpoint."""
+    counter = CACHE_HITS if hit else CACHE_MISSES
+    counter.labels(endpoint=request.endpoint).inc()
+
+
+def _metrics_registry():
+    # Under a multi-worker server each process keeps its own metrics;
+    # aggregate them when prometheus_client's multiprocess mode is on
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+
+    from prometheus_client import multiprocess
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def init_observability(app):
+    """Register per-request query counting and the /metrics endpoint."""
+
+    @app.before_request
+    def _start_query_count():
+        _query_count.set(0)
+
+    @app.after_request
+    def _record_query_count(response):
+        count = _query_count.get()
+        if count is not None and request.endpoint:
+            DB_QUERY_COUNT.labels(endpoint=request.endpoint).observe(count)
+        _query_count.set(None)
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(generate_latest(_metrics_registry()), mimetype=CONTENT_TYPE_LATEST)
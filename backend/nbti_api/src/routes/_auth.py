@@ -0,0 +1,71 @@
+"""
+Route Authentication Helpers
+Shared helpers for loading the authenticated user, checking roles and
+building error responses in route handlers.
+"""
+
+import json
+from functools import wraps
+
+from flask import g, jsonify
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy.orm import selectinload
+
+from src.models import db, User
+from src.services.identity_cache import get_identity
+
+
+def error_response(message: str, status: int):
+    """
+    Build a JSON error response once, for reuse on hot rejection paths.
+
+    Args:
+        message: Error message
+        status: HTTP status code
+
+    Returns:
+        (body, status, headers) tuple that Flask accepts as a response
+    """
+    return json.dumps({'error': message}), status, {'Content-Type': 'application/json'}
+
+
+def load_current_user():
+    """
+    Load the user identified by the current JWT.
+
+    Roles are fetched in the same round of queries (selectinload), so
+    subsequent has_role checks don't trigger a lazy load each.
+
+    Returns:
+        User object, or None if the user no longer exists
+    """
+    return db.session.get(User, int(get_jwt_identity()), options=[selectinload(User.roles)])
+
+
+def requires_any_role(*role_names, error='Unauthorized'):
+    """
+    Require a valid JWT whose user holds at least one of the given roles.
+
+    Roles are read through the identity cache, so a cache hit costs no
+    database query. The authenticated user's ID is stored on
+    g.current_user_id for the view.
+
+    Args:
+        *role_names: Role names, any of which grants access
+        error: Error message returned with the 403 response
+
+    Returns:
+        View decorator (applies jwt_required itself)
+    """
+    def decorator(view):
+        @wraps(view)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            identity = get_identity(get_jwt_identity())
+            if identity is None or identity['roles'].isdisjoint(role_names):
+                return jsonify({'error': error}), 403
+
+            g.current_user_id = identity['id']
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -3,10 +3,10 @@ Audit and File Management Routes
 API endpoints for audit logs and file uploads.
 """
 
+import uuid
+from datetime import datetime
 from flask import Blueprint, request, jsonify, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
-from src.models import User
 from src.services.audit_service import (
     get_audit_logs,
     get_entity_history,
@@ -18,6 +18,7 @@ from src.services.s3_service import (
     upload_appeal_document,
     upload_user_document
 )
+from src.routes._auth import load_current_user
 
 audit_bp = Blueprint('audit', __name__)
 
@@ -27,7 +28,7 @@ audit_bp = Blueprint('audit', __name__)
 def get_logs():
     """Get audit logs with filters."""
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     # Check if user is HR Admin or Director
     if not (current_user.has_role('HR Admin') or current_user.has_role('Director')):
@@ -41,6 +42,8 @@ def get_logs():
     is_sensitive = request.args.get('is_sensitive', type=lambda x: x.lower() == 'true')
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
+    before_str = request.args.get('before')
+    before_id_str = request.args.get('before_id')
     limit = request.args.get('limit', 100, type=int)
     
     # Parse dates
@@ -59,6 +62,20 @@ def get_logs():
         except ValueError:
             return jsonify({'error': 'Invalid end_date format. Use ISO format.'}), 400
     
+    before = None
+    if before_str:
+        try:
+            before = datetime.fromisoformat(before_str)
+        except ValueError:
+            return jsonify({'error': 'Invalid before format. Use ISO format.'}), 400
+    
+    before_id = None
+    if before_id_str:
+        try:
+            before_id = uuid.UUID(before_id_str)
+        except ValueError:
+            return jsonify({'error': 'Invalid before_id format. Use a UUID.'}), 400
+    
     # Get logs
     logs = get_audit_logs(
         user_id=user_id,
@@ -68,12 +85,20 @@ def get_logs():
         is_sensitive=is_sensitive,
         start_date=start_date,
         end_date=end_date,
-        limit=limit
+        limit=limit,
+        before=before,
+        before_id=before_id
     )
     
+    # Cursor for the next page (pass back as ?before=...&before_id=...)
+    next_before = None
+    if len(logs) == limit:
+        next_before = {'before': logs[-1].timestamp.isoformat(), 'before_id': str(logs[-1].id)}
+    
     return jsonify({
         'count': len(logs),
-        'logs': [log.to_dict() for log in logs]
+        'logs': [log.to_dict() for log in logs],
+        'next_before': next_before
     }), 200
 
 
@@ -82,7 +107,7 @@ def get_logs():
 def get_entity_audit_history(entity_type, entity_id):
     """Get complete audit history for an entity."""
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     # Check if user is HR Admin or Director
     if not (current_user.has_role('HR Admin') or current_user.has_role('Director')):
@@ -103,7 +128,7 @@ def get_entity_audit_history(entity_type, entity_id):
 def get_user_audit_activity(user_id):
     """Get recent activity for a user."""
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     # Users can view their own activity, or HR Admin/Director can view anyone's
     if current_user_id != user_id and not (current_user.has_role('HR Admin') or current_user.has_role('Director')):
@@ -185,7 +210,7 @@ def upload_appeal_document_file(appeal_id):
 def upload_user_document_file(user_id, doc_type):
     """Upload user document (qualification, certificate, etc.)."""
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     # Users can upload their own documents, or HR Admin can upload for anyone
     if current_user_id != user_id and not current_user.has_role('HR Admin'):
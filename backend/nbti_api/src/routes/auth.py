@@ -23,15 +23,18 @@ class RegisterSchema(Schema):
     department = fields.Str(required=False)
     position = fields.Str(required=False)
 
+# Schemas are stateless, so build them once and share across requests
+_LOGIN_SCHEMA = LoginSchema()
+_REGISTER_SCHEMA = RegisterSchema()
+
 # Token blacklist (in production, use Redis or database)
 blacklisted_tokens = set()
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """Register a new user."""
-    schema = RegisterSchema()
     try:
-        data = schema.load(request.json)
+        data = _REGISTER_SCHEMA.load(request.json)
     except ValidationError as err:
         return jsonify({'error': 'Validation error', 'messages': err.messages}), 400
     
@@ -70,9 +73,8 @@ def register():
 @auth_bp.route('/login', methods=['POST'])
 def login():
     """Authenticate user and return tokens."""
-    schema = LoginSchema()
     try:
-        data = schema.load(request.json)
+        data = _LOGIN_SCHEMA.load(request.json)
     except ValidationError as err:
         return jsonify({'error': 'Validation error', 'messages': err.messages}), 400
     
@@ -85,6 +87,11 @@ def login():
     if not user.is_active:
         return jsonify({'error': 'Account is deactivated'}), 401
     
+    # Imported users start with a cheap temporary hash; bring it up to full cost
+    if user.password_needs_rehash():
+        user.set_password(data['password'])
+        db.session.commit()
+    
     # Create tokens
     access_token = create_access_token(identity=str(user.id))
     refresh_token = create_refresh_token(identity=str(user.id))
@@ -101,7 +108,7 @@ def login():
 def refresh():
     """Refresh access token using refresh token."""
     current_user_id = int(get_jwt_identity())
-    user = User.query.get(current_user_id)
+    user = db.session.get(User, current_user_id)
     
     if not user or not user.is_active:
         return jsonify({'error': 'User not found or inactive'}), 404
@@ -126,7 +133,7 @@ def logout():
 def get_current_user():
     """Get current user information."""
     current_user_id = int(get_jwt_identity())
-    user = User.query.get(current_user_id)
+    user = db.session.get(User, current_user_id)
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
@@ -138,7 +145,7 @@ def get_current_user():
 def change_password():
     """Change user password."""
     current_user_id = int(get_jwt_identity())
-    user = User.query.get(current_user_id)
+    user = db.session.get(User, current_user_id)
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
@@ -2,8 +2,9 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import Schema, fields, ValidationError
 from datetime import datetime, timedelta
-from src.models.user import User, db
+from src.models.user import db
 from src.models.emm import EMMQuestion, EMMOption, EMMExam, EMMExamSubmission, EMMSubmissionAnswer
+from src.routes._auth import load_current_user
 
 emm_bp = Blueprint('emm', __name__)
 
@@ -33,11 +34,16 @@ class SubmissionAnswerSchema(Schema):
     selected_option_id = fields.Int(required=False)
     text_answer = fields.Str(required=False)
 
+# Schemas are stateless, so build them once and share across requests
+_QUESTION_SCHEMA = QuestionSchema()
+_OPTION_SCHEMA = OptionSchema()
+_EXAM_SCHEMA = ExamSchema()
+_SUBMISSION_ANSWER_SCHEMA = SubmissionAnswerSchema()
+
 def require_emm_access(f):
     """Decorator to ensure user has EMM access."""
     def decorated_function(*args, **kwargs):
-        current_user_id = int(get_jwt_identity())
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -58,8 +64,7 @@ def require_emm_access(f):
 @require_emm_access
 def get_questions():
     """Get questions from the question bank."""
-    current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
@@ -97,14 +102,13 @@ def get_questions():
 def create_question():
     """Create a new question (Question Authors and Exam Administrators only)."""
     current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     if not (current_user.has_role('Question Author') or current_user.has_role('Exam Administrator')):
         return jsonify({'error': 'Only Question Authors and Exam Administrators can create questions'}), 403
     
-    schema = QuestionSchema()
     try:
-        data = schema.load(request.json)
+        data = _QUESTION_SCHEMA.load(request.json)
     except ValidationError as err:
         return jsonify({'error': 'Validation error', 'messages': err.messages}), 400
     
@@ -128,9 +132,8 @@ def create_question():
         
         correct_count = 0
         for option_data in options_data:
-            option_schema = OptionSchema()
             try:
-                option_validated = option_schema.load(option_data)
+                option_validated = _OPTION_SCHEMA.load(option_data)
             except ValidationError as err:
                 return jsonify({'error': 'Option validation error', 'messages': err.messages}), 400
             
@@ -159,10 +162,9 @@ def create_question():
 @require_emm_access
 def get_question(question_id):
     """Get specific question."""
-    current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
-    question = EMMQuestion.query.get_or_404(question_id)
+    question = db.get_or_404(EMMQuestion, question_id)
     
     # Include correct answers only for authorized users
     include_answers = current_user.has_role('Question Author') or current_user.has_role('Exam Administrator')
@@ -175,17 +177,16 @@ def get_question(question_id):
 def update_question(question_id):
     """Update question (creators and admins only)."""
     current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
-    question = EMMQuestion.query.get_or_404(question_id)
+    question = db.get_or_404(EMMQuestion, question_id)
     
     # Check permissions
     if not (current_user.has_role('Exam Administrator') or question.created_by == current_user_id):
         return jsonify({'error': 'Can only edit your own questions or admin access required'}), 403
     
-    schema = QuestionSchema()
     try:
-        data = schema.load(request.json)
+        data = _QUESTION_SCHEMA.load(request.json)
     except ValidationError as err:
         return jsonify({'error': 'Validation error', 'messages': err.messages}), 400
     
@@ -209,8 +210,7 @@ def update_question(question_id):
 @require_emm_access
 def get_exams():
     """Get exams based on user role."""
-    current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
@@ -244,14 +244,13 @@ def get_exams():
 def create_exam():
     """Create a new exam (Exam Administrators only)."""
     current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     if not current_user.has_role('Exam Administrator'):
         return jsonify({'error': 'Only Exam Administrators can create exams'}), 403
     
-    schema = ExamSchema()
     try:
-        data = schema.load(request.json)
+        data = _EXAM_SCHEMA.load(request.json)
     except ValidationError as err:
         return jsonify({'error': 'Validation error', 'messages': err.messages}), 400
     
@@ -287,10 +286,9 @@ def create_exam():
 @require_emm_access
 def get_exam(exam_id):
     """Get specific exam."""
-    current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
-    exam = EMMExam.query.get_or_404(exam_id)
+    exam = db.get_or_404(EMMExam, exam_id)
     
     # Check if user can access this exam
     if not exam.is_active and not current_user.has_role('Exam Administrator'):
@@ -308,7 +306,7 @@ def get_exam(exam_id):
 def start_exam(exam_id):
     """Start taking an exam."""
     current_user_id = int(get_jwt_identity())
-    exam = EMMExam.query.get_or_404(exam_id)
+    exam = db.get_or_404(EMMExam, exam_id)
     
     # Check if exam is available
     if not exam.is_active:
@@ -361,7 +359,7 @@ def start_exam(exam_id):
 def submit_answer(submission_id):
     """Submit answer for a question."""
     current_user_id = int(get_jwt_identity())
-    submission = EMMExamSubmission.query.get_or_404(submission_id)
+    submission = db.get_or_404(EMMExamSubmission, submission_id)
     
     # Check ownership
     if submission.candidate_id != current_user_id:
@@ -371,14 +369,13 @@ def submit_answer(submission_id):
     if submission.status != 'In Progress':
         return jsonify({'error': 'Submission is not active'}), 400
     
-    schema = SubmissionAnswerSchema()
     try:
-        data = schema.load(request.json)
+        data = _SUBMISSION_ANSWER_SCHEMA.load(request.json)
     except ValidationError as err:
         return jsonify({'error': 'Validation error', 'messages': err.messages}), 400
     
     # Validate question belongs to exam
-    question = EMMQuestion.query.get_or_404(data['question_id'])
+    question = db.get_or_404(EMMQuestion, data['question_id'])
     if question not in submission.exam.questions:
         return jsonify({'error': 'Question not in this exam'}), 400
     
@@ -413,7 +410,7 @@ def submit_answer(submission_id):
 def submit_exam(submission_id):
     """Submit the entire exam."""
     current_user_id = int(get_jwt_identity())
-    submission = EMMExamSubmission.query.get_or_404(submission_id)
+    submission = db.get_or_404(EMMExamSubmission, submission_id)
     
     # Check ownership
     if submission.candidate_id != current_user_id:
@@ -448,7 +445,7 @@ def submit_exam(submission_id):
 def get_submissions():
     """Get exam submissions based on user role."""
     current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
@@ -485,9 +482,9 @@ def get_submissions():
 def get_submission(submission_id):
     """Get specific submission."""
     current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
-    submission = EMMExamSubmission.query.get_or_404(submission_id)
+    submission = db.get_or_404(EMMExamSubmission, submission_id)
     
     # Check access permissions
     if not (current_user.has_role('Exam Administrator') or 
@@ -510,7 +507,7 @@ def get_submission(submission_id):
 def get_emm_dashboard():
     """Get EMM dashboard data for current user."""
     current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     dashboard_data = {
         'user_info': current_user.to_dict(),
@@ -553,8 +550,7 @@ def get_emm_dashboard():
 @require_emm_access
 def get_promotion_scores():
     """Get exam scores for promotion calculation (HR Admin only)."""
-    current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     if not current_user.has_role('HR Admin'):
         return jsonify({'error': 'Only HR Admin can access promotion scores'}), 403
@@ -5,8 +5,9 @@ API endpoints for bulk import and export operations.
 
 from flask import Blueprint, request, jsonify, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from src.models import User
+from src.models import db, User
 from src.services.user_import_service import import_users_from_csv, get_csv_template
+from src.routes._auth import load_current_user
 
 import_export_bp = Blueprint('import_export', __name__)
 
@@ -16,7 +17,7 @@ import_export_bp = Blueprint('import_export', __name__)
 def download_csv_template():
     """Download CSV template for user import."""
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     # Check if user is HR Admin
     if not current_user.has_role('HR Admin'):
@@ -36,7 +37,7 @@ def download_csv_template():
 def import_users():
     """Import users from CSV file."""
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     # Check if user is HR Admin
     if not current_user.has_role('HR Admin'):
@@ -68,7 +69,7 @@ def import_users():
 def export_users():
     """Export all users to CSV."""
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     # Check if user is HR Admin
     if not current_user.has_role('HR Admin'):
@@ -98,7 +99,7 @@ def export_users():
     for user in users:
         supervisor_employee_id = ''
         if user.supervisor_id:
-            supervisor = User.query.get(user.supervisor_id)
+            supervisor = db.session.get(User, user.supervisor_id)
             if supervisor:
                 supervisor_employee_id = supervisor.employee_id
         
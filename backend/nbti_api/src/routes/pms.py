@@ -1,12 +1,28 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import Schema, fields, ValidationError
+from sqlalchemy import update, or_
+from sqlalchemy.orm import contains_eager
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from src.models.user import User, db
-from src.models.pms import PMSEvaluation, PMSGoal
+from src.models.pms import (
+    PMSEvaluation, PMSGoal, PMSStatusCounter,
+    adjust_status_counters, status_counter_keys
+)
+from src.routes._auth import error_response
 
 pms_bp = Blueprint('pms', __name__)
 
+# Roles that may access PMS endpoints
+PMS_ROLES = frozenset({'Staff Member', 'Supervisor', 'Head of Department', 'Head of Unit',
+                       'Centre Manager', 'Director', 'HR Admin'})
+
+# Fixed responses for the hot rejection paths
+_ERR_USER_NOT_FOUND = error_response('User not found', 404)
+_ERR_NO_PMS_ACCESS = error_response('Insufficient permissions for PMS access', 403)
+_ERR_INSUFFICIENT_PERMISSIONS = error_response('Insufficient permissions', 403)
+
 # Schemas for request validation
 class EvaluationSchema(Schema):
     staff_id = fields.Int(required=True)
@@ -23,22 +39,47 @@ class RatingSchema(Schema):
     rating = fields.Int(required=True, validate=lambda x: 1 <= x <= 5)
     supervisor_comments = fields.Str(required=False)
 
+# Schemas are stateless, so build them once and share across requests
+_EVAL_SCHEMA = EvaluationSchema()
+_GOAL_SCHEMA = GoalSchema()
+_RATING_SCHEMA = RatingSchema()
+
+def _is_duplicate_evaluation(error):
+    """Check whether an IntegrityError comes from the staff/quarter/year constraint."""
+    message = str(error.orig)
+    return ('uq_pms_evaluation_staff_period' in message or
+            'UNIQUE constraint failed: pms_evaluations.' in message)
+
+def _get_goal_or_404(goal_id, *criteria):
+    """
+    Load a goal with its evaluation, applying access criteria in the same query.
+
+    Returns None if the goal exists but the criteria don't match (the existence
+    check only runs on that error path); aborts with 404 if it doesn't exist.
+    """
+    goal = PMSGoal.query.join(PMSGoal.evaluation).options(
+        contains_eager(PMSGoal.evaluation)
+    ).filter(PMSGoal.id == goal_id, *criteria).first()
+    
+    if goal is None and db.session.query(PMSGoal.id).filter_by(id=goal_id).first() is None:
+        abort(404)
+    return goal
+
 def require_pms_access(f):
     """Decorator to ensure user has PMS access."""
     def decorated_function(*args, **kwargs):
         current_user_id = int(get_jwt_identity())
-        user = User.query.get(current_user_id)
+        user = db.session.get(User, current_user_id)
         
         if not user:
-            return jsonify({'error': 'User not found'}), 404
+            return _ERR_USER_NOT_FOUND
         
         # Check if user has any PMS-related role
-        pms_roles = ['Staff Member', 'Supervisor', 'Head of Department', 'Head of Unit', 
-                     'Centre Manager', 'Director', 'HR Admin']
-        
-        if not any(user.has_role(role) for role in pms_roles):
-            return jsonify({'error': 'Insufficient permissions for PMS access'}), 403
+        if PMS_ROLES.isdisjoint(role.name for role in user.roles):
+            return _ERR_NO_PMS_ACCESS
         
+        # Memoise the user for the view so it doesn't load it again
+        g._pms_user = user
         return f(*args, **kwargs)
     decorated_function.__name__ = f.__name__
     return decorated_function
@@ -49,8 +90,8 @@ def require_pms_access(f):
 @require_pms_access
 def get_evaluations():
     """Get evaluations based on user role."""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = g._pms_user
+    current_user_id = current_user.id
     
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
@@ -97,12 +138,11 @@ def get_evaluations():
 @require_pms_access
 def create_evaluation():
     """Create a new evaluation (staff can initiate their own)."""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = g._pms_user
+    current_user_id = current_user.id
     
-    schema = EvaluationSchema()
     try:
-        data = schema.load(request.json)
+        data = _EVAL_SCHEMA.load(request.json)
     except ValidationError as err:
         return jsonify({'error': 'Validation error', 'messages': err.messages}), 400
     
@@ -111,23 +151,16 @@ def create_evaluation():
         if not (current_user.has_role('HR Admin') or current_user.has_role('Supervisor')):
             return jsonify({'error': 'Can only create evaluation for yourself'}), 403
     
-    # Check if evaluation already exists for this quarter/year
-    existing = PMSEvaluation.query.filter_by(
-        staff_id=data['staff_id'],
-        quarter=data['quarter'],
-        year=data['year']
-    ).first()
-    
-    if existing:
-        return jsonify({'error': 'Evaluation already exists for this quarter/year'}), 400
-    
     # Find supervisor (for now, assume it's provided or use current user if they're creating for someone else)
-    staff_member = User.query.get(data['staff_id'])
+    staff_member = db.session.get(User, data['staff_id'])
     if not staff_member:
         return jsonify({'error': 'Staff member not found'}), 404
     
-    # For MVP, supervisor_id can be set to current user if they're creating for someone else
-    supervisor_id = current_user_id if data['staff_id'] != current_user_id else None
+    # For MVP, supervisor_id can be set to current user if they're creating for someone else;
+    # staff initiating their own evaluation use their assigned supervisor
+    supervisor_id = current_user_id if data['staff_id'] != current_user_id else staff_member.supervisor_id
+    if not supervisor_id:
+        return jsonify({'error': 'No supervisor assigned to this staff member'}), 400
     
     evaluation = PMSEvaluation(
         staff_id=data['staff_id'],
@@ -137,8 +170,15 @@ def create_evaluation():
         status='Pending'
     )
     
+    # The unique constraint on (staff_id, quarter, year) rejects duplicates
     db.session.add(evaluation)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError as err:
+        db.session.rollback()
+        if not _is_duplicate_evaluation(err):
+            raise
+        return jsonify({'error': 'Evaluation already exists for this quarter/year'}), 409
     
     return jsonify({
         'message': 'Evaluation created successfully',
@@ -150,16 +190,20 @@ def create_evaluation():
 @require_pms_access
 def get_evaluation(evaluation_id):
     """Get specific evaluation."""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = g._pms_user
+    current_user_id = current_user.id
     
-    evaluation = PMSEvaluation.query.get_or_404(evaluation_id)
+    # Check access permissions as part of the fetch
+    query = PMSEvaluation.query.filter(PMSEvaluation.id == evaluation_id)
+    if not current_user.has_role('HR Admin'):
+        query = query.filter(or_(PMSEvaluation.staff_id == current_user_id,
+                                 PMSEvaluation.supervisor_id == current_user_id))
+    evaluation = query.first()
     
-    # Check access permissions
-    if not (current_user.has_role('HR Admin') or 
-            evaluation.staff_id == current_user_id or 
-            evaluation.supervisor_id == current_user_id):
-        return jsonify({'error': 'Insufficient permissions'}), 403
+    if evaluation is None:
+        if db.session.query(PMSEvaluation.id).filter_by(id=evaluation_id).first() is None:
+            abort(404)
+        return _ERR_INSUFFICIENT_PERMISSIONS
     
     return jsonify({'evaluation': evaluation.to_dict()}), 200
 
@@ -168,20 +212,20 @@ def get_evaluation(evaluation_id):
 @require_pms_access
 def assign_supervisor(evaluation_id):
     """Assign supervisor to evaluation (HR Admin only)."""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = g._pms_user
+    current_user_id = current_user.id
     
     if not current_user.has_role('HR Admin'):
         return jsonify({'error': 'Only HR Admin can assign supervisors'}), 403
     
-    evaluation = PMSEvaluation.query.get_or_404(evaluation_id)
+    evaluation = db.get_or_404(PMSEvaluation, evaluation_id)
     data = request.json
     supervisor_id = data.get('supervisor_id')
     
     if not supervisor_id:
         return jsonify({'error': 'Supervisor ID is required'}), 400
     
-    supervisor = User.query.get(supervisor_id)
+    supervisor = db.session.get(User, supervisor_id)
     if not supervisor:
         return jsonify({'error': 'Supervisor not found'}), 404
     
@@ -202,14 +246,14 @@ def assign_supervisor(evaluation_id):
 @require_pms_access
 def get_goals(evaluation_id):
     """Get goals for an evaluation."""
-    current_user_id = get_jwt_identity()
-    evaluation = PMSEvaluation.query.get_or_404(evaluation_id)
+    current_user_id = g._pms_user.id
+    evaluation = db.get_or_404(PMSEvaluation, evaluation_id)
     
     # Check access permissions
     if not (evaluation.staff_id == current_user_id or 
             evaluation.supervisor_id == current_user_id or
-            User.query.get(current_user_id).has_role('HR Admin')):
-        return jsonify({'error': 'Insufficient permissions'}), 403
+            g._pms_user.has_role('HR Admin')):
+        return _ERR_INSUFFICIENT_PERMISSIONS
     
     goals = evaluation.goals.all()
     return jsonify({'goals': [goal.to_dict() for goal in goals]}), 200
@@ -219,18 +263,17 @@ def get_goals(evaluation_id):
 @require_pms_access
 def create_goal(evaluation_id):
     """Create a new goal for an evaluation."""
-    current_user_id = get_jwt_identity()
-    evaluation = PMSEvaluation.query.get_or_404(evaluation_id)
+    current_user_id = g._pms_user.id
+    evaluation = db.get_or_404(PMSEvaluation, evaluation_id)
     
     # Check if user can add goals (staff member or supervisor)
     if not (evaluation.staff_id == current_user_id or 
             evaluation.supervisor_id == current_user_id or
-            User.query.get(current_user_id).has_role('HR Admin')):
-        return jsonify({'error': 'Insufficient permissions'}), 403
+            g._pms_user.has_role('HR Admin')):
+        return _ERR_INSUFFICIENT_PERMISSIONS
     
-    schema = GoalSchema()
     try:
-        data = schema.load(request.json)
+        data = _GOAL_SCHEMA.load(request.json)
     except ValidationError as err:
         return jsonify({'error': 'Validation error', 'messages': err.messages}), 400
     
@@ -243,9 +286,20 @@ def create_goal(evaluation_id):
     
     db.session.add(goal)
     
-    # Update evaluation status
-    if evaluation.status == 'Pending':
-        evaluation.status = 'In Progress'
+    # Move evaluation to In Progress; the WHERE clause makes this a no-op
+    # once the status has already moved on
+    result = db.session.execute(
+        update(PMSEvaluation)
+        .where(PMSEvaluation.id == evaluation_id, PMSEvaluation.status == 'Pending')
+        .values(status='In Progress')
+    )
+    if result.rowcount:
+        # Core updates bypass the mapper events that maintain dashboard counters
+        adjust_status_counters(
+            db.session.connection(),
+            status_counter_keys(evaluation.staff_id, evaluation.supervisor_id, 'Pending'),
+            status_counter_keys(evaluation.staff_id, evaluation.supervisor_id, 'In Progress')
+        )
     
     db.session.commit()
     
@@ -259,14 +313,12 @@ def create_goal(evaluation_id):
 @require_pms_access
 def agree_goal(goal_id):
     """Mark goal as agreed upon."""
-    current_user_id = get_jwt_identity()
-    goal = PMSGoal.query.get_or_404(goal_id)
-    evaluation = goal.evaluation
-    
+    current_user_id = g._pms_user.id
     # Both staff and supervisor can agree on goals
-    if not (evaluation.staff_id == current_user_id or 
-            evaluation.supervisor_id == current_user_id):
-        return jsonify({'error': 'Insufficient permissions'}), 403
+    goal = _get_goal_or_404(goal_id, or_(PMSEvaluation.staff_id == current_user_id,
+                                         PMSEvaluation.supervisor_id == current_user_id))
+    if goal is None:
+        return _ERR_INSUFFICIENT_PERMISSIONS
     
     goal.agreed = True
     db.session.commit()
@@ -282,17 +334,14 @@ def agree_goal(goal_id):
 @require_pms_access
 def rate_goal(goal_id):
     """Rate a goal (supervisor only)."""
-    current_user_id = get_jwt_identity()
-    goal = PMSGoal.query.get_or_404(goal_id)
-    evaluation = goal.evaluation
-    
+    current_user_id = g._pms_user.id
     # Only supervisor can rate goals
-    if evaluation.supervisor_id != current_user_id:
+    goal = _get_goal_or_404(goal_id, PMSEvaluation.supervisor_id == current_user_id)
+    if goal is None:
         return jsonify({'error': 'Only the assigned supervisor can rate goals'}), 403
     
-    schema = RatingSchema()
     try:
-        data = schema.load(request.json)
+        data = _RATING_SCHEMA.load(request.json)
     except ValidationError as err:
         return jsonify({'error': 'Validation error', 'messages': err.messages}), 400
     
@@ -311,8 +360,8 @@ def rate_goal(goal_id):
 @require_pms_access
 def finalize_evaluation(evaluation_id):
     """Finalize evaluation and calculate final score."""
-    current_user_id = get_jwt_identity()
-    evaluation = PMSEvaluation.query.get_or_404(evaluation_id)
+    current_user_id = g._pms_user.id
+    evaluation = db.get_or_404(PMSEvaluation, evaluation_id)
     
     # Only supervisor can finalize evaluation
     if evaluation.supervisor_id != current_user_id:
@@ -344,43 +393,50 @@ def finalize_evaluation(evaluation_id):
 @require_pms_access
 def get_dashboard():
     """Get PMS dashboard data for current user."""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = g._pms_user
+    current_user_id = current_user.id
     
     dashboard_data = {
         'user_info': current_user.to_dict(),
         'stats': {}
     }
     
+    # Counts come from the pre-aggregated status counters
     if current_user.has_role('Staff Member'):
         # Staff member dashboard
-        my_evaluations = PMSEvaluation.query.filter_by(staff_id=current_user_id).all()
+        counts = PMSStatusCounter.counts_for('staff', current_user_id)
+        recent = PMSEvaluation.query.filter_by(staff_id=current_user_id).order_by(
+            PMSEvaluation.id.desc()
+        ).limit(3).all()
         dashboard_data['stats'] = {
-            'total_evaluations': len(my_evaluations),
-            'pending_evaluations': len([e for e in my_evaluations if e.status == 'Pending']),
-            'in_progress_evaluations': len([e for e in my_evaluations if e.status == 'In Progress']),
-            'completed_evaluations': len([e for e in my_evaluations if e.status == 'Completed']),
-            'recent_evaluations': [e.to_dict() for e in my_evaluations[-3:]]
+            'total_evaluations': sum(counts.values()),
+            'pending_evaluations': counts.get('Pending', 0),
+            'in_progress_evaluations': counts.get('In Progress', 0),
+            'completed_evaluations': counts.get('Completed', 0),
+            'recent_evaluations': [e.to_dict() for e in reversed(recent)]
         }
     
     if current_user.has_role('Supervisor'):
         # Supervisor dashboard
-        supervised_evaluations = PMSEvaluation.query.filter_by(supervisor_id=current_user_id).all()
+        counts = PMSStatusCounter.counts_for('supervisor', current_user_id)
+        recent = PMSEvaluation.query.filter_by(supervisor_id=current_user_id).order_by(
+            PMSEvaluation.id.desc()
+        ).limit(3).all()
         dashboard_data['stats'].update({
-            'supervised_evaluations': len(supervised_evaluations),
-            'pending_reviews': len([e for e in supervised_evaluations if e.status == 'In Progress']),
-            'completed_reviews': len([e for e in supervised_evaluations if e.status == 'Completed']),
-            'recent_supervised': [e.to_dict() for e in supervised_evaluations[-3:]]
+            'supervised_evaluations': sum(counts.values()),
+            'pending_reviews': counts.get('In Progress', 0),
+            'completed_reviews': counts.get('Completed', 0),
+            'recent_supervised': [e.to_dict() for e in reversed(recent)]
         })
     
     if current_user.has_role('HR Admin'):
         # HR Admin dashboard
-        all_evaluations = PMSEvaluation.query.all()
+        counts = PMSStatusCounter.counts_for('system')
         dashboard_data['stats'].update({
-            'total_system_evaluations': len(all_evaluations),
-            'system_pending': len([e for e in all_evaluations if e.status == 'Pending']),
-            'system_in_progress': len([e for e in all_evaluations if e.status == 'In Progress']),
-            'system_completed': len([e for e in all_evaluations if e.status == 'Completed'])
+            'total_system_evaluations': sum(counts.values()),
+            'system_pending': counts.get('Pending', 0),
+            'system_in_progress': counts.get('In Progress', 0),
+            'system_completed': counts.get('Completed', 0)
         })
     
     return jsonify(dashboard_data), 200
@@ -391,12 +447,10 @@ def get_dashboard():
 @require_pms_access
 def add_staff_comment(goal_id):
     """Add staff comment to a goal."""
-    current_user_id = get_jwt_identity()
-    goal = PMSGoal.query.get_or_404(goal_id)
-    evaluation = goal.evaluation
-    
+    current_user_id = g._pms_user.id
     # Only staff member can add their own comments
-    if evaluation.staff_id != current_user_id:
+    goal = _get_goal_or_404(goal_id, PMSEvaluation.staff_id == current_user_id)
+    if goal is None:
         return jsonify({'error': 'Can only comment on your own goals'}), 403
     
     data = request.json
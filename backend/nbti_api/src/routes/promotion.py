@@ -7,35 +7,46 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import date
 from src.models import db, User, StepIncrementLog
+from src.streaming import stream_json_object
 from src.services.step_allocation_service import (
     get_promotion_step_recommendation,
     apply_promotion,
+    apply_promotion_bulk,
     increment_user_step,
     get_max_step_for_grade
 )
 from src.services.eligibility_service import (
-    is_eligible_for_promotion,
+    get_cached_eligibility,
     get_eligible_candidates,
     update_eligibility_status_for_all_staff
 )
+from src.routes._auth import error_response, load_current_user
 
 promotion_bp = Blueprint('promotion', __name__)
 
 
+# Fixed error responses
+_ERR_USER_NOT_FOUND = error_response('User not found', 404)
+_ERR_UNAUTHORIZED = error_response('Unauthorized', 403)
+_ERR_NO_TARGET_GRADE = error_response('Cannot determine target grade', 400)
+_ERR_MISSING_FIELDS = error_response('Missing required fields: new_grade, new_step', 400)
+_ERR_INVALID_DATE = error_response('Invalid date format. Use YYYY-MM-DD', 400)
+
+
 @promotion_bp.route('/eligibility/<int:user_id>', methods=['GET'])
 @jwt_required()
 def check_eligibility(user_id):
     """Check promotion eligibility for a user."""
-    user = User.query.get(user_id)
+    user = db.session.get(User, user_id)
     
     if not user:
-        return jsonify({'error': 'User not found'}), 404
+        return _ERR_USER_NOT_FOUND
     
     target_grade = request.args.get('target_grade', type=int)
     check_vacancy = request.args.get('check_vacancy', 'false').lower() == 'true'
     promotion_cycle = request.args.get('promotion_cycle')
     
-    eligibility = is_eligible_for_promotion(
+    eligibility = get_cached_eligibility(
         user,
         target_grade=target_grade,
         check_vacancy=check_vacancy,
@@ -50,11 +61,11 @@ def check_eligibility(user_id):
 def get_eligible():
     """Get all eligible candidates for promotion."""
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     # Check if user is HR Admin or Director
     if not (current_user.has_role('HR Admin') or current_user.has_role('Director')):
-        return jsonify({'error': 'Unauthorized'}), 403
+        return _ERR_UNAUTHORIZED
     
     target_grade = request.args.get('target_grade', type=int)
     promotion_cycle = request.args.get('promotion_cycle')
@@ -71,10 +82,10 @@ def get_eligible():
 @jwt_required()
 def get_step_recommendation(user_id):
     """Get promotion step recommendation for a user."""
-    user = User.query.get(user_id)
+    user = db.session.get(User, user_id)
     
     if not user:
-        return jsonify({'error': 'User not found'}), 404
+        return _ERR_USER_NOT_FOUND
     
     target_grade = request.args.get('target_grade', type=int)
     
@@ -82,7 +93,7 @@ def get_step_recommendation(user_id):
         target_grade = user.conraiss_grade + 1 if user.conraiss_grade else None
     
     if not target_grade:
-        return jsonify({'error': 'Cannot determine target grade'}), 400
+        return _ERR_NO_TARGET_GRADE
     
     recommendation = get_promotion_step_recommendation(user, target_grade)
     
@@ -94,22 +105,22 @@ def get_step_recommendation(user_id):
 def apply_user_promotion(user_id):
     """Apply promotion to a user."""
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     # Check if user is HR Admin
     if not current_user.has_role('HR Admin'):
-        return jsonify({'error': 'Unauthorized'}), 403
+        return _ERR_UNAUTHORIZED
     
-    user = User.query.get(user_id)
+    user = db.session.get(User, user_id)
     
     if not user:
-        return jsonify({'error': 'User not found'}), 404
+        return _ERR_USER_NOT_FOUND
     
     data = request.get_json()
     
     # Validate required fields
     if 'new_grade' not in data or 'new_step' not in data:
-        return jsonify({'error': 'Missing required fields: new_grade, new_step'}), 400
+        return _ERR_MISSING_FIELDS
     
     new_grade = data['new_grade']
     new_step = data['new_step']
@@ -121,7 +132,7 @@ def apply_user_promotion(user_id):
         try:
             effective_date = date.fromisoformat(effective_date_str)
         except ValueError:
-            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+            return _ERR_INVALID_DATE
     else:
         effective_date = date.today()
     
@@ -157,21 +168,77 @@ def apply_user_promotion(user_id):
         return jsonify({'error': str(e)}), 500
 
 
+@promotion_bp.route('/apply', methods=['POST'])
+@jwt_required()
+def apply_promotions_bulk():
+    """Apply promotions to several users in one batch."""
+    current_user = load_current_user()
+    
+    # Check if user is HR Admin
+    if not current_user.has_role('HR Admin'):
+        return _ERR_UNAUTHORIZED
+    
+    data = request.get_json() or {}
+    promotions = data.get('promotions')
+    if not isinstance(promotions, list) or not promotions:
+        return jsonify({'error': 'promotions must be a non-empty list'}), 400
+    
+    # Validate every entry before anything is written
+    specs = []
+    for index, promotion in enumerate(promotions):
+        if not isinstance(promotion, dict) or not {'user_id', 'new_grade', 'new_step'} <= promotion.keys():
+            return jsonify({'error': f'Promotion {index}: user_id, new_grade and new_step are required'}), 400
+        
+        new_grade = promotion['new_grade']
+        new_step = promotion['new_step']
+        max_step = get_max_step_for_grade(new_grade)
+        if new_step < 1 or new_step > max_step:
+            return jsonify({'error': f'Promotion {index}: Invalid step. Grade {new_grade} has steps 1-{max_step}'}), 400
+        
+        effective_date = None
+        if promotion.get('effective_date'):
+            try:
+                effective_date = date.fromisoformat(promotion['effective_date'])
+            except ValueError:
+                return _ERR_INVALID_DATE
+        
+        specs.append({
+            'user_id': promotion['user_id'],
+            'new_grade': new_grade,
+            'new_step': new_step,
+            'effective_date': effective_date,
+            'processed_by': current_user.id,
+            'notes': promotion.get('notes')
+        })
+    
+    try:
+        result = apply_promotion_bulk(specs)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    
+    return jsonify({
+        'message': 'Promotions applied successfully',
+        'promoted_count': result['promoted'],
+        'not_found': result['not_found']
+    }), 200
+
+
 @promotion_bp.route('/increment-step/<int:user_id>', methods=['POST'])
 @jwt_required()
 def increment_step(user_id):
     """Increment user's step (annual increment)."""
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     # Check if user is HR Admin
     if not current_user.has_role('HR Admin'):
-        return jsonify({'error': 'Unauthorized'}), 403
+        return _ERR_UNAUTHORIZED
     
-    user = User.query.get(user_id)
+    user = db.session.get(User, user_id)
     
     if not user:
-        return jsonify({'error': 'User not found'}), 404
+        return _ERR_USER_NOT_FOUND
     
     data = request.get_json() or {}
     notes = data.get('notes')
@@ -201,29 +268,31 @@ def increment_step(user_id):
 @jwt_required()
 def get_step_history(user_id):
     """Get step increment history for a user."""
-    user = User.query.get(user_id)
+    user = db.session.get(User, user_id)
     
     if not user:
-        return jsonify({'error': 'User not found'}), 404
-    
-    logs = StepIncrementLog.query.filter_by(user_id=user_id).order_by(
-        StepIncrementLog.increment_date.desc()
-    ).all()
-    
-    return jsonify({
-        'user_id': user_id,
-        'count': len(logs),
-        'history': [{
-            'id': log.id,
-            'previous_step': log.previous_step,
-            'new_step': log.new_step,
-            'increment_date': log.increment_date.isoformat(),
-            'increment_type': log.increment_type,
-            'notes': log.notes,
-            'processed_by': log.processed_by,
-            'created_at': log.created_at.isoformat() if log.created_at else None
-        } for log in logs]
-    }), 200
+        return _ERR_USER_NOT_FOUND
+    
+    # History can be long, so fetch it in batches and stream it out
+    logs = db.session.execute(
+        db.select(StepIncrementLog)
+        .filter_by(user_id=user_id)
+        .order_by(StepIncrementLog.increment_date.desc())
+        .execution_options(yield_per=500)
+    ).scalars()
+    
+    history = ({
+        'id': log.id,
+        'previous_step': log.previous_step,
+        'new_step': log.new_step,
+        'increment_date': log.increment_date.isoformat(),
+        'increment_type': log.increment_type,
+        'notes': log.notes,
+        'processed_by': log.processed_by,
+        'created_at': log.created_at.isoformat() if log.created_at else None
+    } for log in logs)
+    
+    return stream_json_object({'user_id': user_id}, 'history', history, count_key='count')
 
 
 @promotion_bp.route('/batch-eligibility-update', methods=['POST'])
@@ -231,11 +300,11 @@ def get_step_history(user_id):
 def batch_eligibility_update():
     """Update eligibility status for all staff."""
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = load_current_user()
     
     # Check if user is HR Admin
     if not current_user.has_role('HR Admin'):
-        return jsonify({'error': 'Unauthorized'}), 403
+        return _ERR_UNAUTHORIZED
     
     stats = update_eligibility_status_for_all_staff()
     
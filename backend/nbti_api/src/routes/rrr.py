@@ -3,32 +3,32 @@ RRR (Recommendation, Recognition, Reward) Routes
 API endpoints for managing RRR allocations and recommendations.
 """
 
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from src.models import db, User, RRRVacancy, RRRRecommendation
+from flask import Blueprint, g, request, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func, cast, Integer
+from src.models import db, RRRVacancy, RRRRecommendation
+from src.streaming import stream_json_object
 from src.services.rrr_allocation_service import (
     allocate_rrr_for_grade,
     allocate_rrr_for_all_grades,
     generate_rrr_recommendations,
     get_rrr_rankings_for_grade,
     approve_rrr_recommendation,
-    reject_rrr_recommendation
+    approve_rrr_recommendations_bulk,
+    reject_rrr_recommendation,
+    reject_rrr_recommendations_bulk
 )
+from src.services import cache_service
+from src.services.response_cache import cached, invalidate_cycle
+from src.routes._auth import requires_any_role
 
 rrr_bp = Blueprint('rrr', __name__)
 
 
 @rrr_bp.route('/vacancies', methods=['POST'])
-@jwt_required()
+@requires_any_role('HR Admin')
 def create_or_update_vacancy():
     """Create or update RRR vacancy configuration for a grade."""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    # Check if user is HR Admin
-    if not current_user.has_role('HR Admin'):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     data = request.get_json()
     
     # Validate required fields
@@ -62,13 +62,17 @@ def create_or_update_vacancy():
             recognition_slots=data.get('recognition_slots', 0),
             reward_slots=data.get('reward_slots', 0),
             is_active=data.get('is_active', True),
-            created_by=current_user_id
+            created_by=g.current_user_id
         )
         db.session.add(vacancy)
         message = 'Vacancy configuration created'
     
     db.session.commit()
     
+    # Drop cached eligibility results that included a vacancy check for this cycle
+    cache_service.safe_multi_del(f"elig:*:*:{cycle}:1")
+    invalidate_cycle('rrr', cycle)
+    
     return jsonify({
         'message': message,
         'vacancy': vacancy.to_dict()
@@ -77,6 +81,7 @@ def create_or_update_vacancy():
 
 @rrr_bp.route('/vacancies/<promotion_cycle>', methods=['GET'])
 @jwt_required()
+@cached('rrr', policy='normal')
 def get_vacancies(promotion_cycle):
     """Get all vacancy configurations for a promotion cycle."""
     vacancies = RRRVacancy.query.filter_by(
@@ -91,16 +96,9 @@ def get_vacancies(promotion_cycle):
 
 
 @rrr_bp.route('/allocate/<promotion_cycle>', methods=['POST'])
-@jwt_required()
+@requires_any_role('HR Admin')
 def allocate_rrr(promotion_cycle):
     """Trigger RRR allocation for a promotion cycle."""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    # Check if user is HR Admin
-    if not current_user.has_role('HR Admin'):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     data = request.get_json() or {}
     pms_year = data.get('pms_year')
     exam_id = data.get('exam_id')
@@ -115,8 +113,9 @@ def allocate_rrr(promotion_cycle):
     recommendations = generate_rrr_recommendations(
         allocation_results, 
         promotion_cycle,
-        recommended_by=current_user_id
+        recommended_by=g.current_user_id
     )
+    invalidate_cycle('rrr', promotion_cycle)
     
     # Prepare summary
     summary = {
@@ -142,10 +141,17 @@ def allocate_rrr(promotion_cycle):
 
 @rrr_bp.route('/recommendations/<promotion_cycle>', methods=['GET'])
 @jwt_required()
+@cached('rrr', policy='short')
 def get_recommendations(promotion_cycle):
-    """Get all RRR recommendations for a promotion cycle."""
+    """
+    Get RRR recommendations for a promotion cycle (paginated).
+    
+    Pass ?all=true to stream every matching recommendation instead.
+    """
     grade = request.args.get('grade', type=int)
     status = request.args.get('status')
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 50, type=int), 500)
     
     query = RRRRecommendation.query.filter_by(promotion_cycle=promotion_cycle)
     
@@ -155,20 +161,34 @@ def get_recommendations(promotion_cycle):
     if status:
         query = query.filter_by(status=status)
     
-    recommendations = query.order_by(
+    # to_dict only reads columns, so no relationships need loading.
+    query = query.order_by(
         RRRRecommendation.conraiss_grade,
-        RRRRecommendation.rank_in_grade
-    ).all()
+        RRRRecommendation.rank_in_grade,
+        RRRRecommendation.id
+    )
+    
+    if request.args.get('all', 'false').lower() == 'true':
+        # Full-cycle export: fetch in batches and stream it out
+        rows = (r.to_dict() for r in query.yield_per(500))
+        return stream_json_object({'promotion_cycle': promotion_cycle}, 'recommendations',
+                                  rows, count_key='count')
+    
+    recommendations = query.paginate(page=page, per_page=per_page, error_out=False)
     
     return jsonify({
         'promotion_cycle': promotion_cycle,
-        'count': len(recommendations),
-        'recommendations': [r.to_dict() for r in recommendations]
+        'count': len(recommendations.items),
+        'recommendations': [r.to_dict() for r in recommendations.items],
+        'total': recommendations.total,
+        'pages': recommendations.pages,
+        'current_page': page
     }), 200
 
 
 @rrr_bp.route('/rankings/<int:grade>/<promotion_cycle>', methods=['GET'])
 @jwt_required()
+@cached('rrr', policy='long')
 def get_rankings(grade, promotion_cycle):
     """Get candidate rankings for a specific grade and cycle."""
     rankings = get_rrr_rankings_for_grade(grade, promotion_cycle)
@@ -182,18 +202,12 @@ def get_rankings(grade, promotion_cycle):
 
 
 @rrr_bp.route('/recommendations/<int:recommendation_id>/approve', methods=['PUT'])
-@jwt_required()
+@requires_any_role('HR Admin', 'Director')
 def approve_recommendation(recommendation_id):
     """Approve an RRR recommendation."""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    # Check if user is HR Admin or Director
-    if not (current_user.has_role('HR Admin') or current_user.has_role('Director')):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     try:
-        recommendation = approve_rrr_recommendation(recommendation_id, current_user_id)
+        recommendation = approve_rrr_recommendation(recommendation_id, g.current_user_id)
+        invalidate_cycle('rrr', recommendation.promotion_cycle)
         return jsonify({
             'message': 'Recommendation approved successfully',
             'recommendation': recommendation.to_dict()
@@ -203,21 +217,15 @@ def approve_recommendation(recommendation_id):
 
 
 @rrr_bp.route('/recommendations/<int:recommendation_id>/reject', methods=['PUT'])
-@jwt_required()
+@requires_any_role('HR Admin', 'Director')
 def reject_recommendation(recommendation_id):
     """Reject an RRR recommendation."""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    # Check if user is HR Admin or Director
-    if not (current_user.has_role('HR Admin') or current_user.has_role('Director')):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     data = request.get_json()
     rejection_reason = data.get('rejection_reason', 'No reason provided')
     
     try:
         recommendation = reject_rrr_recommendation(recommendation_id, rejection_reason)
+        invalidate_cycle('rrr', recommendation.promotion_cycle)
         return jsonify({
             'message': 'Recommendation rejected',
             'recommendation': recommendation.to_dict()
@@ -226,46 +234,107 @@ def reject_recommendation(recommendation_id):
         return jsonify({'error': str(e)}), 404
 
 
+def _recommendation_ids_from_request(data):
+    ids = (data or {}).get('recommendation_ids')
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+        return None
+    return ids
+
+
+@rrr_bp.route('/recommendations/approve', methods=['PUT'])
+@requires_any_role('HR Admin', 'Director')
+def approve_recommendations_bulk():
+    """Approve several RRR recommendations at once."""
+    recommendation_ids = _recommendation_ids_from_request(request.get_json())
+    if recommendation_ids is None:
+        return jsonify({'error': 'recommendation_ids must be a non-empty list of IDs'}), 400
+    
+    try:
+        approved = approve_rrr_recommendations_bulk(recommendation_ids, g.current_user_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    
+    for promotion_cycle in {row['promotion_cycle'] for row in approved}:
+        invalidate_cycle('rrr', promotion_cycle)
+    return jsonify({
+        'message': 'Recommendations approved successfully',
+        'approved_count': len(approved),
+        'recommendation_ids': [row['id'] for row in approved]
+    }), 200
+
+
+@rrr_bp.route('/recommendations/reject', methods=['PUT'])
+@requires_any_role('HR Admin', 'Director')
+def reject_recommendations_bulk():
+    """Reject several RRR recommendations at once."""
+    data = request.get_json()
+    recommendation_ids = _recommendation_ids_from_request(data)
+    if recommendation_ids is None:
+        return jsonify({'error': 'recommendation_ids must be a non-empty list of IDs'}), 400
+    rejection_reason = data.get('rejection_reason', 'No reason provided')
+    
+    try:
+        rejected = reject_rrr_recommendations_bulk(recommendation_ids, rejection_reason)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    
+    for promotion_cycle in {row['promotion_cycle'] for row in rejected}:
+        invalidate_cycle('rrr', promotion_cycle)
+    return jsonify({
+        'message': 'Recommendations rejected',
+        'rejected_count': len(rejected),
+        'recommendation_ids': [row['id'] for row in rejected]
+    }), 200
+
+
 @rrr_bp.route('/dashboard/<promotion_cycle>', methods=['GET'])
 @jwt_required()
+@cached('rrr', policy='short')
 def get_rrr_dashboard(promotion_cycle):
     """Get RRR dashboard data for a promotion cycle."""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    # Get all recommendations
-    recommendations = RRRRecommendation.query.filter_by(
+    # Aggregate in the database: one row per (grade, status)
+    rows = db.session.query(
+        RRRRecommendation.conraiss_grade,
+        RRRRecommendation.status,
+        func.count(),
+        func.sum(cast(RRRRecommendation.is_promoted, Integer)),
+        func.sum(cast(RRRRecommendation.is_recognized, Integer)),
+        func.sum(cast(RRRRecommendation.is_rewarded, Integer))
+    ).filter_by(
         promotion_cycle=promotion_cycle
+    ).group_by(
+        RRRRecommendation.conraiss_grade,
+        RRRRecommendation.status
     ).all()
     
     # Calculate statistics
-    total_candidates = len(recommendations)
-    promoted_count = sum(1 for r in recommendations if r.is_promoted)
-    recognized_count = sum(1 for r in recommendations if r.is_recognized)
-    rewarded_count = sum(1 for r in recommendations if r.is_rewarded)
-    
-    pending_count = sum(1 for r in recommendations if r.status == 'Pending')
-    approved_count = sum(1 for r in recommendations if r.status == 'Approved')
-    rejected_count = sum(1 for r in recommendations if r.status == 'Rejected')
-    
-    # By grade statistics
+    total_candidates = promoted_count = recognized_count = rewarded_count = 0
+    by_status = {}
     by_grade = {}
-    for rec in recommendations:
-        grade = rec.conraiss_grade
-        if grade not in by_grade:
-            by_grade[grade] = {
-                'total': 0,
-                'promoted': 0,
-                'recognized': 0,
-                'rewarded': 0
-            }
-        by_grade[grade]['total'] += 1
-        if rec.is_promoted:
-            by_grade[grade]['promoted'] += 1
-        if rec.is_recognized:
-            by_grade[grade]['recognized'] += 1
-        if rec.is_rewarded:
-            by_grade[grade]['rewarded'] += 1
+    for grade, status, total, promoted, recognized, rewarded in rows:
+        promoted, recognized, rewarded = promoted or 0, recognized or 0, rewarded or 0
+        
+        total_candidates += total
+        promoted_count += promoted
+        recognized_count += recognized
+        rewarded_count += rewarded
+        by_status[status] = by_status.get(status, 0) + total
+        
+        # By grade statistics
+        grade_stats = by_grade.setdefault(grade, {
+            'total': 0,
+            'promoted': 0,
+            'recognized': 0,
+            'rewarded': 0
+        })
+        grade_stats['total'] += total
+        grade_stats['promoted'] += promoted
+        grade_stats['recognized'] += recognized
+        grade_stats['rewarded'] += rewarded
+    
+    pending_count = by_status.get('Pending', 0)
+    approved_count = by_status.get('Approved', 0)
+    rejected_count = by_status.get('Rejected', 0)
     
     return jsonify({
         'promotion_cycle': promotion_cycle,
@@ -4,8 +4,12 @@ API endpoints for managing background tasks and scheduled jobs.
 """
 
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from src.models import User
+from flask_jwt_extended import jwt_required
+from src.routes._auth import requires_any_role
+from src.services.task_status_service import (
+    get_task_status as read_task_status,
+    wait_for_task_status
+)
 from src.tasks import (
     process_annual_step_increment,
     generate_rrr_report,
@@ -17,16 +21,9 @@ tasks_bp = Blueprint('tasks', __name__)
 
 
 @tasks_bp.route('/trigger-step-increment', methods=['POST'])
-@jwt_required()
+@requires_any_role('HR Admin')
 def trigger_step_increment():
     """Manually trigger annual step increment (for testing or manual execution)."""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    # Check if user is HR Admin
-    if not current_user.has_role('HR Admin'):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     # Trigger the task asynchronously
     task = process_annual_step_increment.delay()
     
@@ -38,16 +35,9 @@ def trigger_step_increment():
 
 
 @tasks_bp.route('/generate-rrr-report/<promotion_cycle>', methods=['POST'])
-@jwt_required()
+@requires_any_role('HR Admin', 'Director')
 def trigger_rrr_report(promotion_cycle):
     """Generate RRR report for a promotion cycle."""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    # Check if user is HR Admin or Director
-    if not (current_user.has_role('HR Admin') or current_user.has_role('Director')):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     # Trigger the task asynchronously
     task = generate_rrr_report.delay(promotion_cycle)
     
@@ -59,16 +49,9 @@ def trigger_rrr_report(promotion_cycle):
 
 
 @tasks_bp.route('/backup-database', methods=['POST'])
-@jwt_required()
+@requires_any_role('HR Admin')
 def trigger_backup():
     """Manually trigger database backup."""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    # Check if user is HR Admin
-    if not current_user.has_role('HR Admin'):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     # Trigger the task asynchronously
     task = backup_database.delay()
     
@@ -80,16 +63,9 @@ def trigger_backup():
 
 
 @tasks_bp.route('/cleanup-audit-logs', methods=['POST'])
-@jwt_required()
+@requires_any_role('HR Admin')
 def trigger_cleanup():
     """Manually trigger audit log cleanup."""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    # Check if user is HR Admin
-    if not current_user.has_role('HR Admin'):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     data = request.get_json() or {}
     days_to_keep = data.get('days_to_keep', 3650)  # Default 10 years
     
@@ -106,44 +82,16 @@ def trigger_cleanup():
 @tasks_bp.route('/task-status/<task_id>', methods=['GET'])
 @jwt_required()
 def get_task_status(task_id):
-    """Get status of a background task."""
-    from celery.result import AsyncResult
-    from src.celery_app import celery_app
+    """
+    Get status of a background task.
     
-    task = AsyncResult(task_id, app=celery_app)
+    Pass ?wait=<seconds> to block until the task finishes instead of polling.
+    """
+    wait = request.args.get('wait', 0, type=float)
     
-    if task.state == 'PENDING':
-        response = {
-            'task_id': task_id,
-            'state': task.state,
-            'status': 'Task is waiting to be executed'
-        }
-    elif task.state == 'STARTED':
-        response = {
-            'task_id': task_id,
-            'state': task.state,
-            'status': 'Task is currently running'
-        }
-    elif task.state == 'SUCCESS':
-        response = {
-            'task_id': task_id,
-            'state': task.state,
-            'status': 'Task completed successfully',
-            'result': task.result
-        }
-    elif task.state == 'FAILURE':
-        response = {
-            'task_id': task_id,
-            'state': task.state,
-            'status': 'Task failed',
-            'error': str(task.info)
-        }
+    if wait > 0:
+        response = wait_for_task_status(task_id, wait)
     else:
-        response = {
-            'task_id': task_id,
-            'state': task.state,
-            'status': str(task.info)
-        }
+        response = read_task_status(task_id)
     
     return jsonify(response), 200
-
@@ -1,10 +1,34 @@
-from flask import Blueprint, jsonify, request
+import time
+from functools import lru_cache
+
+from flask import Blueprint, g, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import Schema, fields, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from src.models.user import User, Role, db
+from src.services.identity_cache import has_any_role, invalidate_identity
+from src.routes._auth import requires_any_role
 
 user_bp = Blueprint('user', __name__)
 
+# Roles change rarely; serve them from process memory for up to this long
+ROLES_CACHE_TTL = 300
+
+# Bumped when this process creates roles so the next read misses
+_roles_version = 0
+
+
+@lru_cache(maxsize=1)
+def _cached_roles(version, time_bucket):
+    return [role.to_dict() for role in Role.query.all()]
+
+
+def _invalidate_roles_cache():
+    global _roles_version
+    _roles_version += 1
+
 # Schemas for request validation
 class UserUpdateSchema(Schema):
     username = fields.Str(required=False)
@@ -20,32 +44,16 @@ class RoleSchema(Schema):
     name = fields.Str(required=True)
     description = fields.Str(required=False)
 
-def require_role(role_name):
-    """Decorator to require specific role."""
-    def decorator(f):
-        def decorated_function(*args, **kwargs):
-            current_user_id = int(get_jwt_identity())
-            user = User.query.get(current_user_id)
-            
-            if not user or not user.has_role(role_name):
-                return jsonify({'error': 'Insufficient permissions'}), 403
-            
-            return f(*args, **kwargs)
-        decorated_function.__name__ = f.__name__
-        return decorated_function
-    return decorator
+# Schemas are stateless, so build them once and share across requests
+_USER_UPDATE_SCHEMA = UserUpdateSchema()
+_ROLE_SCHEMA = RoleSchema()
+
 
 # User management endpoints
 @user_bp.route('/users', methods=['GET'])
-@jwt_required()
+@requires_any_role('HR Admin', 'Director', error='Insufficient permissions')
 def get_users():
     """Get all users (admin only)."""
-    current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user.has_role('HR Admin') and not current_user.has_role('Director'):
-        return jsonify({'error': 'Insufficient permissions'}), 403
-    
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     
@@ -65,13 +73,12 @@ def get_users():
 def get_user(user_id):
     """Get specific user."""
     current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
     
     # Users can view their own profile, admins can view any profile
-    if current_user_id != user_id and not current_user.has_role('HR Admin'):
+    if current_user_id != user_id and not has_any_role(current_user_id, 'HR Admin'):
         return jsonify({'error': 'Insufficient permissions'}), 403
     
-    user = User.query.get_or_404(user_id)
+    user = db.get_or_404(User, user_id)
     return jsonify({'user': user.to_dict()}), 200
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
@@ -79,52 +86,47 @@ def get_user(user_id):
 def update_user(user_id):
     """Update user information."""
     current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
     
     # Users can update their own profile, admins can update any profile
-    if current_user_id != user_id and not current_user.has_role('HR Admin'):
+    if current_user_id != user_id and not has_any_role(current_user_id, 'HR Admin'):
         return jsonify({'error': 'Insufficient permissions'}), 403
     
-    user = User.query.get_or_404(user_id)
+    user = db.get_or_404(User, user_id)
     
-    schema = UserUpdateSchema()
     try:
-        data = schema.load(request.json)
+        data = _USER_UPDATE_SCHEMA.load(request.json)
     except ValidationError as err:
         return jsonify({'error': 'Validation error', 'messages': err.messages}), 400
     
-    # Check for unique constraints
-    if 'username' in data and data['username'] != user.username:
-        if User.query.filter_by(username=data['username']).first():
-            return jsonify({'error': 'Username already exists'}), 400
-    
-    if 'email' in data and data['email'] != user.email:
-        if User.query.filter_by(email=data['email']).first():
-            return jsonify({'error': 'Email already exists'}), 400
-    
     # Update user fields
     for field, value in data.items():
         setattr(user, field, value)
     
-    db.session.commit()
+    # Uniqueness is enforced by the database constraints
+    try:
+        db.session.commit()
+    except IntegrityError as err:
+        db.session.rollback()
+        message = str(err.orig)
+        if 'uq_user_username' in message or 'user.username' in message:
+            return jsonify({'error': 'Username already exists'}), 400
+        if 'uq_user_email' in message or 'user.email' in message:
+            return jsonify({'error': 'Email already exists'}), 400
+        raise
+    invalidate_identity(user_id)
     return jsonify({'user': user.to_dict()}), 200
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
-@jwt_required()
+@requires_any_role('HR Admin', error='Insufficient permissions')
 def delete_user(user_id):
     """Delete user (admin only)."""
-    current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user.has_role('HR Admin'):
-        return jsonify({'error': 'Insufficient permissions'}), 403
-    
-    if current_user_id == user_id:
+    if g.current_user_id == user_id:
         return jsonify({'error': 'Cannot delete your own account'}), 400
     
-    user = User.query.get_or_404(user_id)
+    user = db.get_or_404(User, user_id)
     db.session.delete(user)
     db.session.commit()
+    invalidate_identity(user_id)
     
     return jsonify({'message': 'User deleted successfully'}), 200
 
@@ -133,22 +135,15 @@ def delete_user(user_id):
 @jwt_required()
 def get_roles():
     """Get all roles."""
-    roles = Role.query.all()
-    return jsonify({'roles': [role.to_dict() for role in roles]}), 200
+    roles = _cached_roles(_roles_version, int(time.monotonic() // ROLES_CACHE_TTL))
+    return jsonify({'roles': roles}), 200
 
 @user_bp.route('/roles', methods=['POST'])
-@jwt_required()
+@requires_any_role('HR Admin', error='Insufficient permissions')
 def create_role():
     """Create new role (admin only)."""
-    current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user.has_role('HR Admin'):
-        return jsonify({'error': 'Insufficient permissions'}), 403
-    
-    schema = RoleSchema()
     try:
-        data = schema.load(request.json)
+        data = _ROLE_SCHEMA.load(request.json)
     except ValidationError as err:
         return jsonify({'error': 'Validation error', 'messages': err.messages}), 400
     
@@ -162,61 +157,46 @@ def create_role():
     
     db.session.add(role)
     db.session.commit()
+    _invalidate_roles_cache()
     
     return jsonify({'role': role.to_dict()}), 201
 
 @user_bp.route('/users/<int:user_id>/roles', methods=['POST'])
-@jwt_required()
+@requires_any_role('HR Admin', error='Insufficient permissions')
 def assign_role_to_user(user_id):
     """Assign role to user (admin only)."""
-    current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user.has_role('HR Admin'):
-        return jsonify({'error': 'Insufficient permissions'}), 403
-    
-    user = User.query.get_or_404(user_id)
+    user = db.get_or_404(User, user_id)
     data = request.json
     role_id = data.get('role_id')
     
     if not role_id:
         return jsonify({'error': 'Role ID is required'}), 400
     
-    role = Role.query.get_or_404(role_id)
+    role = db.get_or_404(Role, role_id)
     user.add_role(role)
     db.session.commit()
+    invalidate_identity(user_id)
     
     return jsonify({'message': f'Role {role.name} assigned to user {user.username}'}), 200
 
 @user_bp.route('/users/<int:user_id>/roles/<int:role_id>', methods=['DELETE'])
-@jwt_required()
+@requires_any_role('HR Admin', error='Insufficient permissions')
 def remove_role_from_user(user_id, role_id):
     """Remove role from user (admin only)."""
-    current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user.has_role('HR Admin'):
-        return jsonify({'error': 'Insufficient permissions'}), 403
-    
-    user = User.query.get_or_404(user_id)
-    role = Role.query.get_or_404(role_id)
+    user = db.get_or_404(User, user_id)
+    role = db.get_or_404(Role, role_id)
     
     user.remove_role(role)
     db.session.commit()
+    invalidate_identity(user_id)
     
     return jsonify({'message': f'Role {role.name} removed from user {user.username}'}), 200
 
 # Initialize default roles
 @user_bp.route('/init-roles', methods=['POST'])
-@jwt_required()
+@requires_any_role('HR Admin', error='Insufficient permissions')
 def initialize_default_roles():
     """Initialize default roles (admin only)."""
-    current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user.has_role('HR Admin'):
-        return jsonify({'error': 'Insufficient permissions'}), 403
-    
     default_roles = [
         {'name': 'Staff Member', 'description': 'Regular staff member'},
         {'name': 'Supervisor', 'description': 'Direct line manager/rater'},
@@ -230,14 +210,25 @@ def initialize_default_roles():
         {'name': 'Grader', 'description': 'Manual/AI reviewer for exams'}
     ]
     
-    created_roles = []
-    for role_data in default_roles:
-        if not Role.query.filter_by(name=role_data['name']).first():
-            role = Role(name=role_data['name'], description=role_data['description'])
-            db.session.add(role)
-            created_roles.append(role_data['name'])
+    dialect_insert = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}.get(db.engine.dialect.name)
+    
+    if dialect_insert is not None:
+        # Single round trip; RETURNING only yields the rows actually inserted
+        stmt = dialect_insert(Role).values(default_roles).on_conflict_do_nothing(
+            index_elements=[Role.name]
+        ).returning(Role.name)
+        inserted = set(db.session.scalars(stmt))
+        created_roles = [role_data['name'] for role_data in default_roles if role_data['name'] in inserted]
+    else:
+        existing = set(db.session.scalars(select(Role.name)))
+        missing = [role_data for role_data in default_roles if role_data['name'] not in existing]
+        if missing:
+            db.session.execute(insert(Role), missing)
+        created_roles = [role_data['name'] for role_data in missing]
     
     db.session.commit()
+    if created_roles:
+        _invalidate_roles_cache()
     
     return jsonify({
         'message': 'Default roles initialized',
@@ -1,13 +1,120 @@
 """
 Audit Logging Service
 Provides forensic-level audit logging for all system actions.
+
+Entries are queued and written in batches by a background flusher thread
+(one bulk INSERT and commit per batch) so audited requests don't pay for
+a commit each. Sensitive entries are instead added to the caller's own
+transaction, so they are committed (or rolled back) together with the
+action they record.
 """
 
+import atexit
+import json
+import logging
+import queue
+import threading
 import uuid
 from datetime import datetime
-from typing import Optional, Dict, Any
-from flask import request
+from typing import Optional, Dict, Any, Tuple
+from flask import current_app, has_request_context, request
+from sqlalchemy import literal, tuple_
 from src.models import db, AuditLog
+from src.models.system import AUDIT_ACTION_TYPES, AUDIT_ENTITY_TYPES
+
+logger = logging.getLogger(__name__)
+
+# Largest old_value/new_value stored as-is (bytes of JSON)
+MAX_AUDIT_VALUE_BYTES = 64 * 1024
+
+# Flusher tuning: rows per INSERT and the longest a row waits in the queue
+AUDIT_BATCH_SIZE = 500
+AUDIT_FLUSH_INTERVAL = 0.2
+
+_audit_queue = queue.Queue(maxsize=10000)
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+class _AuditFlusher(threading.Thread):
+    """Drains the audit queue and bulk-inserts it in batches."""
+
+    def __init__(self, app):
+        super().__init__(name='audit-flusher', daemon=True)
+        self.app = app
+
+    def run(self):
+        while True:
+            self.flush(block=True)
+
+    def flush(self, block=False):
+        batch = []
+        try:
+            if block:
+                batch.append(_audit_queue.get(timeout=AUDIT_FLUSH_INTERVAL))
+            while len(batch) < AUDIT_BATCH_SIZE:
+                batch.append(_audit_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        if not batch:
+            return
+
+        with self.app.app_context():
+            try:
+                db.session.bulk_insert_mappings(AuditLog, batch)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                logger.exception("Failed to write %d audit log entries", len(batch))
+            finally:
+                db.session.remove()
+
+
+def _get_flusher():
+    global _flusher
+    if _flusher is None:
+        with _flusher_lock:
+            if _flusher is None:
+                _flusher = _AuditFlusher(current_app._get_current_object())
+                _flusher.start()
+                atexit.register(flush_audit_logs)
+    return _flusher
+
+
+def flush_audit_logs() -> None:
+    """Write all queued audit entries now (used at shutdown and in tests)."""
+    if _flusher is None:
+        return
+    while not _audit_queue.empty():
+        _flusher.flush()
+
+
+def _diff(old: Optional[Dict], new: Optional[Dict]) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """
+    Reduce an old/new state pair to the keys whose values changed.
+
+    Anything other than two dicts (e.g. a CREATE with no old state) is
+    returned unchanged.
+    """
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return old, new
+    changed = [key for key in old.keys() | new.keys() if old.get(key) != new.get(key)]
+    return (
+        {key: old[key] for key in changed if key in old},
+        {key: new[key] for key in changed if key in new}
+    )
+
+
+def _bounded(value: Optional[Dict]) -> Optional[Dict]:
+    """Replace a value whose JSON exceeds MAX_AUDIT_VALUE_BYTES with a marker."""
+    if value is None:
+        return None
+    size = len(json.dumps(value, default=str))
+    if size <= MAX_AUDIT_VALUE_BYTES:
+        return value
+    logger.warning("Audit value of %d bytes exceeds %d, storing a marker", size, MAX_AUDIT_VALUE_BYTES)
+    return {'_omitted': 'value too large', '_size': size}
 
 
 def log_action(
@@ -18,10 +125,14 @@ def log_action(
     old_value: Optional[Dict] = None,
     new_value: Optional[Dict] = None,
     is_sensitive: bool = False
-) -> AuditLog:
+) -> Dict[str, Any]:
     """
     Log an action to the audit trail.
     
+    Sensitive entries are flushed in the current session's transaction and
+    persist only when the caller commits it. Other entries are queued for
+    the background flusher.
+    
     Args:
         user_id: ID of user performing the action (None for system actions)
         action_type: Type of action (CREATE, UPDATE, DELETE, VIEW, LOGIN, LOGOUT, etc.)
@@ -32,39 +143,57 @@ def log_action(
         is_sensitive: Whether this action involves sensitive data
     
     Returns:
-        Created AuditLog object
+        The audit entry as a dictionary of column values
+    
+    Raises:
+        ValueError: If action_type or entity_type is not a known audit value
     """
+    # Reject here rather than fail the whole batch in the flusher
+    if action_type not in AUDIT_ACTION_TYPES:
+        raise ValueError(f"Unknown audit action type: {action_type}")
+    if entity_type not in AUDIT_ENTITY_TYPES:
+        raise ValueError(f"Unknown audit entity type: {entity_type}")
+    
     # Get request context
     ip_address = None
     user_agent = None
     session_id = None
     
-    if request:
+    if has_request_context():
         ip_address = request.remote_addr
         user_agent = request.headers.get('User-Agent')
         # Try to get session ID from JWT or session
         # This would need to be implemented based on your auth setup
     
     # Create audit log entry
-    log = AuditLog(
-        id=str(uuid.uuid4()),
-        user_id=user_id,
-        action_type=action_type,
-        entity_type=entity_type,
-        entity_id=entity_id,
-        old_value=old_value,
-        new_value=new_value,
-        ip_address=ip_address,
-        user_agent=user_agent,
-        session_id=session_id,
-        is_sensitive=is_sensitive,
-        timestamp=datetime.utcnow()
-    )
+    row = {
+        'id': uuid.uuid4(),
+        'user_id': user_id,
+        'action_type': action_type,
+        'entity_type': entity_type,
+        'entity_id': entity_id,
+        'old_value': _bounded(old_value),
+        'new_value': _bounded(new_value),
+        'ip_address': ip_address,
+        'user_agent': user_agent,
+        'session_id': session_id,
+        'is_sensitive': is_sensitive,
+        'timestamp': datetime.utcnow()
+    }
     
-    db.session.add(log)
-    db.session.commit()
+    if not is_sensitive:
+        _get_flusher()
+        try:
+            _audit_queue.put_nowait(row)
+            return row
+        except queue.Full:
+            # Flusher is behind; write this entry ourselves rather than drop it
+            logger.warning("Audit queue full, writing entry in the current transaction")
     
-    return log
+    # All-or-nothing with the audited action; no extra COMMIT round trip
+    db.session.add(AuditLog(**row))
+    db.session.flush()
+    return row
 
 
 def log_user_action(user_id: int, action: str, details: Dict = None):
@@ -98,6 +227,7 @@ def log_pms_action(user_id: int, action: str, evaluation_id: int,
         old_data: Previous state
         new_data: New state
     """
+    old_data, new_data = _diff(old_data, new_data)
     return log_action(
         user_id=user_id,
         action_type=action,
@@ -146,6 +276,7 @@ def log_rrr_action(user_id: int, action: str, recommendation_id: int = None,
         old_data: Previous state
         new_data: New state
     """
+    old_data, new_data = _diff(old_data, new_data)
     return log_action(
         user_id=user_id,
         action_type=action,
@@ -169,6 +300,7 @@ def log_promotion_action(user_id: int, action: str, target_user_id: int,
         old_data: Previous state
         new_data: New state
     """
+    old_data, new_data = _diff(old_data, new_data)
     return log_action(
         user_id=user_id,
         action_type=action,
@@ -188,7 +320,9 @@ def get_audit_logs(
     is_sensitive: Optional[bool] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    limit: int = 100
+    limit: int = 100,
+    before: Optional[datetime] = None,
+    before_id: Optional[uuid.UUID] = None
 ) -> list:
     """
     Query audit logs with filters.
@@ -202,10 +336,19 @@ def get_audit_logs(
         start_date: Filter by start date
         end_date: Filter by end date
         limit: Maximum number of results
+        before: Only entries older than this timestamp; pass the timestamp
+            of the last entry of the previous page to fetch the next one
+        before_id: ID of that last entry; entries sharing its timestamp
+            that sort after it are then included rather than skipped
     
     Returns:
-        List of AuditLog objects
+        List of AuditLog objects, newest first
     """
+    # Values outside the enums can't match (and PostgreSQL rejects them)
+    if (action_type and action_type not in AUDIT_ACTION_TYPES) or \
+            (entity_type and entity_type not in AUDIT_ENTITY_TYPES):
+        return []
+    
     query = AuditLog.query
     
     if user_id:
@@ -229,7 +372,17 @@ def get_audit_logs(
     if end_date:
         query = query.filter(AuditLog.timestamp <= end_date)
     
-    query = query.order_by(AuditLog.timestamp.desc()).limit(limit)
+    # Keyset pagination: seek straight to the page on the timestamp index
+    # instead of reading and discarding OFFSET rows. The id breaks ties
+    # between entries written with the same timestamp.
+    if before and before_id:
+        query = query.filter(tuple_(AuditLog.timestamp, AuditLog.id) < tuple_(
+            literal(before, AuditLog.timestamp.type), literal(before_id, AuditLog.id.type)
+        ))
+    elif before:
+        query = query.filter(AuditLog.timestamp < before)
+    
+    query = query.order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()).limit(limit)
     
     return query.all()
 
@@ -245,6 +398,9 @@ def get_entity_history(entity_type: str, entity_id: int) -> list:
     Returns:
         List of AuditLog objects ordered by timestamp
     """
+    if entity_type not in AUDIT_ENTITY_TYPES:
+        return []
+    
     return AuditLog.query.filter_by(
         entity_type=entity_type,
         entity_id=entity_id
@@ -0,0 +1,219 @@
+"""
+Cache Service
+Shared Redis cache for computed results that are expensive to rebuild.
+
+The cache is strictly best-effort: when REDIS_URL is not configured or the
+server cannot be reached, every call degrades to a miss and callers fall
+back to computing the value themselves.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import redis
+
+from src.observability import REDIS_PIPELINE_LATENCY
+
+# Seconds to wait before retrying after a connection failure
+RETRY_INTERVAL = 30
+
+_client = None
+_unavailable_until = 0.0
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """
+    Get the shared Redis client.
+
+    Returns:
+        Redis client, or None if caching is disabled or Redis is unreachable
+    """
+    global _client
+
+    if time.monotonic() < _unavailable_until:
+        return None
+
+    if _client is None:
+        redis_url = os.getenv('REDIS_URL')
+        if not redis_url:
+            return None
+        _client = redis.Redis.from_url(
+            redis_url,
+            socket_connect_timeout=0.25,
+            socket_timeout=0.5,
+            decode_responses=True
+        )
+
+    return _client
+
+
+def _mark_unavailable():
+    """Stop using Redis for RETRY_INTERVAL seconds after an error."""
+    global _unavailable_until
+    _unavailable_until = time.monotonic() + RETRY_INTERVAL
+
+
+def get_json(key: str) -> Optional[Any]:
+    """
+    Read a JSON value from the cache.
+
+    Args:
+        key: Cache key
+
+    Returns:
+        Decoded value, or None on a miss
+    """
+    client = get_redis()
+    if client is None:
+        return None
+
+    try:
+        raw = client.get(key)
+    except redis.RedisError:
+        _mark_unavailable()
+        return None
+
+    return json.loads(raw) if raw is not None else None
+
+
+def set_json(key: str, value: Any, ttl: int) -> None:
+    """
+    Store a JSON-serialisable value in the cache.
+
+    Args:
+        key: Cache key
+        value: Value to store
+        ttl: Time to live in seconds
+    """
+    client = get_redis()
+    if client is None:
+        return
+
+    try:
+        client.set(key, json.dumps(value), ex=ttl)
+    except redis.RedisError:
+        _mark_unavailable()
+
+
+def get_hash(key: str) -> Optional[Dict[str, str]]:
+    """
+    Read all fields of a Redis hash.
+
+    Args:
+        key: Cache key
+
+    Returns:
+        Field mapping, or None on a miss
+    """
+    client = get_redis()
+    if client is None:
+        return None
+
+    try:
+        return client.hgetall(key) or None
+    except redis.RedisError:
+        _mark_unavailable()
+        return None
+
+
+def get_hashes(keys: List[str]) -> List[Optional[Dict[str, str]]]:
+    """
+    Read several Redis hashes in a single round trip.
+
+    Args:
+        keys: Cache keys
+
+    Returns:
+        Field mapping (or None on a miss) for each key, in order
+    """
+    client = get_redis()
+    if client is None:
+        return [None] * len(keys)
+
+    try:
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+        started = time.perf_counter()
+        results = pipe.execute()
+        REDIS_PIPELINE_LATENCY.observe((time.perf_counter() - started) * 1000)
+    except redis.RedisError:
+        _mark_unavailable()
+        return [None] * len(keys)
+
+    return [result or None for result in results]
+
+
+def set_hash(key: str, mapping: Dict[str, str], ttl: int) -> None:
+    """
+    Store a Redis hash with an expiry.
+
+    Args:
+        key: Cache key
+        mapping: Field values
+        ttl: Time to live in seconds
+    """
+    client = get_redis()
+    if client is None:
+        return
+
+    try:
+        pipe = client.pipeline()
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, ttl)
+        pipe.execute()
+    except redis.RedisError:
+        _mark_unavailable()
+
+
+def delete_keys(keys: Iterable[str]) -> None:
+    """
+    Delete specific keys from the cache.
+
+    Args:
+        keys: Cache keys to delete
+    """
+    keys = list(keys)
+    client = get_redis()
+    if client is None or not keys:
+        return
+
+    try:
+        client.delete(*keys)
+    except redis.RedisError:
+        _mark_unavailable()
+
+
+def safe_multi_del(pattern: str, batch_size: int = 500) -> int:
+    """
+    Delete all keys matching a glob pattern.
+
+    Uses SCAN rather than KEYS so large keyspaces don't block the server.
+
+    Args:
+        pattern: Glob pattern, e.g. 'elig:42:*'
+        batch_size: Number of keys deleted per round trip
+
+    Returns:
+        Number of keys deleted
+    """
+    client = get_redis()
+    if client is None:
+        return 0
+
+    deleted = 0
+    batch = []
+    try:
+        for key in client.scan_iter(match=pattern, count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                deleted += client.delete(*batch)
+                batch = []
+        if batch:
+            deleted += client.delete(*batch)
+    except redis.RedisError:
+        _mark_unavailable()
+
+    return deleted
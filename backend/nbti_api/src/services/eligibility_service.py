@@ -3,9 +3,24 @@ Eligibility Service
 Handles promotion eligibility checking based on CONRAISS rules.
 """
 
-from typing import Dict, List
-from datetime import date
-from src.models import User, RRRVacancy
+import math
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from datetime import date, timedelta
+from flask import g, has_app_context
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import selectinload
+from src.models import db, User, RRRVacancy
+from src.services import cache_service
+
+# Eligibility results are cached per user for an hour and invalidated
+# whenever a promotion, step increment or vacancy change is recorded.
+ELIGIBILITY_CACHE_TTL = 3600
+
+# Standard eligibility cycle in years, indexed by CONRAISS grade:
+# every 2 years for grades 2-5, 3 for 6-12, 4 for 13-14 and none at 15
+# (the highest grade). Grades outside 0-15 default to 3.
+_CYCLE_BY_GRADE = (3, 3) + (2,) * 4 + (3,) * 7 + (4,) * 2 + (0,)
 
 
 def get_standard_eligibility_cycle(conraiss_grade: int) -> int:
@@ -18,16 +33,28 @@ def get_standard_eligibility_cycle(conraiss_grade: int) -> int:
     Returns:
         Number of years required before eligible for promotion
     """
-    if 2 <= conraiss_grade <= 5:
-        return 2  # Every 2 years
-    elif 6 <= conraiss_grade <= 12:
-        return 3  # Every 3 years
-    elif 13 <= conraiss_grade <= 14:
-        return 4  # Every 4 years
-    elif conraiss_grade == 15:
-        return 0  # Grade 15 is the highest, no promotion
-    else:
-        return 3  # Default
+    if 0 <= conraiss_grade < len(_CYCLE_BY_GRADE):
+        return _CYCLE_BY_GRADE[conraiss_grade]
+    return 3  # Default
+
+
+@lru_cache(maxsize=4096)
+def _time_in_grade_decision(grade: int, has_failed_attempt: bool,
+                            start_ordinal: int, today_ordinal: int) -> Tuple[float, int, int]:
+    """
+    Time-in-grade arithmetic shared by every user with the same inputs.
+
+    Keyed on today's date, so entries from previous days simply age out
+    of the LRU.
+
+    Returns:
+        (years_in_grade, required_years, standard_cycle)
+    """
+    years_in_grade = (today_ordinal - start_ordinal) / 365.25
+    standard_cycle = get_standard_eligibility_cycle(grade)
+    # After a failed attempt, eligible every year
+    required_years = 1 if has_failed_attempt else standard_cycle
+    return years_in_grade, required_years, standard_cycle
 
 
 def has_active_disciplinary_action(user: User) -> bool:
@@ -95,32 +122,21 @@ def is_eligible_for_promotion(user: User, target_grade: int = None,
             'details': {}
         }
     
-    # Calculate time in grade
-    if user.date_of_last_promotion:
-        days_in_grade = (date.today() - user.date_of_last_promotion).days
-        years_in_grade = days_in_grade / 365.25
-    elif user.date_of_first_appointment:
-        days_in_grade = (date.today() - user.date_of_first_appointment).days
-        years_in_grade = days_in_grade / 365.25
-    else:
+    # Time in grade is measured from the last promotion, else first appointment
+    grade_start = user.date_of_last_promotion or user.date_of_first_appointment
+    if not grade_start:
         return {
             'eligible': False,
             'reason': 'Cannot determine time in grade (missing appointment dates)',
             'details': {}
         }
     
-    # Get standard eligibility cycle
-    standard_cycle = get_standard_eligibility_cycle(current_grade)
-    
     # Check if failed previous promotion attempt (eligible every year after failure)
     failed_attempts = user.failed_promotion_attempts or 0
     
-    if failed_attempts > 0:
-        # After failed attempt, eligible every year
-        required_years = 1
-    else:
-        # Standard eligibility cycle
-        required_years = standard_cycle
+    years_in_grade, required_years, standard_cycle = _time_in_grade_decision(
+        current_grade, failed_attempts > 0, grade_start.toordinal(), date.today().toordinal()
+    )
     
     # Check time requirement
     if years_in_grade < required_years:
@@ -169,6 +185,67 @@ def is_eligible_for_promotion(user: User, target_grade: int = None,
     }
 
 
+def _eligibility_cache_key(user_id: int, target_grade: int, check_vacancy: bool,
+                           promotion_cycle: str) -> str:
+    return f"elig:{user_id}:{target_grade}:{promotion_cycle}:{int(check_vacancy)}"
+
+
+def get_cached_eligibility(user: User, target_grade: int = None,
+                           check_vacancy: bool = False,
+                           promotion_cycle: str = None) -> Dict:
+    """
+    Cached wrapper around is_eligible_for_promotion.
+
+    Results are memoised on flask.g for the current request and in Redis
+    across requests.
+
+    Args:
+        user: User object
+        target_grade: Optional target grade (defaults to current + 1)
+        check_vacancy: Whether to check for vacancy availability
+        promotion_cycle: Promotion cycle for vacancy check
+
+    Returns:
+        Dictionary with eligibility status and details
+    """
+    key = _eligibility_cache_key(user.id, target_grade, check_vacancy, promotion_cycle)
+
+    request_cache = None
+    if has_app_context():
+        request_cache = g.setdefault('_eligibility_cache', {})
+        if key in request_cache:
+            return request_cache[key]
+
+    eligibility = cache_service.get_json(key)
+    if eligibility is None:
+        eligibility = is_eligible_for_promotion(
+            user,
+            target_grade=target_grade,
+            check_vacancy=check_vacancy,
+            promotion_cycle=promotion_cycle
+        )
+        cache_service.set_json(key, eligibility, ELIGIBILITY_CACHE_TTL)
+
+    if request_cache is not None:
+        request_cache[key] = eligibility
+
+    return eligibility
+
+
+def invalidate_eligibility_cache(user_id: int = None) -> None:
+    """
+    Drop cached eligibility results.
+
+    Args:
+        user_id: User whose results changed; None drops results for all users
+    """
+    if has_app_context():
+        g.pop('_eligibility_cache', None)
+
+    pattern = f"elig:{user_id}:*" if user_id is not None else "elig:*"
+    cache_service.safe_multi_del(pattern)
+
+
 def get_eligible_candidates(target_grade: int = None, promotion_cycle: str = None) -> List[User]:
     """
     Get all eligible candidates for promotion.
@@ -180,53 +257,89 @@ def get_eligible_candidates(target_grade: int = None, promotion_cycle: str = Non
     Returns:
         List of eligible User objects
     """
-    # Get all active users
-    users = User.query.filter_by(is_active=True).all()
+    # Filter in SQL so only eligible users are loaded. Roles are fetched
+    # by primary key (selectinload) rather than by the default subquery
+    # loader, which would evaluate the eligibility filter a second time.
+    query = User.query.options(selectinload(User.roles)).filter(
+        User.is_active.is_(True), eligibility_criteria()
+    )
     
-    eligible_users = []
+    if target_grade:
+        # Only users in the grade below target
+        query = query.filter(User.conraiss_grade == target_grade - 1)
     
-    for user in users:
-        if target_grade and user.conraiss_grade != target_grade - 1:
-            # Skip if not in the grade below target
-            continue
-        
-        eligibility = is_eligible_for_promotion(
-            user, 
-            target_grade=target_grade,
-            check_vacancy=False,  # Don't check vacancy for bulk query
-            promotion_cycle=promotion_cycle
-        )
-        
-        if eligibility['eligible']:
-            eligible_users.append(user)
-    
-    return eligible_users
+    return query.all()
+
+
+def _time_in_grade_cutoff(years: int, as_of: date) -> date:
+    """
+    Latest start date that satisfies a time-in-grade requirement.
+
+    Mirrors the ``days / 365.25 >= years`` check in
+    is_eligible_for_promotion, so the SQL and Python rules agree exactly.
+    """
+    return as_of - timedelta(days=math.ceil(years * 365.25))
+
+
+def eligibility_criteria(as_of: date = None):
+    """
+    Build a SQL expression equivalent to is_eligible_for_promotion.
+
+    The vacancy check is not included (it is never applied in bulk).
+
+    Args:
+        as_of: Date to evaluate time in grade against (defaults to today)
+
+    Returns:
+        SQLAlchemy boolean clause over User columns
+    """
+    as_of = as_of or date.today()
+    grade = User.conraiss_grade
+
+    required_cutoff = case(
+        (func.coalesce(User.failed_promotion_attempts, 0) > 0,
+         _time_in_grade_cutoff(1, as_of)),
+        (grade.between(2, 5), _time_in_grade_cutoff(2, as_of)),
+        (grade.between(6, 12), _time_in_grade_cutoff(3, as_of)),
+        (grade.between(13, 14), _time_in_grade_cutoff(4, as_of)),
+        else_=_time_in_grade_cutoff(3, as_of)
+    )
+    grade_start = func.coalesce(User.date_of_last_promotion, User.date_of_first_appointment)
+
+    return and_(
+        grade.isnot(None),
+        grade != 0,
+        User.conraiss_step.isnot(None),
+        User.conraiss_step != 0,
+        grade < 15,
+        grade_start.isnot(None),
+        grade_start <= required_cutoff
+    )
 
 
 def update_eligibility_status_for_all_staff() -> Dict:
     """
     Batch update eligibility status for all staff.
     This can be run periodically to update eligibility flags.
-    
+
+    Eligibility is evaluated in a single aggregate query rather than
+    loading and checking every user in Python.
+
     Returns:
         Dictionary with statistics
     """
-    users = User.query.filter_by(is_active=True).all()
-    
-    eligible_count = 0
-    ineligible_count = 0
-    
-    for user in users:
-        eligibility = is_eligible_for_promotion(user)
-        
-        if eligibility['eligible']:
-            eligible_count += 1
-        else:
-            ineligible_count += 1
-    
+    total, eligible = db.session.execute(
+        db.select(
+            func.count(User.id),
+            func.coalesce(func.sum(case((eligibility_criteria(), 1), else_=0)), 0)
+        ).where(User.is_active.is_(True))
+    ).one()
+
+    # Fresh statistics were just computed, so drop any stale per-user results
+    invalidate_eligibility_cache()
+
     return {
-        'total_users': len(users),
-        'eligible': eligible_count,
-        'ineligible': ineligible_count
+        'total_users': total,
+        'eligible': eligible,
+        'ineligible': total - eligible
     }
-
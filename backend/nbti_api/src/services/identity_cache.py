@@ -0,0 +1,160 @@
+"""
+Identity Cache
+Caches the role set and active flag of authenticated users in Redis so
+permission checks don't need a user and role query on every request.
+
+A short-lived in-process cache sits in front of Redis, so repeat requests
+from the same user skip the network hop too. Invalidation clears it in
+the current process; other processes pick up changes within
+LOCAL_IDENTITY_TTL seconds.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from cachetools import TTLCache
+
+from flask import g, has_app_context
+from sqlalchemy.orm import selectinload
+
+from src.models import db, User
+from src.services import cache_service
+
+IDENTITY_CACHE_TTL = int(os.getenv('IDENTITY_CACHE_TTL_SECONDS', 300))
+LOCAL_IDENTITY_TTL = 30
+
+_local_identities = TTLCache(maxsize=10000, ttl=LOCAL_IDENTITY_TTL)
+_local_lock = threading.Lock()
+
+
+def _identity_key(user_id) -> str:
+    return f"auth:u:{user_id}"
+
+
+def _request_memo() -> Dict:
+    return g.setdefault('_identities', {}) if has_app_context() else {}
+
+
+def _local_get(user_id: int) -> Optional[Dict]:
+    with _local_lock:
+        return _local_identities.get(user_id)
+
+
+def _local_set(user_id: int, identity: Optional[Dict]) -> None:
+    if identity is not None:
+        with _local_lock:
+            _local_identities[user_id] = identity
+
+
+def _from_hash(user_id: int, cached: Dict[str, str]) -> Dict:
+    return {
+        'id': user_id,
+        'roles': frozenset(json.loads(cached['roles'])),
+        'is_active': cached['is_active'] == '1'
+    }
+
+
+def get_identity(user_id) -> Optional[Dict]:
+    """
+    Get the cached identity of a user.
+
+    Args:
+        user_id: User ID (int or the string JWT identity)
+
+    Returns:
+        Dictionary with id, roles (frozenset of role names) and is_active,
+        or None if the user does not exist
+    """
+    user_id = int(user_id)
+    memo = _request_memo()
+    if user_id in memo:
+        return memo[user_id]
+
+    identity = _local_get(user_id)
+    if identity is None:
+        cached = cache_service.get_hash(_identity_key(user_id))
+        identity = _from_hash(user_id, cached) if cached else _load_identity(user_id)
+        _local_set(user_id, identity)
+    memo[user_id] = identity
+    return identity
+
+
+def _load_identity(user_id: int) -> Optional[Dict]:
+    user = db.session.get(User, user_id, options=[selectinload(User.roles)])
+    if user is None:
+        return None
+
+    identity = {
+        'id': user.id,
+        'roles': frozenset(role.name for role in user.roles),
+        'is_active': bool(user.is_active)
+    }
+    cache_service.set_hash(_identity_key(user_id), {
+        'roles': json.dumps(sorted(identity['roles'])),
+        'is_active': '1' if identity['is_active'] else '0'
+    }, IDENTITY_CACHE_TTL)
+
+    return identity
+
+
+def prefetch_identity(user_id, *keys: str) -> List[Optional[Dict[str, str]]]:
+    """
+    Read a user's cached identity together with other cache hashes.
+
+    All lookups share one pipelined Redis round trip. A cached identity is
+    kept for the rest of the request, so the next get_identity() call for
+    this user costs nothing.
+
+    Args:
+        user_id: User ID (int or the string JWT identity)
+        *keys: Other hash keys to read in the same round trip
+
+    Returns:
+        Field mapping (or None on a miss) for each of keys, in order
+    """
+    user_id = int(user_id)
+    memo = _request_memo()
+    if user_id not in memo:
+        identity = _local_get(user_id)
+        if identity is not None:
+            memo[user_id] = identity
+    if user_id in memo:
+        return cache_service.get_hashes(list(keys))
+
+    cached, *results = cache_service.get_hashes([_identity_key(user_id), *keys])
+    if cached:
+        memo[user_id] = _from_hash(user_id, cached)
+        _local_set(user_id, memo[user_id])
+    return results
+
+
+def has_any_role(user_id, *role_names: str) -> bool:
+    """
+    Check whether a user holds at least one of the given roles.
+
+    Args:
+        user_id: User ID
+        *role_names: Role names to check
+
+    Returns:
+        True if the user exists and has any of the roles
+    """
+    identity = get_identity(user_id)
+    return identity is not None and not identity['roles'].isdisjoint(role_names)
+
+
+def invalidate_identity(*user_ids) -> None:
+    """
+    Drop cached identities after role or account changes.
+
+    Args:
+        *user_ids: IDs of the users that changed
+    """
+    memo = _request_memo()
+    with _local_lock:
+        for user_id in user_ids:
+            memo.pop(int(user_id), None)
+            _local_identities.pop(int(user_id), None)
+    cache_service.delete_keys(_identity_key(user_id) for user_id in user_ids)
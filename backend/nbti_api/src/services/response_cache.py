@@ -0,0 +1,122 @@
+"""
+Response Cache
+Cache-aside storage of read-only endpoint responses in Redis.
+
+Each request path is stored as a Redis hash with one field per caller
+role set, holding the JSON-encoded entry (generated_at, stale_at,
+status_code, body). Entries are kept for a while after they go stale, so
+a failing database query can still be answered with the last known good
+response.
+"""
+
+import hashlib
+import json
+import time
+from functools import wraps
+
+from flask import Response, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.models import db
+from src.observability import record_cache_result
+from src.services import cache_service
+from src.services.identity_cache import get_identity, prefetch_identity
+
+# Freshness windows in seconds
+CACHE_POLICIES = {
+    'short': 10,
+    'normal': 60,
+    'long': 300
+}
+
+# How long stale entries are kept around as a fallback
+STALE_RETENTION = 3600
+
+
+def _cache_key(namespace: str, cycle: str) -> str:
+    fingerprint = '|'.join([
+        request.path,
+        '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    ])
+    digest = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+    return f"{namespace}:cycle:{{{cycle}}}:{digest}"
+
+
+def _roles_field(identity) -> str:
+    return ','.join(sorted(identity['roles'])) if identity else ''
+
+
+def _cached_response(entry: dict, cache_status: str) -> Response:
+    response = Response(entry['body'], status=int(entry['status_code']), mimetype='application/json')
+    response.headers['X-Cache'] = cache_status
+    return response
+
+
+def cached(namespace: str, policy: str = 'normal', cycle_arg: str = 'promotion_cycle'):
+    """
+    Cache a GET view's JSON response per promotion cycle.
+
+    The caller's identity and the cached response are read in one
+    pipelined Redis round trip; responses are stored per role set.
+
+    Args:
+        namespace: Key prefix, e.g. 'rrr'
+        policy: Freshness policy name from CACHE_POLICIES
+        cycle_arg: Name of the view argument holding the promotion cycle
+
+    Returns:
+        View decorator
+    """
+    ttl = CACHE_POLICIES[policy]
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = get_jwt_identity()
+            key = _cache_key(namespace, kwargs.get(cycle_arg))
+            variants, = prefetch_identity(user_id, key)
+            field = _roles_field(get_identity(user_id))
+
+            raw = variants.get(field) if variants else None
+            entry = json.loads(raw) if raw else None
+            now = time.time()
+
+            if entry and entry['stale_at'] > now:
+                record_cache_result(hit=True)
+                return _cached_response(entry, 'HIT')
+
+            record_cache_result(hit=False)
+            try:
+                response = make_response(view(*args, **kwargs))
+            except SQLAlchemyError:
+                if not entry:
+                    raise
+                # Database unavailable: fall back to the last good response
+                db.session.rollback()
+                return _cached_response(entry, 'STALE')
+
+            if response.status_code == 200 and not response.is_streamed:
+                cache_service.set_hash(key, {
+                    field: json.dumps({
+                        'generated_at': now,
+                        'stale_at': now + ttl,
+                        'status_code': response.status_code,
+                        'body': response.get_data(as_text=True)
+                    })
+                }, ttl + STALE_RETENTION)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate_cycle(namespace: str, cycle: str) -> None:
+    """
+    Drop all cached responses for a promotion cycle.
+
+    Args:
+        namespace: Key prefix used with @cached
+        cycle: Promotion cycle whose data changed
+    """
+    cache_service.safe_multi_del(f"{namespace}:cycle:{{{cycle}}}:*")
@@ -3,10 +3,22 @@ RRR Allocation Service
 Handles rank-based allocation of promotions, recognition, and rewards based on vacancy slots.
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Tuple
 from datetime import datetime, date
+from flask import current_app
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import lazyload, load_only
 from src.models import User, RRRVacancy, RRRRecommendation, db
-from src.services.rrr_service import calculate_user_rrr_scores
+from src.services.rrr_service import (
+    batch_get_latest_exam,
+    batch_get_latest_pms,
+    calculate_seniority_scores,
+    calculate_user_rrr_scores_from_maps,
+    prefill_final_scores
+)
+from src.services.eligibility_service import invalidate_eligibility_cache
 
 
 def get_eligible_candidates_for_grade(grade: int, promotion_cycle: str) -> List[User]:
@@ -20,8 +32,15 @@ def get_eligible_candidates_for_grade(grade: int, promotion_cycle: str) -> List[
     Returns:
         List of eligible User objects
     """
-    # Get all active users in the specified grade
-    candidates = User.query.filter_by(
+    # Get all active users in the specified grade, loading only the columns
+    # ranking needs (and not the eagerly loaded roles)
+    candidates = User.query.options(
+        load_only(
+            User.id, User.conraiss_grade, User.conraiss_step,
+            User.confirmation_date, User.date_of_birth, User.file_no
+        ),
+        lazyload(User.roles)
+    ).filter_by(
         conraiss_grade=grade,
         is_active=True
     ).all()
@@ -49,33 +68,35 @@ def rank_candidates(candidates: List[User], promotion_cycle: str,
     if not candidates:
         return []
     
+    # Load every candidate's PMS and exam data up front (a fixed number of
+    # queries, not one per candidate) and rank the cohort's seniority once
+    user_ids = [user.id for user in candidates]
+    pms_map = batch_get_latest_pms(user_ids, pms_year)
+    prefill_final_scores(pms_map.values())
+    exam_map = batch_get_latest_exam(user_ids, exam_id)
+    seniority_map = calculate_seniority_scores(candidates)
+    
+    # Sort by combined score (descending), then by seniority score as tie-breaker.
+    # Keys are negated numeric tuples built alongside each row; the index keeps
+    # ties in candidate order and means the row dicts are never compared.
+    keyed_scores = []
+    for index, user in enumerate(candidates):
+        scores = calculate_user_rrr_scores_from_maps(user, pms_map, exam_map, seniority_map)
+        keyed_scores.append((
+            -scores['combined_score'],
+            -scores['seniority_score'],
+            index,
+            {'user_id': user.id, 'user': user, **scores}
+        ))
+    keyed_scores.sort()
+    
+    # Unwrap the rows and add rank in the same pass
     candidate_scores = []
-    
-    for user in candidates:
-        # Calculate scores
-        scores = calculate_user_rrr_scores(user, candidates, pms_year, exam_id)
-        
-        candidate_scores.append({
-            'user_id': user.id,
-            'user': user,
-            'exam_score': scores['exam_score'],
-            'pms_score': scores['pms_score'],
-            'seniority_score': scores['seniority_score'],
-            'combined_score': scores['combined_score']
-        })
-    
-    # Sort by combined score (descending), then by seniority score as tie-breaker
-    sorted_candidates = sorted(
-        candidate_scores, 
-        key=lambda x: (x['combined_score'], x['seniority_score']), 
-        reverse=True
-    )
-    
-    # Add rank
-    for rank, candidate in enumerate(sorted_candidates, start=1):
+    for rank, (_, _, _, candidate) in enumerate(keyed_scores, start=1):
         candidate['rank'] = rank
+        candidate_scores.append(candidate)
     
-    return sorted_candidates
+    return candidate_scores
 
 
 def allocate_rrr_for_grade(grade: int, promotion_cycle: str, 
@@ -141,6 +162,28 @@ def allocate_rrr_for_grade(grade: int, promotion_cycle: str,
     }
 
 
+# Grades allocated concurrently; keep at or below the DB connection pool size
+# (DB_POOL_SIZE) since each worker holds its own connection
+RRR_ALLOCATION_WORKERS = int(os.getenv('RRR_ALLOCATION_WORKERS', 8))
+
+
+def _allocation_workers(grade_count: int) -> int:
+    # SQLite serialises access to the database file, so threads only add overhead
+    if db.engine.dialect.name == 'sqlite':
+        return 1
+    return max(1, min(RRR_ALLOCATION_WORKERS, grade_count))
+
+
+def _allocate_grade_in_app_context(app, allocation_args: Dict) -> Dict:
+    # Each worker gets its own app context and therefore its own session,
+    # so commit the final scores prefilled while ranking before it closes;
+    # on the serial path they are committed with the recommendations
+    with app.app_context():
+        allocation = allocate_rrr_for_grade(**allocation_args)
+        db.session.commit()
+        return allocation
+
+
 def allocate_rrr_for_all_grades(promotion_cycle: str, pms_year: int = None, 
                                 exam_id: int = None) -> Dict[int, Dict]:
     """
@@ -163,91 +206,119 @@ def allocate_rrr_for_all_grades(promotion_cycle: str, pms_year: int = None,
     if not vacancies:
         return {}
     
-    results = {}
-    
-    for vacancy in vacancies:
-        allocation = allocate_rrr_for_grade(
-            grade=vacancy.conraiss_grade,
-            promotion_cycle=promotion_cycle,
-            promotion_vacancies=vacancy.promotion_vacancies,
-            recognition_slots=vacancy.recognition_slots,
-            reward_slots=vacancy.reward_slots,
-            pms_year=pms_year,
-            exam_id=exam_id
-        )
-        results[vacancy.conraiss_grade] = allocation
-    
-    return results
+    allocation_args = [
+        {
+            'grade': vacancy.conraiss_grade,
+            'promotion_cycle': promotion_cycle,
+            'promotion_vacancies': vacancy.promotion_vacancies,
+            'recognition_slots': vacancy.recognition_slots,
+            'reward_slots': vacancy.reward_slots,
+            'pms_year': pms_year,
+            'exam_id': exam_id
+        }
+        for vacancy in vacancies
+    ]
+    
+    workers = _allocation_workers(len(allocation_args))
+    if workers == 1:
+        allocations = [allocate_rrr_for_grade(**args) for args in allocation_args]
+    else:
+        # Grades are independent and I/O bound, so allocate them concurrently
+        app = current_app._get_current_object()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            allocations = list(executor.map(
+                lambda args: _allocate_grade_in_app_context(app, args),
+                allocation_args
+            ))
+    
+    return {args['grade']: allocation for args, allocation in zip(allocation_args, allocations)}
 
 
 def generate_rrr_recommendations(allocation_results: Dict[int, Dict], 
                                  promotion_cycle: str,
-                                 recommended_by: int = None) -> List[RRRRecommendation]:
+                                 recommended_by: int = None) -> List[Dict]:
     """
     Generate RRRRecommendation records from allocation results.
     
+    Existing rows for the cycle are looked up in one query and rows are
+    written with bulk insert/update mappings in a single commit, rather
+    than one query and ORM object per candidate. The unique
+    (user_id, promotion_cycle) constraint rejects duplicates from
+    concurrent runs.
+    
     Args:
         allocation_results: Results from allocate_rrr_for_all_grades()
         promotion_cycle: Promotion cycle identifier
         recommended_by: User ID of recommender
     
     Returns:
-        List of created RRRRecommendation objects
+        List of recommendation row dictionaries that were written
     """
-    recommendations = []
+    # Existing recommendations for this cycle, keyed by user
+    existing_ids = dict(
+        db.session.query(RRRRecommendation.user_id, RRRRecommendation.id).filter_by(
+            promotion_cycle=promotion_cycle
+        ).all()
+    )
+    
+    new_rows = []
+    updated_rows = []
     
     for grade, allocation in allocation_results.items():
         all_candidates = allocation['all_candidates']
+        promoted_ids = {c['user_id'] for c in allocation['promoted']}
+        recognized_ids = {c['user_id'] for c in allocation['recognized']}
+        rewarded_ids = {c['user_id'] for c in allocation['rewarded']}
         
         for candidate in all_candidates:
-            # Check if recommendation already exists
-            existing = RRRRecommendation.query.filter_by(
-                user_id=candidate['user_id'],
-                promotion_cycle=promotion_cycle
-            ).first()
-            
-            if existing:
-                # Update existing recommendation
-                recommendation = existing
-            else:
-                # Create new recommendation
-                recommendation = RRRRecommendation(
-                    user_id=candidate['user_id'],
-                    promotion_cycle=promotion_cycle,
-                    conraiss_grade=grade
-                )
-            
-            # Set scores
-            recommendation.exam_score = candidate['exam_score']
-            recommendation.pms_score = candidate['pms_score']
-            recommendation.seniority_score = candidate['seniority_score']
-            recommendation.combined_score = candidate['combined_score']
-            recommendation.rank_in_grade = candidate['rank']
-            recommendation.total_candidates_in_grade = allocation['total_candidates']
-            
-            # Determine RRR allocation
-            recommendation.is_promoted = candidate in allocation['promoted']
-            recommendation.is_recognized = candidate in allocation['recognized']
-            recommendation.is_rewarded = candidate in allocation['rewarded']
+            row = {
+                'exam_score': candidate['exam_score'],
+                'pms_score': candidate['pms_score'],
+                'seniority_score': candidate['seniority_score'],
+                'combined_score': candidate['combined_score'],
+                'rank_in_grade': candidate['rank'],
+                'total_candidates_in_grade': allocation['total_candidates'],
+                # Determine RRR allocation
+                'is_promoted': candidate['user_id'] in promoted_ids,
+                'is_recognized': candidate['user_id'] in recognized_ids,
+                'is_rewarded': candidate['user_id'] in rewarded_ids
+            }
             
             # Set promotion details if promoted
-            if recommendation.is_promoted:
-                recommendation.promoted_to_grade = grade + 1  # Next grade
+            if row['is_promoted']:
+                row['promoted_to_grade'] = grade + 1  # Next grade
                 # Step allocation will be calculated separately
-                recommendation.status = 'Pending'
+                row['status'] = 'Pending'
             
             # Set recommender
             if recommended_by:
-                recommendation.recommended_by = recommended_by
-            
-            if not existing:
-                db.session.add(recommendation)
+                row['recommended_by'] = recommended_by
             
-            recommendations.append(recommendation)
-    
+            existing_id = existing_ids.get(candidate['user_id'])
+            if existing_id:
+                # Update existing recommendation
+                row['id'] = existing_id
+                updated_rows.append(row)
+            else:
+                # Create new recommendation
+                row.update({
+                    'user_id': candidate['user_id'],
+                    'promotion_cycle': promotion_cycle,
+                    'conraiss_grade': grade
+                })
+                new_rows.append(row)
+    
+    if updated_rows:
+        db.session.bulk_update_mappings(RRRRecommendation, updated_rows)
+    if new_rows:
+        db.session.bulk_insert_mappings(RRRRecommendation, new_rows)
     db.session.commit()
     
-    return recommendations
+    return updated_rows + new_rows
+
+
+# Date/time columns serialised as ISO strings in ranking rows
+_RANKING_DATE_FIELDS = ('promotion_effective_date', 'approval_date', 'created_at', 'updated_at')
 
 
 def get_rrr_rankings_for_grade(grade: int, promotion_cycle: str) -> List[Dict]:
@@ -261,12 +332,24 @@ def get_rrr_rankings_for_grade(grade: int, promotion_cycle: str) -> List[Dict]:
     Returns:
         List of candidate rankings with RRR allocations
     """
-    recommendations = RRRRecommendation.query.filter_by(
-        conraiss_grade=grade,
-        promotion_cycle=promotion_cycle
-    ).order_by(RRRRecommendation.rank_in_grade).all()
-    
-    return [rec.to_dict() for rec in recommendations]
+    # Read plain rows (same shape as RRRRecommendation.to_dict()) without
+    # hydrating ORM objects only to serialise them again
+    rows = db.session.execute(
+        select(RRRRecommendation.__table__).where(
+            RRRRecommendation.conraiss_grade == grade,
+            RRRRecommendation.promotion_cycle == promotion_cycle
+        ).order_by(RRRRecommendation.rank_in_grade)
+    ).mappings()
+    
+    rankings = []
+    for row in rows:
+        ranking = dict(row)
+        for field in _RANKING_DATE_FIELDS:
+            value = ranking[field]
+            ranking[field] = value.isoformat() if value else None
+        rankings.append(ranking)
+    
+    return rankings
 
 
 def approve_rrr_recommendation(recommendation_id: int, approved_by: int) -> RRRRecommendation:
@@ -280,7 +363,7 @@ def approve_rrr_recommendation(recommendation_id: int, approved_by: int) -> RRRR
     Returns:
         Updated RRRRecommendation object
     """
-    recommendation = RRRRecommendation.query.get(recommendation_id)
+    recommendation = db.session.get(RRRRecommendation, recommendation_id)
     
     if not recommendation:
         raise ValueError(f"Recommendation {recommendation_id} not found")
@@ -291,7 +374,7 @@ def approve_rrr_recommendation(recommendation_id: int, approved_by: int) -> RRRR
     
     # If promoted, update user record
     if recommendation.is_promoted and recommendation.promoted_to_grade and recommendation.promoted_to_step:
-        user = User.query.get(recommendation.user_id)
+        user = db.session.get(User, recommendation.user_id)
         if user:
             user.conraiss_grade = recommendation.promoted_to_grade
             user.conraiss_step = recommendation.promoted_to_step
@@ -302,6 +385,9 @@ def approve_rrr_recommendation(recommendation_id: int, approved_by: int) -> RRRR
     
     db.session.commit()
     
+    if recommendation.is_promoted:
+        invalidate_eligibility_cache(recommendation.user_id)
+    
     return recommendation
 
 
@@ -316,7 +402,7 @@ def reject_rrr_recommendation(recommendation_id: int, rejection_reason: str) ->
     Returns:
         Updated RRRRecommendation object
     """
-    recommendation = RRRRecommendation.query.get(recommendation_id)
+    recommendation = db.session.get(RRRRecommendation, recommendation_id)
     
     if not recommendation:
         raise ValueError(f"Recommendation {recommendation_id} not found")
@@ -326,11 +412,147 @@ def reject_rrr_recommendation(recommendation_id: int, rejection_reason: str) ->
     
     # If promotion was rejected, increment failed attempts
     if recommendation.is_promoted:
-        user = User.query.get(recommendation.user_id)
+        user = db.session.get(User, recommendation.user_id)
         if user:
             user.failed_promotion_attempts += 1
     
     db.session.commit()
     
+    if recommendation.is_promoted:
+        invalidate_eligibility_cache(recommendation.user_id)
+    
     return recommendation
 
+
+def _load_recommendations_for_review(recommendation_ids: List[int]) -> List:
+    """Fetch the rows a bulk approval/rejection needs, failing on unknown IDs."""
+    recommendation_ids = set(recommendation_ids)
+    rows = db.session.execute(
+        select(
+            RRRRecommendation.id,
+            RRRRecommendation.user_id,
+            RRRRecommendation.promotion_cycle,
+            RRRRecommendation.is_promoted,
+            RRRRecommendation.promoted_to_grade,
+            RRRRecommendation.promoted_to_step,
+            RRRRecommendation.promotion_effective_date
+        ).where(RRRRecommendation.id.in_(recommendation_ids)).order_by(RRRRecommendation.id)
+    ).all()
+    
+    missing = recommendation_ids - {row.id for row in rows}
+    if missing:
+        raise ValueError(f"Recommendations {sorted(missing)} not found")
+    
+    return rows
+
+
+def approve_rrr_recommendations_bulk(recommendation_ids: List[int], approved_by: int) -> List[Dict]:
+    """
+    Approve several RRR recommendations in one transaction.
+    
+    Same effect as calling approve_rrr_recommendation() for each ID, but
+    with one UPDATE for the recommendations, one executemany UPDATE for
+    the promoted users and a single commit.
+    
+    Args:
+        recommendation_ids: RRRRecommendation IDs
+        approved_by: User ID of approver
+    
+    Returns:
+        List of {'id', 'user_id', 'promotion_cycle', 'is_promoted'} for the approved rows
+    
+    Raises:
+        ValueError: If any recommendation does not exist (nothing is updated)
+    """
+    rows = _load_recommendations_for_review(recommendation_ids)
+    if not rows:
+        return []
+    
+    today = date.today()
+    db.session.execute(
+        update(RRRRecommendation)
+        .where(RRRRecommendation.id.in_([row.id for row in rows]))
+        .values(status='Approved', approved_by=approved_by, approval_date=datetime.utcnow()),
+        execution_options={'synchronize_session': False}
+    )
+    
+    # Promoted users move to their new grade and step
+    promotions = [
+        {
+            'id': row.user_id,
+            'conraiss_grade': row.promoted_to_grade,
+            'conraiss_step': row.promoted_to_step,
+            'date_of_last_promotion': row.promotion_effective_date or today,
+            'last_rrr_date': today,
+            'last_rrr_type': 'Promotion',
+            'failed_promotion_attempts': 0  # Reset failed attempts
+        }
+        for row in rows
+        if row.is_promoted and row.promoted_to_grade and row.promoted_to_step
+    ]
+    if promotions:
+        db.session.execute(update(User), promotions)
+    
+    db.session.commit()
+    
+    if any(row.is_promoted for row in rows):
+        invalidate_eligibility_cache()
+    
+    return [
+        {'id': row.id, 'user_id': row.user_id, 'promotion_cycle': row.promotion_cycle, 'is_promoted': row.is_promoted}
+        for row in rows
+    ]
+
+
+def reject_rrr_recommendations_bulk(recommendation_ids: List[int], rejection_reason: str) -> List[Dict]:
+    """
+    Reject several RRR recommendations in one transaction.
+    
+    Same effect as calling reject_rrr_recommendation() for each ID, but
+    with one UPDATE for the recommendations, one executemany UPDATE for
+    the users' failed promotion attempts and a single commit.
+    
+    Args:
+        recommendation_ids: RRRRecommendation IDs
+        rejection_reason: Reason for rejection
+    
+    Returns:
+        List of {'id', 'user_id', 'promotion_cycle', 'is_promoted'} for the rejected rows
+    
+    Raises:
+        ValueError: If any recommendation does not exist (nothing is updated)
+    """
+    rows = _load_recommendations_for_review(recommendation_ids)
+    if not rows:
+        return []
+    
+    db.session.execute(
+        update(RRRRecommendation)
+        .where(RRRRecommendation.id.in_([row.id for row in rows]))
+        .values(status='Rejected', rejection_reason=rejection_reason),
+        execution_options={'synchronize_session': False}
+    )
+    
+    # Each rejected promotion counts as a failed attempt for its user
+    failed_attempts = {}
+    for row in rows:
+        if row.is_promoted:
+            failed_attempts[row.user_id] = failed_attempts.get(row.user_id, 0) + 1
+    if failed_attempts:
+        users = User.__table__
+        db.session.execute(
+            update(users)
+            .where(users.c.id == bindparam('user_id'))
+            .values(failed_promotion_attempts=func.coalesce(users.c.failed_promotion_attempts, 0) + bindparam('attempts')),
+            [{'user_id': user_id, 'attempts': attempts} for user_id, attempts in failed_attempts.items()]
+        )
+    
+    db.session.commit()
+    
+    if failed_attempts:
+        invalidate_eligibility_cache()
+    
+    return [
+        {'id': row.id, 'user_id': row.user_id, 'promotion_cycle': row.promotion_cycle, 'is_promoted': row.is_promoted}
+        for row in rows
+    ]
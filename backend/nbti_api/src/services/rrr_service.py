@@ -5,8 +5,10 @@ Handles calculation of combined scores for promotion decisions.
 Formula: Combined Score = (Exam × 70%) + (PMS × 20%) + (Seniority × 10%)
 """
 
-from typing import List, Dict, Optional
-from src.models import User, PMSEvaluation, EMMExamSubmission
+from collections import defaultdict
+from typing import Iterable, List, Dict, Optional
+from sqlalchemy import func
+from src.models import db, User, PMSEvaluation, PMSGoal, EMMExamSubmission
 
 
 def calculate_combined_score(exam_score: float, pms_score: float, seniority_score: float) -> float:
@@ -41,11 +43,8 @@ def calculate_pms_score(evaluation: PMSEvaluation) -> float:
     if not evaluation:
         return 0.0
     
-    # Calculate final score if not already calculated
-    if evaluation.final_score is None:
-        evaluation.calculate_final_score()
-    
-    # Convert to percentage (final_score is on 1-5 scale)
+    # Derived from final_score rather than the stored pms_percentage, which
+    # is only refreshed on flush; unscored evaluations fall back to the goals
     return evaluation.get_pms_percentage()
 
 
@@ -86,6 +85,31 @@ def calculate_seniority_score(user: User, candidates_in_same_grade: List[User])
     return user.calculate_seniority_score(candidates_in_same_grade)
 
 
+def calculate_seniority_scores(candidates_in_same_grade: List[User]) -> Dict[int, float]:
+    """
+    Calculate seniority scores for a whole cohort with a single sort.
+    
+    Gives the same scores as calling calculate_seniority_score() for each
+    candidate, without re-sorting the cohort once per candidate.
+    
+    Args:
+        candidates_in_same_grade: List of all candidates in the same grade
+    
+    Returns:
+        Dictionary mapping user ID to seniority score (0-100)
+    """
+    sorted_candidates = sorted(candidates_in_same_grade, key=User.seniority_sort_key)
+    total_candidates = len(sorted_candidates)
+    if total_candidates == 1:
+        return {sorted_candidates[0].id: 100}
+    
+    # Rank 1 (most senior) = 100, last rank = 0
+    return {
+        user.id: round(((total_candidates - rank) / (total_candidates - 1)) * 100, 2)
+        for rank, user in enumerate(sorted_candidates, start=1)
+    }
+
+
 def get_latest_pms_evaluation(user: User, year: int = None) -> Optional[PMSEvaluation]:
     """
     Get the latest PMS evaluation for a user.
@@ -133,6 +157,134 @@ def get_latest_exam_submission(user: User, exam_id: int = None, is_promotional:
     return query.order_by(EMMExamSubmission.submitted_at.desc()).first()
 
 
+def _latest_per_user(model, user_column, order_column, user_ids: List[int], *criteria) -> Dict:
+    """
+    Fetch the newest row per user in one query.
+
+    Rows are numbered per user with a window function (newest first) and
+    only the first of each is returned.
+    """
+    if not user_ids:
+        return {}
+
+    row_number = func.row_number().over(
+        partition_by=user_column,
+        order_by=(order_column.desc(), model.id.desc())
+    ).label('rn')
+    ranked = (
+        db.select(model.id, row_number)
+        .where(user_column.in_(user_ids), *criteria)
+        .subquery()
+    )
+    latest = db.session.scalars(
+        db.select(model).join(ranked, model.id == ranked.c.id).where(ranked.c.rn == 1)
+    )
+    return {getattr(row, user_column.key): row for row in latest}
+
+
+def batch_get_latest_pms(user_ids: List[int], year: int = None) -> Dict[int, PMSEvaluation]:
+    """
+    Get the latest PMS evaluation for each of several users.
+    
+    Args:
+        user_ids: User IDs
+        year: Optional year to filter by
+    
+    Returns:
+        Dictionary mapping user ID to their latest PMSEvaluation
+    """
+    criteria = [PMSEvaluation.year == year] if year else []
+    return _latest_per_user(
+        PMSEvaluation, PMSEvaluation.staff_id, PMSEvaluation.created_at, user_ids, *criteria
+    )
+
+
+def prefill_final_scores(evaluations: Iterable[PMSEvaluation]) -> None:
+    """
+    Calculate final scores for evaluations that have never been scored.
+    
+    Loads the goals of all such evaluations in one query, instead of one
+    goals query per evaluation when calculate_pms_score() falls back to
+    calculate_final_score().
+    
+    Args:
+        evaluations: PMSEvaluation objects (e.g. the values of batch_get_latest_pms)
+    """
+    pending = {evaluation.id: evaluation for evaluation in evaluations if evaluation.final_score is None}
+    if not pending:
+        return
+    
+    goals_by_evaluation = defaultdict(list)
+    goals = PMSGoal.query.filter(PMSGoal.evaluation_id.in_(pending)).order_by(PMSGoal.id)
+    for goal in goals:
+        goals_by_evaluation[goal.evaluation_id].append(goal)
+    
+    for evaluation_id, evaluation in pending.items():
+        evaluation.final_score = PMSEvaluation.final_score_from_goals(goals_by_evaluation[evaluation_id])
+
+
+def batch_get_latest_exam(user_ids: List[int], exam_id: int = None,
+                          is_promotional: bool = True) -> Dict[int, EMMExamSubmission]:
+    """
+    Get the latest completed exam submission for each of several users.
+    
+    Args:
+        user_ids: User IDs
+        exam_id: Optional specific exam ID
+        is_promotional: Filter for promotional exams only
+    
+    Returns:
+        Dictionary mapping user ID to their latest EMMExamSubmission
+    """
+    from src.models import EMMExam
+    
+    criteria = [EMMExamSubmission.status == 'Completed']
+    if exam_id:
+        criteria.append(EMMExamSubmission.exam_id == exam_id)
+    elif is_promotional:
+        criteria.append(EMMExamSubmission.exam_id.in_(
+            db.select(EMMExam.id).where(EMMExam.is_promotional_exam == True)
+        ))
+    
+    return _latest_per_user(
+        EMMExamSubmission, EMMExamSubmission.candidate_id, EMMExamSubmission.submitted_at,
+        user_ids, *criteria
+    )
+
+
+def calculate_user_rrr_scores_from_maps(user: User, pms_map: Dict[int, PMSEvaluation],
+                                        exam_map: Dict[int, EMMExamSubmission],
+                                        seniority_map: Dict[int, float]) -> Dict[str, float]:
+    """
+    Calculate all RRR scores for a user from preloaded cohort data.
+    
+    Args:
+        user: User object
+        pms_map: Latest PMS evaluation per user ID (see batch_get_latest_pms)
+        exam_map: Latest exam submission per user ID (see batch_get_latest_exam)
+        seniority_map: Seniority score per user ID (see calculate_seniority_scores)
+    
+    Returns:
+        Dictionary with exam_score, pms_score, seniority_score, and combined_score
+    """
+    pms_evaluation = pms_map.get(user.id)
+    pms_score = calculate_pms_score(pms_evaluation) if pms_evaluation else 0.0
+    
+    exam_submission = exam_map.get(user.id)
+    exam_score = get_exam_score(user, exam_submission) if exam_submission else 0.0
+    
+    seniority_score = seniority_map[user.id]
+    
+    combined_score = calculate_combined_score(exam_score, pms_score, seniority_score)
+    
+    return {
+        'exam_score': exam_score,
+        'pms_score': pms_score,
+        'seniority_score': seniority_score,
+        'combined_score': combined_score
+    }
+
+
 def calculate_user_rrr_scores(user: User, candidates_in_same_grade: List[User], 
                                pms_year: int = None, exam_id: int = None) -> Dict[str, float]:
     """
@@ -3,25 +3,76 @@ AWS S3 File Storage Service
 Handles file uploads and downloads to/from AWS S3.
 """
 
+import logging
 import os
+import threading
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from cachetools import TLRUCache
 from botocore.exceptions import ClientError
-from typing import Optional, BinaryIO
+from functools import lru_cache
+from typing import Iterator, List, Optional, BinaryIO
 from werkzeug.utils import secure_filename
 import uuid
 
+logger = logging.getLogger(__name__)
+
+# HTTP connections kept open to S3; botocore's default of 10 queues
+# concurrent uploads
+S3_MAX_POOL_CONNECTIONS = int(os.getenv('S3_MAX_POOL_CONNECTIONS', 50))
+
+_S3_CLIENT_CONFIG = Config(
+    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 5}
+)
+
+# Files above the threshold go up/down as parts transferred in parallel
+_MB = 1024 * 1024
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * _MB,
+    multipart_chunksize=8 * _MB,
+    max_concurrency=10,
+    use_threads=True
+)
+
+# Presigned URLs are reused until this fraction of their lifetime has passed
+PRESIGNED_URL_REUSE_FRACTION = 0.9
+
+# (bucket, s3_key, expiration) -> URL; each entry lives for its own expiration
+_presigned_urls = TLRUCache(
+    maxsize=10000,
+    ttu=lambda key, url, now: now + key[2] * PRESIGNED_URL_REUSE_FRACTION
+)
+_presigned_urls_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def get_s3_client():
+    """
+    Get the process-wide S3 client.
+    
+    Building a client is slow (~100ms), and clients are thread-safe, so
+    every S3Service shares one client and its connection pool.
+    
+    Returns:
+        boto3 S3 client
+    """
+    session = boto3.session.Session(
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+        region_name=os.getenv('AWS_REGION', 'us-east-1')
+    )
+    return session.client('s3', config=_S3_CLIENT_CONFIG)
+
 
 class S3Service:
     """Service for interacting with AWS S3."""
     
     def __init__(self):
         """Initialize S3 client."""
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION', 'us-east-1')
-        )
+        self.s3_client = get_s3_client()
         self.bucket_name = os.getenv('AWS_S3_BUCKET', 'nbti-promotion-files')
     
     def upload_file(self, file: BinaryIO, folder: str = 'uploads', 
@@ -52,13 +103,14 @@ class S3Service:
                 file,
                 self.bucket_name,
                 s3_key,
-                ExtraArgs={'ACL': 'private'}  # Private by default
+                ExtraArgs={'ACL': 'private'},  # Private by default
+                Config=_TRANSFER_CONFIG
             )
             
             return s3_key
         
-        except ClientError as e:
-            print(f"Error uploading file to S3: {e}")
+        except ClientError:
+            logger.exception("Error uploading file to S3 for key %s", s3_key)
             return None
     
     def download_file(self, s3_key: str, local_path: str) -> bool:
@@ -76,12 +128,13 @@ class S3Service:
             self.s3_client.download_file(
                 self.bucket_name,
                 s3_key,
-                local_path
+                local_path,
+                Config=_TRANSFER_CONFIG
             )
             return True
         
-        except ClientError as e:
-            print(f"Error downloading file from S3: {e}")
+        except ClientError:
+            logger.exception("Error downloading file from S3 for key %s", s3_key)
             return False
     
     def get_file_url(self, s3_key: str, expiration: int = 3600) -> Optional[str]:
@@ -95,6 +148,12 @@ class S3Service:
         Returns:
             Presigned URL, or None if failed
         """
+        cache_key = (self.bucket_name, s3_key, expiration)
+        with _presigned_urls_lock:
+            url = _presigned_urls.get(cache_key)
+        if url is not None:
+            return url
+        
         try:
             url = self.s3_client.generate_presigned_url(
                 'get_object',
@@ -104,10 +163,12 @@ class S3Service:
                 },
                 ExpiresIn=expiration
             )
+            with _presigned_urls_lock:
+                _presigned_urls[cache_key] = url
             return url
         
-        except ClientError as e:
-            print(f"Error generating presigned URL: {e}")
+        except ClientError:
+            logger.exception("Error generating presigned URL for key %s", s3_key)
             return None
     
     def delete_file(self, s3_key: str) -> bool:
@@ -125,38 +186,66 @@ class S3Service:
                 Bucket=self.bucket_name,
                 Key=s3_key
             )
+            with _presigned_urls_lock:
+                stale = [key for key in _presigned_urls if key[:2] == (self.bucket_name, s3_key)]
+                for key in stale:
+                    _presigned_urls.pop(key, None)
             return True
         
-        except ClientError as e:
-            print(f"Error deleting file from S3: {e}")
+        except ClientError:
+            logger.exception("Error deleting file from S3 for key %s", s3_key)
             return False
     
-    def list_files(self, prefix: str = '', max_keys: int = 1000) -> list:
+    def list_files(self, prefix: str = '', page_size: int = 1000) -> Iterator[str]:
         """
         List files in S3 bucket with given prefix.
         
+        Keys are yielded page by page, so listings of any size are complete
+        without holding them all in memory. An error on the first page is
+        logged and yields nothing; an error after keys have been yielded is
+        re-raised so a truncated listing is never mistaken for a full one.
+        
         Args:
             prefix: S3 key prefix (folder)
-            max_keys: Maximum number of keys to return
+            page_size: Number of keys fetched per request (at most 1000)
         
-        Returns:
-            List of file keys
+        Yields:
+            File keys
+        
+        Raises:
+            ClientError: If a later page fails after keys were yielded
         """
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        yielded = False
         try:
-            response = self.s3_client.list_objects_v2(
+            for page in paginator.paginate(
                 Bucket=self.bucket_name,
                 Prefix=prefix,
-                MaxKeys=max_keys
-            )
-            
-            if 'Contents' in response:
-                return [obj['Key'] for obj in response['Contents']]
-            else:
-                return []
+                PaginationConfig={'PageSize': page_size}
+            ):
+                for obj in page.get('Contents', ()):
+                    yielded = True
+                    yield obj['Key']
+        
+        except ClientError:
+            logger.exception("Error listing files from S3 for prefix %s", prefix)
+            if yielded:
+                raise
+    
+    def list_files_all(self, prefix: str = '') -> List[str]:
+        """
+        List all files in S3 bucket with given prefix.
+        
+        Args:
+            prefix: S3 key prefix (folder)
         
-        except ClientError as e:
-            print(f"Error listing files from S3: {e}")
-            return []
+        Returns:
+            List of file keys
+        
+        Raises:
+            ClientError: If the listing fails part-way through
+        """
+        return list(self.list_files(prefix))
     
     def file_exists(self, s3_key: str) -> bool:
         """
@@ -3,9 +3,17 @@ Step Allocation Service
 Handles promotion step allocation to ensure salary increment.
 """
 
-from typing import Optional, Tuple, Dict
+from bisect import bisect_right
+from typing import Optional, Tuple, Dict, List
 from datetime import date
-from src.models import User, SalaryScale, StepIncrementLog, db
+from sqlalchemy import String, and_, case, cast, func, insert, literal, select, update
+from src.models import User, SalaryScale, StepIncrementLog, Notification, db
+from src.services.eligibility_service import invalidate_eligibility_cache
+
+
+# Maximum step, indexed by CONRAISS grade: 15 for grades 2-9, 11 for 10-12
+# and 9 for 13-15. Grades outside 0-15 default to 15.
+_MAX_STEP_BY_GRADE = (15,) * 10 + (11,) * 3 + (9,) * 3
 
 
 def get_max_step_for_grade(grade: int) -> int:
@@ -18,20 +26,28 @@ def get_max_step_for_grade(grade: int) -> int:
     Returns:
         Maximum step number
     """
-    if 2 <= grade <= 9:
-        return 15
-    elif 10 <= grade <= 12:
-        return 11
-    elif 13 <= grade <= 15:
-        return 9
-    else:
-        return 15  # Default
+    if 0 <= grade < len(_MAX_STEP_BY_GRADE):
+        return _MAX_STEP_BY_GRADE[grade]
+    return 15  # Default
+
+
+def max_step_for_grade_expression(grade):
+    """SQL equivalent of get_max_step_for_grade() for a grade column."""
+    return case(
+        (grade.between(2, 9), 15),
+        (grade.between(10, 12), 11),
+        (grade.between(13, 15), 9),
+        else_=15
+    )
 
 
 def get_salary_for_grade_step(grade: int, step: int) -> Optional[float]:
     """
     Get annual salary for a specific grade and step.
     
+    Reads the in-memory salary scale (see SalaryScale.salary_table) rather
+    than querying per lookup.
+    
     Args:
         grade: CONRAISS grade
         step: Step number
@@ -39,16 +55,7 @@ def get_salary_for_grade_step(grade: int, step: int) -> Optional[float]:
     Returns:
         Annual salary or None if not found
     """
-    salary_record = SalaryScale.query.filter_by(
-        conraiss_grade=grade,
-        step=step,
-        is_active=True
-    ).first()
-    
-    if salary_record:
-        return float(salary_record.annual_salary)
-    
-    return None
+    return SalaryScale.annual_salary_for(grade, step)
 
 
 def calculate_promotion_step(current_grade: int, current_step: int, new_grade: int) -> Tuple[int, float, float]:
@@ -63,24 +70,24 @@ def calculate_promotion_step(current_grade: int, current_step: int, new_grade: i
     Returns:
         Tuple of (recommended_step, current_salary, new_salary)
     """
+    salaries = SalaryScale.salary_table()
+    
     # Get current salary
-    current_salary = get_salary_for_grade_step(current_grade, current_step)
+    current_salary = salaries.get((current_grade, current_step))
     
     if current_salary is None:
         raise ValueError(f"Could not find salary for Grade {current_grade} Step {current_step}")
     
     # Find minimum step in new grade where salary > current salary
     max_step = get_max_step_for_grade(new_grade)
+    step = bisect_right(SalaryScale.salary_ceilings(new_grade), current_salary) + 1
     
-    for step in range(1, max_step + 1):
-        new_salary = get_salary_for_grade_step(new_grade, step)
-        
-        if new_salary and new_salary > current_salary:
-            return step, current_salary, new_salary
+    if step <= max_step and (new_grade, step) in salaries:
+        return step, current_salary, salaries[(new_grade, step)]
     
     # If no step provides increment, return max step
     # (This is an edge case that shouldn't happen with proper CONRAISS structure)
-    new_salary = get_salary_for_grade_step(new_grade, max_step)
+    new_salary = salaries.get((new_grade, max_step))
     return max_step, current_salary, new_salary or current_salary
 
 
@@ -129,10 +136,81 @@ def apply_promotion(user: User, new_grade: int, new_step: int,
     
     db.session.add(log)
     db.session.commit()
+    invalidate_eligibility_cache(user.id)
     
     return user, log
 
 
+def apply_promotion_bulk(specs: List[Dict]) -> Dict:
+    """
+    Apply promotions to many users at once.
+
+    Uses bulk ORM mappings (one UPDATE batch and one INSERT batch) instead
+    of per-user flushes, for batch jobs that promote hundreds of staff.
+
+    Args:
+        specs: List of dicts with user_id, new_grade, new_step and optional
+            effective_date, processed_by and notes
+
+    Returns:
+        Dictionary with the number promoted and the user IDs not found
+    """
+    if not specs:
+        return {'promoted': 0, 'not_found': []}
+
+    user_ids = [spec['user_id'] for spec in specs]
+    current = {
+        row.id: (row.conraiss_grade, row.conraiss_step)
+        for row in db.session.query(
+            User.id, User.conraiss_grade, User.conraiss_step
+        ).filter(User.id.in_(user_ids))
+    }
+
+    user_updates = []
+    log_rows = []
+    not_found = []
+
+    for spec in specs:
+        user_id = spec['user_id']
+        if user_id not in current:
+            not_found.append(user_id)
+            continue
+
+        old_grade, old_step = current[user_id]
+        new_grade = spec['new_grade']
+        new_step = spec['new_step']
+        effective_date = spec.get('effective_date') or date.today()
+
+        user_updates.append({
+            'id': user_id,
+            'conraiss_grade': new_grade,
+            'conraiss_step': new_step,
+            'date_of_last_promotion': effective_date,
+            'last_rrr_date': effective_date,
+            'last_rrr_type': 'Promotion',
+            'failed_promotion_attempts': 0
+        })
+        log_rows.append({
+            'user_id': user_id,
+            'previous_step': old_step,
+            'new_step': new_step,
+            'increment_date': effective_date,
+            'increment_type': 'Promotion',
+            'processed_by': spec.get('processed_by'),
+            'notes': spec.get('notes') or f"Promoted from Grade {old_grade} Step {old_step} to Grade {new_grade} Step {new_step}"
+        })
+
+    db.session.bulk_update_mappings(User, user_updates)
+    db.session.bulk_insert_mappings(StepIncrementLog, log_rows)
+    db.session.commit()
+
+    # One pass over the cache rather than one keyspace scan per user
+    if user_updates:
+        invalidate_eligibility_cache()
+
+    return {'promoted': len(user_updates), 'not_found': not_found}
+
+
 def increment_user_step(user: User, processed_by: int = None, 
                        notes: str = None) -> Optional[StepIncrementLog]:
     """
@@ -174,10 +252,75 @@ def increment_user_step(user: User, processed_by: int = None,
     
     db.session.add(log)
     db.session.commit()
+    invalidate_eligibility_cache(user.id)
     
     return log
 
 
+def apply_annual_step_increment(increment_date: date = None) -> Dict:
+    """
+    Increment the step of every eligible active user by 1 (annual increment).
+    
+    Runs as three set-based statements in one transaction instead of a loop
+    over users: an INSERT ... SELECT for the increment logs, another for
+    the notifications, then a single UPDATE of the users. Users without a
+    grade/step or already at their grade's maximum step are skipped.
+    
+    Args:
+        increment_date: Date recorded on the logs (default today)
+    
+    Returns:
+        Dictionary with the number of users incremented and skipped
+    """
+    if increment_date is None:
+        increment_date = date.today()
+    
+    users = User.__table__
+    active = users.c.is_active.is_(True)
+    eligible = and_(
+        active,
+        users.c.conraiss_grade.isnot(None), users.c.conraiss_grade != 0,
+        users.c.conraiss_step.isnot(None), users.c.conraiss_step != 0,
+        users.c.conraiss_step < max_step_for_grade_expression(users.c.conraiss_grade)
+    )
+    old_step = cast(users.c.conraiss_step, String)
+    new_step = cast(users.c.conraiss_step + 1, String)
+    
+    active_count = db.session.scalar(select(func.count()).select_from(users).where(active))
+    
+    # Logs and notifications read the steps before the UPDATE below
+    db.session.execute(insert(StepIncrementLog.__table__).from_select(
+        ['user_id', 'previous_step', 'new_step', 'increment_date', 'increment_type', 'notes'],
+        select(
+            users.c.id,
+            users.c.conraiss_step,
+            users.c.conraiss_step + 1,
+            literal(increment_date),
+            literal('Annual'),
+            literal('Automated annual step increment from ') + old_step + literal(' to ') + new_step
+        ).where(eligible)
+    ))
+    db.session.execute(insert(Notification.__table__).from_select(
+        ['user_id', 'notification_type', 'title', 'message', 'is_read'],
+        select(
+            users.c.id,
+            literal('step_increment'),
+            literal('Annual Step Increment'),
+            literal('Your step has been automatically incremented from ') + old_step + literal(' to ') + new_step
+            + literal(' as part of the annual increment process.'),
+            literal(False)
+        ).where(eligible)
+    ))
+    incremented = db.session.execute(
+        update(users).where(eligible).values(conraiss_step=users.c.conraiss_step + 1)
+    ).rowcount
+    
+    db.session.commit()
+    invalidate_eligibility_cache()
+    
+    return {'incremented': incremented, 'skipped': active_count - incremented}
+
+
 def get_promotion_step_recommendation(user: User, target_grade: int) -> Dict:
     """
     Get promotion step recommendation for a user.
@@ -0,0 +1,140 @@
+"""
+Task Status Service
+Reads background task state from the Celery result backend with a short
+shared cache, and lets callers block until a task's state changes.
+
+Workers publish on a per-task channel when a task finishes (see the
+task_postrun handler in src.tasks), so long-polling clients are woken by
+Redis pub/sub instead of re-reading the result backend in a loop.
+"""
+
+import time
+from typing import Dict
+
+import redis
+from celery.result import AsyncResult
+
+from src.celery_app import celery_app
+from src.services import cache_service
+
+# Bursts of polls for a running task collapse to one backend read per second
+TASK_STATUS_TTL = 1
+
+# Finished tasks never change state again
+TERMINAL_TASK_TTL = 3600
+TERMINAL_STATES = frozenset({'SUCCESS', 'FAILURE'})
+
+# Upper bound for ?wait= so requests can't hold a worker indefinitely
+MAX_WAIT_SECONDS = 30
+
+
+def _status_key(task_id: str) -> str:
+    return f"task-status:{task_id}"
+
+
+def task_events_channel(task_id: str) -> str:
+    """Pub/sub channel a worker publishes to when a task finishes."""
+    return f"task-events:{task_id}"
+
+
+def _read_task_status(task_id: str) -> Dict:
+    """Read a task's state from the result backend and cache it."""
+    task = AsyncResult(task_id, app=celery_app)
+    state = task.state
+
+    if state == 'PENDING':
+        response = {
+            'task_id': task_id,
+            'state': state,
+            'status': 'Task is waiting to be executed'
+        }
+    elif state == 'STARTED':
+        response = {
+            'task_id': task_id,
+            'state': state,
+            'status': 'Task is currently running'
+        }
+    elif state == 'SUCCESS':
+        response = {
+            'task_id': task_id,
+            'state': state,
+            'status': 'Task completed successfully',
+            'result': task.result
+        }
+    elif state == 'FAILURE':
+        response = {
+            'task_id': task_id,
+            'state': state,
+            'status': 'Task failed',
+            'error': str(task.info)
+        }
+    else:
+        response = {
+            'task_id': task_id,
+            'state': state,
+            'status': str(task.info)
+        }
+
+    ttl = TERMINAL_TASK_TTL if state in TERMINAL_STATES else TASK_STATUS_TTL
+    cache_service.set_json(_status_key(task_id), response, ttl)
+    return response
+
+
+def get_task_status(task_id: str) -> Dict:
+    """
+    Get the status of a background task.
+
+    Args:
+        task_id: Celery task ID
+
+    Returns:
+        Dictionary with task_id, state, status and result/error when finished
+    """
+    cached = cache_service.get_json(_status_key(task_id))
+    if cached is not None:
+        return cached
+
+    return _read_task_status(task_id)
+
+
+def wait_for_task_status(task_id: str, timeout: float) -> Dict:
+    """
+    Block until a task finishes, or until timeout.
+
+    Returns immediately if the task has already finished. Falls back to a
+    plain status read when the result backend has no pub/sub support.
+
+    Args:
+        task_id: Celery task ID
+        timeout: Maximum seconds to wait (capped at MAX_WAIT_SECONDS)
+
+    Returns:
+        Task status dictionary, as returned by get_task_status()
+    """
+    cached = cache_service.get_json(_status_key(task_id))
+    if cached is not None and cached['state'] in TERMINAL_STATES:
+        return cached
+
+    client = getattr(celery_app.backend, 'client', None)
+    if client is None:
+        return get_task_status(task_id)
+
+    deadline = time.monotonic() + min(timeout, MAX_WAIT_SECONDS)
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    try:
+        # Subscribe before reading so a change in between isn't missed
+        pubsub.subscribe(task_events_channel(task_id))
+        response = _read_task_status(task_id)
+        if response['state'] in TERMINAL_STATES:
+            return response
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return response
+            if pubsub.get_message(timeout=remaining) is not None:
+                return _read_task_status(task_id)
+    except redis.RedisError:
+        return get_task_status(task_id)
+    finally:
+        pubsub.close()
@@ -5,11 +5,39 @@ Handles bulk import of users from CSV files.
 
 import csv
 import io
-from typing import List, Dict, Tuple
-from datetime import datetime, date
-from src.models import db, User, Role
+import re
+from typing import List, Dict, Optional, Set, Tuple
+from datetime import date, datetime
+from sqlalchemy import insert, select, update
+from src.models import db, User, Role, user_roles
 from src.services.audit_service import log_action
 
+# Users written per bulk INSERT
+IMPORT_BATCH_SIZE = 1000
+
+# Imports larger than this are written with COPY on PostgreSQL (psycopg2)
+COPY_IMPORT_THRESHOLD = 5000
+
+# bcrypt cost for generated temporary passwords. They are 12 random
+# letters/digits (~71 bits), so a low cost is still far out of brute-force
+# reach; the hash is upgraded to PASSWORD_ROUNDS at the user's first login
+TEMP_PASSWORD_ROUNDS = 4
+
+# One @, no whitespace, and a dot in the domain part
+_EMAIL_RE = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+
+# Date formats accepted by parse_date, in order of precedence, compiled once
+# from the same field patterns strptime uses for %Y, %m and %d
+_YEAR = r'(?P<year>\d\d\d\d)'
+_MONTH = r'(?P<month>1[0-2]|0[1-9]|[1-9])'
+_DAY = r'(?P<day>3[01]|[12]\d|0[1-9]|[1-9]| [1-9])'
+_DATE_FORMATS = tuple(re.compile(pattern) for pattern in (
+    f'{_YEAR}-{_MONTH}-{_DAY}',  # %Y-%m-%d
+    f'{_DAY}/{_MONTH}/{_YEAR}',  # %d/%m/%Y
+    f'{_MONTH}/{_DAY}/{_YEAR}',  # %m/%d/%Y
+    f'{_YEAR}/{_MONTH}/{_DAY}',  # %Y/%m/%d
+))
+
 
 def parse_date(date_str: str) -> date:
     """
@@ -24,14 +52,22 @@ def parse_date(date_str: str) -> date:
     if not date_str or date_str.strip() == '':
         return None
     
-    # Try different date formats
-    formats = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d']
+    date_str = date_str.strip()
     
-    for fmt in formats:
+    # ISO dates are by far the most common; date.fromisoformat is C code
+    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
         try:
-            return datetime.strptime(date_str.strip(), fmt).date()
+            return date.fromisoformat(date_str)
         except ValueError:
-            continue
+            pass
+    
+    for pattern in _DATE_FORMATS:
+        match = pattern.fullmatch(date_str)
+        if match:
+            try:
+                return date(int(match['year']), int(match['month']), int(match['day']))
+            except ValueError:
+                continue
     
     return None
 
@@ -73,42 +109,135 @@ def generate_temp_password() -> str:
     return password
 
 
-def validate_csv_row(row: Dict, row_num: int) -> Tuple[bool, List[str]]:
+def _copy_value(value) -> str:
+    """Render a value as a field of PostgreSQL's COPY text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def copy_users(user_rows: List[Dict]) -> None:
+    """
+    Insert user rows with PostgreSQL COPY FROM STDIN.
+    
+    Runs on the session's own connection, so the rows are part of the
+    current transaction. COPY skips Python-side column defaults, so those
+    are filled in here for columns the rows leave out.
+    
+    Args:
+        user_rows: User column values, all with the same keys
+    """
+    table = User.__table__
+    columns = list(user_rows[0])
+    defaults = {}
+    for column in table.columns:
+        if column.key in user_rows[0] or column.default is None:
+            continue
+        if column.default.is_scalar:
+            defaults[column.key] = column.default.arg
+        elif column.default.is_callable:
+            defaults[column.key] = column.default.arg(None)
+    
+    buffer = io.StringIO()
+    for user_row in user_rows:
+        values = [user_row[key] for key in columns] + list(defaults.values())
+        buffer.write('\t'.join(_copy_value(value) for value in values))
+        buffer.write('\n')
+    buffer.seek(0)
+    
+    preparer = db.engine.dialect.identifier_preparer
+    column_list = ', '.join(preparer.quote(table.c[key].name) for key in columns + list(defaults))
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f'COPY {preparer.format_table(table)} ({column_list}) FROM STDIN WITH (FORMAT text)',
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def _field(row: List[str], columns: Dict[str, int], name: str) -> str:
+    """Return a CSV row's raw value for a named column ('' when absent)."""
+    index = columns.get(name)
+    if index is None or index >= len(row):
+        return ''
+    return row[index]
+
+
+def validate_csv_row(row: List[str], columns: Dict[str, int],
+                     row_num: int) -> Tuple[bool, List[str], Optional[int]]:
     """
     Validate a CSV row.
     
     Args:
-        row: Dictionary of CSV row data
+        row: List of CSV row values
+        columns: Mapping of header name to column index
         row_num: Row number for error reporting
     
     Returns:
-        Tuple of (is_valid, list_of_errors)
+        Tuple of (is_valid, list_of_errors, CONRAISS grade or None)
     """
     errors = []
+    grade = None
     
     # Required fields
     required_fields = ['first_name', 'last_name', 'email', 'employee_id']
     
     for field in required_fields:
-        if field not in row or not row[field] or row[field].strip() == '':
+        if _field(row, columns, field).strip() == '':
             errors.append(f"Row {row_num}: Missing required field '{field}'")
     
     # Validate email format
-    if 'email' in row and row['email']:
-        email = row['email'].strip()
-        if '@' not in email or '.' not in email:
+    email = _field(row, columns, 'email')
+    if email:
+        email = email.strip()
+        if not _EMAIL_RE.fullmatch(email):
             errors.append(f"Row {row_num}: Invalid email format '{email}'")
     
     # Validate CONRAISS grade
-    if 'conraiss_grade' in row and row['conraiss_grade']:
+    conraiss_grade = _field(row, columns, 'conraiss_grade')
+    if conraiss_grade:
         try:
-            grade = int(row['conraiss_grade'])
+            grade = int(conraiss_grade)
             if grade < 2 or grade > 15:
                 errors.append(f"Row {row_num}: CONRAISS grade must be between 2 and 15")
         except ValueError:
             errors.append(f"Row {row_num}: CONRAISS grade must be a number")
     
-    return len(errors) == 0, errors
+    return len(errors) == 0, errors, grade
+
+
+def _existing_values(column, values: Set[str]) -> Set[str]:
+    """Return the given values that already appear in a User column."""
+    values = sorted(values)
+    existing = set()
+    # One IN query per column keeps each lookup on that column's unique index;
+    # chunked to stay under the database's bound-parameter limit
+    for start in range(0, len(values), IMPORT_BATCH_SIZE):
+        existing.update(db.session.scalars(
+            select(column).where(column.in_(values[start:start + IMPORT_BATCH_SIZE]))
+        ))
+    return existing
+
+
+def existing_user_keys(employee_ids: Set[str], emails: Set[str]) -> Tuple[Set[str], Set[str]]:
+    """
+    Find which of the given employee IDs and emails already belong to users.
+    
+    Args:
+        employee_ids: Candidate employee IDs
+        emails: Candidate email addresses
+    
+    Returns:
+        Tuple of (taken employee IDs, taken emails)
+    """
+    return _existing_values(User.employee_id, employee_ids), _existing_values(User.email, emails)
 
 
 def import_users_from_csv(csv_file, imported_by: int) -> Dict:
@@ -128,9 +257,16 @@ def import_users_from_csv(csv_file, imported_by: int) -> Dict:
     Returns:
         Dictionary with import statistics and errors
     """
-    # Read CSV file
-    csv_data = csv_file.read().decode('utf-8')
-    csv_reader = csv.DictReader(io.StringIO(csv_data))
+    # Decode the upload as it is parsed rather than copying it into a str;
+    # rows are kept as plain lists and read through a header->index map
+    text_stream = io.TextIOWrapper(csv_file, encoding='utf-8', newline='')
+    try:
+        csv_reader = csv.reader(text_stream)
+        columns = {name: index for index, name in enumerate(next(csv_reader, []))}
+        rows = [row for row in csv_reader if row]
+    finally:
+        # Leave the caller's file open
+        text_stream.detach()
     
     # Statistics
     total_rows = 0
@@ -139,18 +275,26 @@ def import_users_from_csv(csv_file, imported_by: int) -> Dict:
     errors = []
     created_users = []
     
+    # Look up every employee_id/email in the file that is already taken in
+    # one query; rows accepted below are added so in-file repeats are caught
+    taken_employee_ids, taken_emails = existing_user_keys(
+        {_field(row, columns, 'employee_id').strip() for row in rows},
+        {_field(row, columns, 'email').strip().lower() for row in rows}
+    )
+    
     # Get default "Staff Member" role
     staff_role = Role.query.filter_by(name='Staff Member').first()
     if not staff_role:
         staff_role = Role(name='Staff Member', description='Regular staff member')
         db.session.add(staff_role)
-        db.session.flush()
+        # Committed on its own so a failed user chunk cannot roll it back
+        db.session.commit()
     
-    for row_num, row in enumerate(csv_reader, start=2):  # Start at 2 (header is row 1)
+    for row_num, row in enumerate(rows, start=2):  # Start at 2 (header is row 1)
         total_rows += 1
         
         # Validate row
-        is_valid, validation_errors = validate_csv_row(row, row_num)
+        is_valid, validation_errors, conraiss_grade = validate_csv_row(row, columns, row_num)
         
         if not is_valid:
             errors.extend(validation_errors)
@@ -159,81 +303,57 @@ def import_users_from_csv(csv_file, imported_by: int) -> Dict:
         
         try:
             # Check if user already exists
-            employee_id = row['employee_id'].strip()
-            email = row['email'].strip().lower()
+            employee_id = _field(row, columns, 'employee_id').strip()
+            email = _field(row, columns, 'email').strip().lower()
             
-            existing_user = User.query.filter(
-                (User.employee_id == employee_id) | (User.email == email)
-            ).first()
-            
-            if existing_user:
+            if employee_id in taken_employee_ids or email in taken_emails:
                 errors.append(f"Row {row_num}: User with employee_id '{employee_id}' or email '{email}' already exists")
                 skipped += 1
                 continue
             
-            # Create new user
-            user = User(
-                employee_id=employee_id,
-                first_name=row['first_name'].strip(),
-                last_name=row['last_name'].strip(),
-                email=email,
-                department=row.get('department', '').strip() or None,
-                position=row.get('position', '').strip() or None,
-                rank=row.get('rank', '').strip() or None,
-                cadre=row.get('cadre', '').strip() or None,
-                ippis_number=row.get('ippis_number', '').strip() or None,
-                file_no=row.get('file_no', '').strip() or None,
-                state_of_origin=row.get('state_of_origin', '').strip() or None,
-                local_government_area=row.get('local_government_area', '').strip() or None,
-                phone_number=row.get('phone_number', '').strip() or None,
-                office_location=row.get('office_location', '').strip() or None,
-                qualifications=row.get('qualifications', '').strip() or None,
-                is_active=True
-            )
-            
-            # Generate username
-            user.username = generate_username(user.first_name, user.last_name, employee_id)
-            
-            # Generate temporary password
+            # Build the new user's row; rows are inserted in bulk after the loop
+            first_name = _field(row, columns, 'first_name').strip()
+            last_name = _field(row, columns, 'last_name').strip()
             temp_password = generate_temp_password()
-            user.set_password(temp_password)
-            
-            # Parse dates
-            if 'date_of_birth' in row:
-                user.date_of_birth = parse_date(row['date_of_birth'])
-            
-            if 'confirmation_date' in row:
-                user.confirmation_date = parse_date(row['confirmation_date'])
             
-            if 'date_of_hire' in row:
-                user.date_of_first_appointment = parse_date(row['date_of_hire'])
+            # Default to step 1 when a grade is given
+            conraiss_step = 1 if conraiss_grade is not None else None
             
-            # Parse CONRAISS grade
-            if 'conraiss_grade' in row and row['conraiss_grade']:
-                try:
-                    user.conraiss_grade = int(row['conraiss_grade'])
-                    # Default to step 1 if not specified
-                    user.conraiss_step = 1
-                except ValueError:
-                    pass
-            
-            # Add default role
-            user.add_role(staff_role)
-            
-            # Store supervisor_employee_id for later linking
-            supervisor_employee_id = row.get('supervisor_employee_id', '').strip()
-            if supervisor_employee_id:
-                # We'll link supervisors in a second pass
-                user._temp_supervisor_employee_id = supervisor_employee_id
+            user_row = {
+                'employee_id': employee_id,
+                'username': generate_username(first_name, last_name, employee_id),
+                'password_hash': User.hash_password(temp_password, rounds=TEMP_PASSWORD_ROUNDS),
+                'first_name': first_name,
+                'last_name': last_name,
+                'email': email,
+                'department': _field(row, columns, 'department').strip() or None,
+                'position': _field(row, columns, 'position').strip() or None,
+                'rank': _field(row, columns, 'rank').strip() or None,
+                'cadre': _field(row, columns, 'cadre').strip() or None,
+                'ippis_number': _field(row, columns, 'ippis_number').strip() or None,
+                'file_no': _field(row, columns, 'file_no').strip() or None,
+                'state_of_origin': _field(row, columns, 'state_of_origin').strip() or None,
+                'local_government_area': _field(row, columns, 'local_government_area').strip() or None,
+                'phone_number': _field(row, columns, 'phone_number').strip() or None,
+                'office_location': _field(row, columns, 'office_location').strip() or None,
+                'qualifications': _field(row, columns, 'qualifications').strip() or None,
+                'date_of_birth': parse_date(_field(row, columns, 'date_of_birth')),
+                'confirmation_date': parse_date(_field(row, columns, 'confirmation_date')),
+                'date_of_first_appointment': parse_date(_field(row, columns, 'date_of_hire')),
+                'conraiss_grade': conraiss_grade,
+                'conraiss_step': conraiss_step,
+                'is_active': True
+            }
             
-            db.session.add(user)
-            db.session.flush()  # Get user ID
+            taken_employee_ids.add(employee_id)
+            taken_emails.add(email)
             
-            # Store for later supervisor linking
+            # Store for role assignment and supervisor linking
             created_users.append({
-                'user': user,
+                'row_num': row_num,
+                'row': user_row,
                 'temp_password': temp_password,
-                'supervisor_employee_id': supervisor_employee_id
+                'supervisor_employee_id': _field(row, columns, 'supervisor_employee_id').strip()
             })
             
             successful += 1
@@ -243,52 +363,94 @@ def import_users_from_csv(csv_file, imported_by: int) -> Dict:
             skipped += 1
             continue
     
-    # Second pass: Link supervisors
-    supervisor_link_errors = []
-    for user_data in created_users:
-        user = user_data['user']
-        supervisor_employee_id = user_data['supervisor_employee_id']
-        
-        if supervisor_employee_id:
-            supervisor = User.query.filter_by(employee_id=supervisor_employee_id).first()
-            if supervisor:
-                user.supervisor_id = supervisor.id
+    # Commit users in chunks so one bad chunk only loses its own rows and
+    # the session never holds the whole file
+    imported_users = []
+    user_ids = {}
+    use_copy = (
+        len(created_users) > COPY_IMPORT_THRESHOLD
+        and db.engine.dialect.name == 'postgresql' and db.engine.dialect.driver == 'psycopg2'
+    )
+    for start in range(0, len(created_users), IMPORT_BATCH_SIZE):
+        chunk = created_users[start:start + IMPORT_BATCH_SIZE]
+        batch = [user_data['row'] for user_data in chunk]
+        try:
+            if use_copy:
+                copy_users(batch)
             else:
-                supervisor_link_errors.append(
-                    f"User {user.employee_id}: Supervisor with employee_id '{supervisor_employee_id}' not found"
+                db.session.bulk_insert_mappings(User, batch)
+            batch_ids = dict(db.session.execute(
+                select(User.employee_id, User.id).where(
+                    User.employee_id.in_([user_row['employee_id'] for user_row in batch])
                 )
+            ).all())
+            db.session.execute(
+                insert(user_roles),
+                [{'user_id': batch_ids[user_row['employee_id']], 'role_id': staff_role.id} for user_row in batch]
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            # Report the driver error only; the statement text would echo password hashes
+            errors.append(
+                f"Rows {chunk[0]['row_num']}-{chunk[-1]['row_num']}: Database error - {getattr(e, 'orig', e)}"
+            )
+            successful -= len(chunk)
+            skipped += len(chunk)
+            continue
+        
+        user_ids.update(batch_ids)
+        imported_users.extend(chunk)
     
-    # Commit all changes
+    supervisor_link_errors = []
     try:
-        db.session.commit()
-        
-        # Log the import action
-        log_action(
-            user_id=imported_by,
-            action_type='BULK_IMPORT',
-            entity_type='User',
-            new_value={
-                'total_rows': total_rows,
-                'successful': successful,
-                'skipped': skipped,
-                'errors_count': len(errors)
-            },
-            is_sensitive=False
-        )
+        # Link supervisors once every chunk's users have IDs, resolving all
+        # supervisor employee IDs in one query per IMPORT_BATCH_SIZE
+        supervisor_employee_ids = sorted({
+            user_data['supervisor_employee_id'] for user_data in imported_users
+            if user_data['supervisor_employee_id']
+        })
+        supervisor_ids = {}
+        for start in range(0, len(supervisor_employee_ids), IMPORT_BATCH_SIZE):
+            supervisor_ids.update(db.session.execute(
+                select(User.employee_id, User.id).where(
+                    User.employee_id.in_(supervisor_employee_ids[start:start + IMPORT_BATCH_SIZE])
+                )
+            ).all())
         
+        supervisor_links = []
+        for user_data in imported_users:
+            employee_id = user_data['row']['employee_id']
+            supervisor_employee_id = user_data['supervisor_employee_id']
+            
+            if supervisor_employee_id:
+                supervisor_id = supervisor_ids.get(supervisor_employee_id)
+                if supervisor_id is not None:
+                    supervisor_links.append({'id': user_ids[employee_id], 'supervisor_id': supervisor_id})
+                else:
+                    supervisor_link_errors.append(
+                        f"User {employee_id}: Supervisor with employee_id '{supervisor_employee_id}' not found"
+                    )
+        if supervisor_links:
+            db.session.execute(update(User), supervisor_links)
+        db.session.commit()
     except Exception as e:
         db.session.rollback()
-        return {
-            'success': False,
-            'message': f'Database commit failed: {str(e)}',
-            'statistics': {
-                'total_rows': total_rows,
-                'successful': 0,
-                'skipped': total_rows,
-                'errors': len(errors) + 1
-            },
-            'errors': errors + [f'Database error: {str(e)}']
-        }
+        supervisor_link_errors.append(f'Supervisor linking failed: {str(e)}')
+    
+    # Log the import action
+    log_action(
+        user_id=imported_by,
+        action_type='BULK_IMPORT',
+        entity_type='User',
+        new_value={
+            'total_rows': total_rows,
+            'successful': successful,
+            'skipped': skipped,
+            'errors_count': len(errors)
+        },
+        is_sensitive=False
+    )
     
     # Prepare result
     result = {
@@ -304,12 +466,12 @@ def import_users_from_csv(csv_file, imported_by: int) -> Dict:
         'errors': errors + supervisor_link_errors,
         'created_users': [
             {
-                'employee_id': u['user'].employee_id,
-                'username': u['user'].username,
-                'email': u['user'].email,
+                'employee_id': u['row']['employee_id'],
+                'username': u['row']['username'],
+                'email': u['row']['email'],
                 'temp_password': u['temp_password']
             }
-            for u in created_users
+            for u in imported_users
         ]
     }
     
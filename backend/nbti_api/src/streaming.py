@@ -0,0 +1,54 @@
+"""
+Streaming JSON Responses
+Helpers for sending large result sets without materialising them in memory.
+"""
+
+import json
+from typing import Any, Dict, Iterable
+
+from flask import Response, stream_with_context
+
+# Rows serialised per chunk written to the client
+CHUNK_SIZE = 500
+
+
+def _generate_json_object(fields: Dict[str, Any], items_key: str,
+                          items: Iterable[Dict], count_key: str = None):
+    head = json.dumps(fields)[:-1]
+    yield head + (', ' if fields else '') + json.dumps(items_key) + ': ['
+
+    count = 0
+    chunk = []
+    for item in items:
+        chunk.append(json.dumps(item))
+        count += 1
+        if len(chunk) >= CHUNK_SIZE:
+            yield (', ' if count > len(chunk) else '') + ', '.join(chunk)
+            chunk = []
+    if chunk:
+        yield (', ' if count > len(chunk) else '') + ', '.join(chunk)
+
+    tail = ']'
+    if count_key:
+        tail += f', {json.dumps(count_key)}: {count}'
+    yield tail + '}'
+
+
+def stream_json_object(fields: Dict[str, Any], items_key: str,
+                       items: Iterable[Dict], count_key: str = None) -> Response:
+    """
+    Stream a JSON object whose main payload is a (possibly large) list.
+
+    Args:
+        fields: Scalar fields written before the list
+        items_key: Key of the streamed list
+        items: Iterable of JSON-serialisable rows, consumed lazily
+        count_key: Optional key for the number of rows, written after the list
+
+    Returns:
+        Streaming Flask response with the request context kept alive
+    """
+    return Response(
+        stream_with_context(_generate_json_object(fields, items_key, items, count_key)),
+        mimetype='application/json'
+    )
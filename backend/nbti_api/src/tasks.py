@@ -3,16 +3,44 @@ Celery Background Tasks
 Handles automated step increments, notifications, and other background jobs.
 """
 
-import os
-from datetime import datetime, date
+import logging
+from datetime import datetime
+from celery.signals import task_postrun
+from sqlalchemy import delete, select
 from src.celery_app import celery_app
-from src.models import db, User, Notification, StepIncrementLog
+from src.models import db
+from src.services.step_allocation_service import apply_annual_step_increment
+
+logger = logging.getLogger(__name__)
+
+# Audit log rows removed per DELETE statement by cleanup_old_audit_logs
+AUDIT_CLEANUP_BATCH_SIZE = 10000
 
 
 def get_flask_app():
-    """Lazy load Flask app to avoid circular imports."""
-    from src.main import create_app
-    return create_app()
+    """
+    Lazy load Flask app to avoid circular imports.
+    
+    src.main builds the app when it is first imported, so every task in a
+    worker process shares that one instance instead of creating its own.
+    """
+    from src.main import app
+    return app
+
+
+@task_postrun.connect
+def publish_task_finished(task_id=None, state=None, **kwargs):
+    """Wake clients long-polling this task's status (see task_status_service)."""
+    from src.services.task_status_service import task_events_channel
+
+    client = getattr(celery_app.backend, 'client', None)
+    if client is None:
+        return
+    try:
+        client.publish(task_events_channel(task_id), state or '')
+    except Exception:
+        # Pollers still see the new state on their next read
+        pass
 
 
 @celery_app.task(name='src.tasks.process_annual_step_increment')
@@ -23,85 +51,26 @@ def process_annual_step_increment():
     """
     flask_app = get_flask_app()
     with flask_app.app_context():
-        # Get all active users
-        users = User.query.filter_by(is_active=True).all()
-        
-        incremented_count = 0
-        skipped_count = 0
-        error_count = 0
-        
-        for user in users:
-            try:
-                if not user.conraiss_grade or not user.conraiss_step:
-                    skipped_count += 1
-                    continue
-                
-                # Get max step for user's grade
-                if 2 <= user.conraiss_grade <= 9:
-                    max_step = 15
-                elif 10 <= user.conraiss_grade <= 12:
-                    max_step = 11
-                elif 13 <= user.conraiss_grade <= 15:
-                    max_step = 9
-                else:
-                    max_step = 15
-                
-                # Check if already at max step
-                if user.conraiss_step >= max_step:
-                    skipped_count += 1
-                    continue
-                
-                # Increment step
-                old_step = user.conraiss_step
-                user.conraiss_step += 1
-                
-                # Log the increment
-                log = StepIncrementLog(
-                    user_id=user.id,
-                    previous_step=old_step,
-                    new_step=user.conraiss_step,
-                    increment_date=date.today(),
-                    increment_type='Annual',
-                    notes=f"Automated annual step increment from {old_step} to {user.conraiss_step}"
-                )
-                db.session.add(log)
-                
-                # Create notification
-                notification = Notification(
-                    user_id=user.id,
-                    notification_type='step_increment',
-                    title='Annual Step Increment',
-                    message=f'Your step has been automatically incremented from {old_step} to {user.conraiss_step} as part of the annual increment process.',
-                    is_read=False
-                )
-                db.session.add(notification)
-                
-                incremented_count += 1
-                
-            except Exception as e:
-                error_count += 1
-                print(f"Error processing user {user.id}: {str(e)}")
-                continue
-        
-        # Commit all changes
+        # Set-based: logs, notifications and step updates in three statements
         try:
-            db.session.commit()
+            counts = apply_annual_step_increment()
         except Exception as e:
             db.session.rollback()
+            logger.exception("Annual step increment failed")
             return {
                 'status': 'error',
                 'message': f'Database commit failed: {str(e)}',
                 'incremented': 0,
                 'skipped': 0,
-                'errors': error_count
+                'errors': 0
             }
         
         return {
             'status': 'success',
             'message': 'Annual step increment completed',
-            'incremented': incremented_count,
-            'skipped': skipped_count,
-            'errors': error_count,
+            'incremented': counts['incremented'],
+            'skipped': counts['skipped'],
+            'errors': 0,
             'timestamp': datetime.utcnow().isoformat()
         }
 
@@ -190,11 +159,21 @@ def cleanup_old_audit_logs(days_to_keep: int = 3650):
         
         cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
         
-        deleted_count = AuditLog.query.filter(
+        # Delete in server-side batches, committing each, so neither the
+        # session nor a single transaction has to cover every old row
+        expired_ids = select(AuditLog.id).where(
             AuditLog.timestamp < cutoff_date
-        ).delete()
-        
-        db.session.commit()
+        ).limit(AUDIT_CLEANUP_BATCH_SIZE)
+        deleted_count = 0
+        while True:
+            deleted = db.session.execute(
+                delete(AuditLog).where(AuditLog.id.in_(expired_ids)),
+                execution_options={'synchronize_session': False}
+            ).rowcount
+            db.session.commit()
+            deleted_count += deleted
+            if deleted < AUDIT_CLEANUP_BATCH_SIZE:
+                break
         
         return {
             'status': 'success',
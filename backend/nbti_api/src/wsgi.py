@@ -0,0 +1,19 @@
+"""
+WSGI Entry Point
+Production entry point for gunicorn's gevent worker.
+
+Every API route is I/O-bound (database, Redis, Celery enqueue), so one
+gevent worker can keep many requests in flight while they wait. The
+standard library and psycopg2 are patched before the app is imported so
+those waits yield to other greenlets instead of blocking the worker.
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+from psycogreen.gevent import patch_psycopg  # noqa: E402
+
+patch_psycopg()
+
+from src.main import app  # noqa: E402,F401
@@ -4,16 +4,29 @@ Simple test runner for the NBTI Promotion Automation API
 """
 
 import os
+import socket
 import sys
 import requests
 import time
 import subprocess
 import signal
+from concurrent.futures import ThreadPoolExecutor
 from threading import Thread
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
+def wait_for_server(host="localhost", port=5000, timeout=5.0):
+    """Wait until the server accepts TCP connections on host:port."""
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        try:
+            with socket.create_connection((host, port), timeout=0.1):
+                return
+        except OSError:
+            time.sleep(0.01)
+    raise TimeoutError(f"Server on {host}:{port} did not start within {timeout}s")
+
 def start_test_server():
     """Start the Flask server for testing."""
     print("Starting test server...")
@@ -26,10 +39,21 @@ def start_test_server():
     ], env=env, cwd=os.path.dirname(__file__))
     
     # Wait for server to start
-    time.sleep(3)
+    try:
+        wait_for_server()
+    except TimeoutError:
+        process.terminate()
+        raise
     
     return process
 
+def get_or_error(url, headers):
+    """GET a URL, returning the request error instead of raising it."""
+    try:
+        return requests.get(url, headers=headers, timeout=5)
+    except requests.exceptions.RequestException as e:
+        return e
+
 def test_api_endpoints():
     """Test API endpoints manually."""
     base_url = "http://localhost:5000"
@@ -86,44 +110,28 @@ def test_api_endpoints():
             token = response.json().get('access_token')
             headers = {'Authorization': f'Bearer {token}'}
             
-            # Test 4: Get current user
-            try:
-                response = requests.get(f"{base_url}/api/auth/me", headers=headers, timeout=5)
-                if response.status_code == 200:
-                    print("✅ Get current user working")
-                    tests_passed += 1
-                else:
-                    print(f"❌ Get current user failed: {response.status_code}")
-                    tests_failed += 1
-            except requests.exceptions.RequestException as e:
-                print(f"❌ Get current user error: {e}")
-                tests_failed += 1
+            # Tests 4-6 only need the token, so run them concurrently
+            authenticated_tests = [
+                ("Get current user", "/api/auth/me"),
+                ("PMS dashboard", "/api/pms/dashboard"),
+                ("EMM dashboard", "/api/emm/dashboard"),
+            ]
+            with ThreadPoolExecutor(max_workers=len(authenticated_tests)) as executor:
+                responses = list(executor.map(
+                    lambda test: get_or_error(f"{base_url}{test[1]}", headers),
+                    authenticated_tests
+                ))
             
-            # Test 5: PMS Dashboard
-            try:
-                response = requests.get(f"{base_url}/api/pms/dashboard", headers=headers, timeout=5)
-                if response.status_code == 200:
-                    print("✅ PMS dashboard working")
-                    tests_passed += 1
-                else:
-                    print(f"❌ PMS dashboard failed: {response.status_code}")
+            for (name, _), response in zip(authenticated_tests, responses):
+                if isinstance(response, requests.exceptions.RequestException):
+                    print(f"❌ {name} error: {response}")
                     tests_failed += 1
-            except requests.exceptions.RequestException as e:
-                print(f"❌ PMS dashboard error: {e}")
-                tests_failed += 1
-            
-            # Test 6: EMM Dashboard
-            try:
-                response = requests.get(f"{base_url}/api/emm/dashboard", headers=headers, timeout=5)
-                if response.status_code == 200:
-                    print("✅ EMM dashboard working")
+                elif response.status_code == 200:
+                    print(f"✅ {name} working")
                     tests_passed += 1
                 else:
-                    print(f"❌ EMM dashboard failed: {response.status_code}")
+                    print(f"❌ {name} failed: {response.status_code}")
                     tests_failed += 1
-            except requests.exceptions.RequestException as e:
-                print(f"❌ EMM dashboard error: {e}")
-                tests_failed += 1
                 
         else:
             print(f"❌ User login failed: {response.status_code} - {response.text}")
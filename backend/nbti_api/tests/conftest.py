@@ -3,17 +3,21 @@ import tempfile
 import os
 import sys
 
-# Add the src directory to the path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+# Add the project root to the path so the src package is importable
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Keep tests off the database and Redis configured in .env
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['REDIS_URL'] = ''
 
 from flask import Flask
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from datetime import timedelta
 
-from models.user import db, User, Role
-from models.pms import PMSEvaluation, PMSGoal
-from models.emm import EMMExam, EMMQuestion, EMMExamSubmission
+from src.models.user import db, User, Role
+from src.models.pms import PMSEvaluation, PMSGoal
+from src.models.emm import EMMExam, EMMQuestion, EMMExamSubmission
 from werkzeug.security import generate_password_hash
 from datetime import datetime, timedelta
 
@@ -42,10 +46,10 @@ def create_test_app(config=None):
     CORS(app)
     
     # Import and register blueprints
-    from routes.auth import auth_bp
-    from routes.user import user_bp
-    from routes.pms import pms_bp
-    from routes.emm import emm_bp
+    from src.routes.auth import auth_bp
+    from src.routes.user import user_bp
+    from src.routes.pms import pms_bp
+    from src.routes.emm import emm_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(user_bp, url_prefix='/api/users')
@@ -84,6 +88,36 @@ def app():
         db.drop_all()
 
 
+@pytest.fixture
+def api_app():
+    """The full application from src.main.create_app, on a fresh in-memory database."""
+    from src.main import create_app
+    from src.services import identity_cache
+    from src import jwt_cache, security
+    
+    # Identities and tokens are cached per process; user IDs repeat across tests
+    identity_cache._local_identities.clear()
+    jwt_cache._jwt_cache.clear()
+    # Rate limit counters too, and every test client shares one address
+    security._local_buckets = security._LocalTokenBuckets()
+    
+    app = create_app()
+    app.config['TESTING'] = True
+    security.limiter.reset()
+    
+    yield app
+    
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def api_client(api_app):
+    """A test client for the full application."""
+    return api_app.test_client()
+
+
 @pytest.fixture
 def client(app):
     """A test client for the app."""
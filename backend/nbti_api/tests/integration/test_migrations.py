@@ -0,0 +1,83 @@
+import os
+
+import pytest
+import sqlalchemy as sa
+from flask_migrate import downgrade, upgrade
+
+from src.models.user import User, db
+
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'migrations')
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """The full application on an empty SQLite file, as `flask db upgrade` sees it."""
+    from src.main import create_app
+
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'app.db'}")
+    app = create_app()
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def _head_revision():
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option('script_location', MIGRATIONS_DIR)
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+class TestMigrations:
+    """Test the migration chain against databases built by create_all()."""
+
+    def test_upgrade_from_empty_to_head(self, file_app):
+        """Test every revision applies on top of the tables create_app() made."""
+        with file_app.app_context():
+            upgrade(directory=MIGRATIONS_DIR)
+
+            version = db.session.execute(sa.text('SELECT version_num FROM alembic_version')).scalar()
+            assert version == _head_revision()
+
+            columns = {c['name'] for c in sa.inspect(db.engine).get_columns('pms_evaluations')}
+            assert 'pms_percentage' in columns
+
+    def test_upgrade_is_repeatable(self, file_app):
+        """Test upgrading an up-to-date database is a no-op."""
+        with file_app.app_context():
+            upgrade(directory=MIGRATIONS_DIR)
+            upgrade(directory=MIGRATIONS_DIR)
+
+            version = db.session.execute(sa.text('SELECT version_num FROM alembic_version')).scalar()
+            assert version == _head_revision()
+
+    def test_duplicate_recommendations_are_removed(self, file_app):
+        """Test the user/cycle unique constraint keeps the newest duplicate."""
+        with file_app.app_context():
+            # Rebuild the table without the constraint, as on older databases
+            upgrade(directory=MIGRATIONS_DIR, revision='1b94e7c2a3d0')
+            downgrade(directory=MIGRATIONS_DIR, revision='f3d6a0b9e218')
+
+            user_id = User.query.filter_by(username='admin').first().id
+            for cycle, score in (('2026', 1.0), ('2026', 2.0), ('2025', 3.0)):
+                db.session.execute(
+                    sa.text(
+                        'INSERT INTO rrr_recommendation (user_id, promotion_cycle, conraiss_grade, combined_score) '
+                        'VALUES (:user_id, :cycle, 7, :score)'
+                    ),
+                    {'user_id': user_id, 'cycle': cycle, 'score': score}
+                )
+            db.session.commit()
+
+            upgrade(directory=MIGRATIONS_DIR)
+
+            rows = db.session.execute(sa.text(
+                'SELECT promotion_cycle, combined_score FROM rrr_recommendation ORDER BY promotion_cycle'
+            )).all()
+            assert [tuple(row) for row in rows] == [('2025', 3.0), ('2026', 2.0)]
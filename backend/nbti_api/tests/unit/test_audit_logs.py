@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from src.models import AuditLog
+from src.models.user import User, db
+
+
+@pytest.fixture
+def audit_setup(api_app):
+    """Admin headers plus seven audit entries, five sharing one timestamp."""
+    with api_app.app_context():
+        admin_id = User.query.filter_by(username='admin').first().id
+        shared = datetime(2026, 1, 1, 12, 0, 0)
+        timestamps = [shared + timedelta(minutes=1)] + [shared] * 5 + [shared - timedelta(minutes=1)]
+        logs = [
+            AuditLog(user_id=admin_id, action_type='UPDATE', entity_type='User', entity_id=i, timestamp=timestamp)
+            for i, timestamp in enumerate(timestamps)
+        ]
+        db.session.add_all(logs)
+        db.session.commit()
+
+        return {
+            'headers': {'Authorization': f'Bearer {create_access_token(identity=str(admin_id))}'},
+            'entity_ids': list(range(len(logs))),
+        }
+
+
+def _page(api_client, headers, **params):
+    response = api_client.get('/api/audit/logs', headers=headers,
+                              query_string={'entity_type': 'User', **params})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+class TestAuditLogPaging:
+    """Test keyset pagination of the audit log."""
+
+    def test_pages_cover_every_entry_once(self, api_client, audit_setup):
+        """Test entries sharing a timestamp are neither skipped nor repeated."""
+        seen = []
+        params = {}
+        while True:
+            page = _page(api_client, audit_setup['headers'], limit=2, **params)
+            seen.extend(log['entity_id'] for log in page['logs'])
+            if page['next_before'] is None:
+                break
+            params = page['next_before']
+
+        assert sorted(seen) == audit_setup['entity_ids']
+        # Newest first: the later entry leads and the earlier one comes last
+        assert (seen[0], seen[-1]) == (0, 6)
+
+    def test_full_last_page_is_followed_by_empty_page(self, api_client, audit_setup):
+        """Test a full page always has a cursor, even when nothing follows."""
+        page = _page(api_client, audit_setup['headers'], limit=7)
+        assert page['count'] == 7
+        assert page['next_before'] is not None
+
+        page = _page(api_client, audit_setup['headers'], limit=7, **page['next_before'])
+        assert (page['count'], page['next_before']) == (0, None)
+
+    def test_timestamp_only_cursor(self, api_client, audit_setup):
+        """Test ?before= on its own returns strictly older entries."""
+        page = _page(api_client, audit_setup['headers'], before='2026-01-01T12:00:00')
+        assert [log['entity_id'] for log in page['logs']] == [6]
+
+    @pytest.mark.parametrize('params', [{'before': 'yesterday'}, {'before': '2026-01-01', 'before_id': '42'}])
+    def test_invalid_cursor(self, api_client, audit_setup, params):
+        """Test a malformed cursor is rejected."""
+        response = api_client.get('/api/audit/logs', headers=audit_setup['headers'], query_string=params)
+        assert response.status_code == 400
@@ -0,0 +1,99 @@
+from datetime import date, timedelta
+from itertools import product
+
+import pytest
+from sqlalchemy import event
+
+from src.models.user import User, db
+from src.services.eligibility_service import (
+    get_eligible_candidates,
+    is_eligible_for_promotion,
+    update_eligibility_status_for_all_staff,
+)
+
+
+# Days in grade on either side of each 1/2/3/4-year requirement
+DAYS_IN_GRADE = (None, 365, 366, 730, 731, 1095, 1096, 1460, 1461, 1462)
+
+
+@pytest.fixture
+def staff(api_app):
+    """Active staff across every grade band, boundary date and failure count."""
+    today = date.today()
+    with api_app.app_context():
+        users = []
+        combinations = product((None, 0, 2, 5, 6, 12, 13, 14, 15), (0, 1), DAYS_IN_GRADE, (True, False))
+        for i, (grade, failed, days, promoted) in enumerate(combinations):
+            start = today - timedelta(days=days) if days is not None else None
+            users.append(User(
+                username=f'staff{i}', email=f'staff{i}@example.com', password_hash='x',
+                conraiss_grade=grade, conraiss_step=1, failed_promotion_attempts=failed,
+                # Time in grade counts from the last promotion when there is one
+                date_of_last_promotion=start if promoted else None,
+                date_of_first_appointment=None if promoted else start
+            ))
+        users.append(User(username='nostep', email='nostep@example.com', password_hash='x',
+                          conraiss_grade=7, conraiss_step=None,
+                          date_of_first_appointment=today - timedelta(days=2000)))
+        users.append(User(username='inactive', email='inactive@example.com', password_hash='x',
+                          conraiss_grade=7, conraiss_step=1, is_active=False,
+                          date_of_first_appointment=today - timedelta(days=2000)))
+        db.session.add_all(users)
+        db.session.commit()
+
+
+def _python_eligible(users):
+    return {user.id for user in users if is_eligible_for_promotion(user)['eligible']}
+
+
+class TestEligibilitySQL:
+    """Test the SQL eligibility filter agrees with is_eligible_for_promotion."""
+
+    def test_candidates_match_python_rules(self, api_app, staff):
+        """Test get_eligible_candidates returns exactly the users the Python check accepts."""
+        with api_app.app_context():
+            active = User.query.filter_by(is_active=True).all()
+            expected = _python_eligible(active)
+
+            assert {user.id for user in get_eligible_candidates()} == expected
+            # Both sides of every boundary are present, so a disagreement would show
+            assert 0 < len(expected) < len(active)
+
+    def test_target_grade_filter(self, api_app, staff):
+        """Test target_grade limits candidates to the grade below it."""
+        with api_app.app_context():
+            grade_six = User.query.filter_by(is_active=True, conraiss_grade=6).all()
+            candidates = get_eligible_candidates(target_grade=7)
+
+            assert {user.id for user in candidates} == _python_eligible(grade_six)
+
+    def test_batch_update_counts(self, api_app, staff):
+        """Test the aggregate statistics match a per-user evaluation."""
+        with api_app.app_context():
+            active = User.query.filter_by(is_active=True).all()
+            eligible = len(_python_eligible(active))
+
+            assert update_eligibility_status_for_all_staff() == {
+                'total_users': len(active),
+                'eligible': eligible,
+                'ineligible': len(active) - eligible
+            }
+
+    def test_candidate_roles_load_in_one_query(self, api_app, staff):
+        """Test loading candidates and their roles does not query per user."""
+        with api_app.app_context():
+            statements = []
+
+            def record(conn, cursor, statement, *args):
+                statements.append(statement)
+
+            event.listen(db.engine, 'before_cursor_execute', record)
+            try:
+                candidates = get_eligible_candidates()
+                for user in candidates:
+                    user.roles
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', record)
+
+            assert len(candidates) > 1
+            assert len(statements) == 2
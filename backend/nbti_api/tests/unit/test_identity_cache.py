@@ -0,0 +1,109 @@
+import pytest
+from flask import jsonify
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from src.models.user import User, Role, db
+from src.security import require_role
+from src.services.identity_cache import get_identity, invalidate_identity
+
+
+@pytest.fixture
+def supervisor(api_app):
+    """A user holding only the Supervisor role."""
+    with api_app.app_context():
+        user = User(username='sup', email='sup@example.com', password_hash='x')
+        user.roles.append(Role(name='Supervisor'))
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def queries(api_app):
+    """Record the SQL statements run while the test is active."""
+    statements = []
+    with api_app.app_context():
+        engine = db.engine
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    yield statements
+    event.remove(engine, 'before_cursor_execute', record)
+
+
+def _identity(api_app, user_id):
+    with api_app.test_request_context():
+        return get_identity(user_id)
+
+
+class TestIdentityCache:
+    """Test the cached identities behind require_role."""
+
+    def test_repeat_lookup_skips_database(self, api_app, supervisor, queries):
+        """Test a user's roles are loaded once and then served from memory."""
+        first = _identity(api_app, supervisor)
+        loaded = len(queries)
+        second = _identity(api_app, str(supervisor))
+
+        assert first == second == {'id': supervisor, 'roles': frozenset({'Supervisor'}), 'is_active': True}
+        assert loaded > 0
+        assert len(queries) == loaded
+
+    def test_invalidate_reloads_roles(self, api_app, supervisor):
+        """Test a role change shows up after invalidate_identity."""
+        _identity(api_app, supervisor)
+
+        with api_app.test_request_context():
+            user = db.session.get(User, supervisor)
+            user.roles.append(Role.query.filter_by(name='HR Admin').first())
+            db.session.commit()
+            invalidate_identity(supervisor)
+
+        assert _identity(api_app, supervisor)['roles'] == frozenset({'Supervisor', 'HR Admin'})
+
+    def test_unknown_user_is_not_cached(self, api_app):
+        """Test a missing user returns None without a cache entry."""
+        assert _identity(api_app, 9999) is None
+
+        with api_app.test_request_context():
+            db.session.add(User(id=9999, username='late', email='late@example.com', password_hash='x'))
+            db.session.commit()
+
+        assert _identity(api_app, 9999)['roles'] == frozenset()
+
+
+class TestRequireRole:
+    """Test require_role against cached identities."""
+
+    @pytest.fixture
+    def view(self):
+        return require_role(['HR Admin'])(lambda: jsonify({'ok': True}))
+
+    def _call(self, api_app, view, user_id):
+        with api_app.app_context():
+            token = create_access_token(identity=str(user_id))
+        with api_app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+            response = view()
+            return response if isinstance(response, tuple) else (response, 200)
+
+    def test_allows_required_role(self, api_app, view):
+        """Test a user with the role reaches the view."""
+        with api_app.app_context():
+            admin_id = User.query.filter_by(username='admin').first().id
+
+        _, status = self._call(api_app, view, admin_id)
+        assert status == 200
+
+    def test_rejects_missing_role(self, api_app, view, supervisor):
+        """Test a user without the role is refused."""
+        response, status = self._call(api_app, view, supervisor)
+        assert status == 403
+        assert response.get_json()['required_roles'] == ['HR Admin']
+
+    def test_rejects_unknown_user(self, api_app, view):
+        """Test a token for a deleted user is refused."""
+        _, status = self._call(api_app, view, 9999)
+        assert status == 401
@@ -0,0 +1,92 @@
+import time
+from datetime import timedelta
+
+import jwt
+import pytest
+from flask_jwt_extended import create_access_token, get_jwt
+from jwt import ExpiredSignatureError, InvalidSignatureError
+
+from src import jwt_cache
+from src.jwt_cache import verified_identity
+
+
+@pytest.fixture
+def verify_calls(monkeypatch):
+    """Count full signature verifications."""
+    calls = []
+    verify = jwt_cache.verify_jwt_in_request
+
+    def counting_verify(*args, **kwargs):
+        calls.append(1)
+        return verify(*args, **kwargs)
+
+    monkeypatch.setattr(jwt_cache, 'verify_jwt_in_request', counting_verify)
+    return calls
+
+
+def _token(api_app, identity='7', **kwargs):
+    with api_app.app_context():
+        return create_access_token(identity=identity, additional_claims={'scope': 'test'}, **kwargs)
+
+
+def _identity(api_app, token):
+    with api_app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+        return verified_identity(), get_jwt()['scope']
+
+
+class TestVerifiedIdentity:
+    """Test the JWT verification cache."""
+
+    def test_repeat_token_skips_verification(self, api_app, verify_calls):
+        """Test a token is verified once and then served from the cache."""
+        token = _token(api_app)
+
+        assert _identity(api_app, token) == ('7', 'test')
+        assert _identity(api_app, token) == ('7', 'test')
+        assert len(verify_calls) == 1
+
+    def test_tokens_are_cached_separately(self, api_app, verify_calls):
+        """Test different tokens never share an entry."""
+        assert _identity(api_app, _token(api_app, '7'))[0] == '7'
+        assert _identity(api_app, _token(api_app, '8'))[0] == '8'
+        assert len(verify_calls) == 2
+
+    def test_entry_expires_after_ttl(self, api_app, verify_calls, monkeypatch):
+        """Test a cached token is verified again once JWT_CACHE_TTL has passed."""
+        token = _token(api_app)
+        _identity(api_app, token)
+
+        later = time.time() + jwt_cache.JWT_CACHE_TTL + 1
+        monkeypatch.setattr(jwt_cache.time, 'time', lambda: later)
+        _identity(api_app, token)
+
+        assert len(verify_calls) == 2
+
+    def test_entry_never_outlives_token(self, api_app, verify_calls, monkeypatch):
+        """Test a token expiring before the TTL is verified again once it expires."""
+        token = _token(api_app, expires_delta=timedelta(seconds=5))
+        _identity(api_app, token)
+
+        later = time.time() + 6
+        monkeypatch.setattr(jwt_cache.time, 'time', lambda: later)
+        _identity(api_app, token)
+
+        assert len(verify_calls) == 2
+
+    def test_expired_token_is_rejected(self, api_app, verify_calls):
+        """Test an expired token raises instead of being cached."""
+        token = _token(api_app, expires_delta=timedelta(seconds=-1))
+
+        with pytest.raises(ExpiredSignatureError):
+            _identity(api_app, token)
+        assert len(jwt_cache._jwt_cache) == 0
+
+    def test_invalid_token_is_not_cached(self, api_app, verify_calls):
+        """Test a token with a bad signature fails every time."""
+        forged = jwt.encode({'sub': '7', 'type': 'access', 'exp': time.time() + 60},
+                            'not-the-secret', algorithm='HS256')
+
+        for _ in range(2):
+            with pytest.raises(InvalidSignatureError):
+                _identity(api_app, forged)
+        assert len(verify_calls) == 2
@@ -0,0 +1,53 @@
+from src.models.user import User, db
+from src.models.pms import PMSEvaluation
+from src.services.rrr_service import calculate_pms_score
+
+
+def _evaluation(api_app, **kwargs):
+    with api_app.app_context():
+        staff = User.query.filter_by(username='admin').first()
+        evaluation = PMSEvaluation(staff_id=staff.id, supervisor_id=staff.id, quarter='Q1', year=2025, **kwargs)
+        db.session.add(evaluation)
+        db.session.commit()
+        return evaluation.id
+
+
+class TestPMSPercentage:
+    """Test the stored PMS percentage follows the final score."""
+
+    def test_set_on_insert(self, api_app):
+        """Test a new evaluation stores the percentage of its final score."""
+        evaluation_id = _evaluation(api_app, final_score=4.0)
+
+        with api_app.app_context():
+            assert db.session.get(PMSEvaluation, evaluation_id).pms_percentage == 80.0
+
+    def test_unscored_evaluation_has_no_percentage(self, api_app):
+        """Test the percentage stays empty until the evaluation is scored."""
+        evaluation_id = _evaluation(api_app)
+
+        with api_app.app_context():
+            assert db.session.get(PMSEvaluation, evaluation_id).pms_percentage is None
+
+    def test_updated_on_update(self, api_app):
+        """Test changing or clearing the final score refreshes the percentage."""
+        evaluation_id = _evaluation(api_app, final_score=4.0)
+
+        with api_app.app_context():
+            evaluation = db.session.get(PMSEvaluation, evaluation_id)
+            evaluation.final_score = 2.5
+            db.session.commit()
+            assert evaluation.pms_percentage == 50.0
+
+            evaluation.final_score = None
+            db.session.commit()
+            assert evaluation.pms_percentage is None
+
+    def test_score_reflects_unflushed_final_score(self, api_app):
+        """Test calculate_pms_score does not read a stale stored percentage."""
+        evaluation_id = _evaluation(api_app, final_score=4.0)
+
+        with api_app.app_context():
+            evaluation = db.session.get(PMSEvaluation, evaluation_id)
+            evaluation.final_score = 5.0
+            assert calculate_pms_score(evaluation) == 100.0
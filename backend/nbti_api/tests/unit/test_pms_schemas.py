@@ -0,0 +1,33 @@
+import pytest
+from marshmallow import ValidationError
+
+from src.routes.pms import _EVAL_SCHEMA, _GOAL_SCHEMA, _RATING_SCHEMA
+
+
+class TestPMSSchemas:
+    """Test the shared PMS request schemas keep their validation rules."""
+
+    def test_schemas_are_reusable(self):
+        """Test one schema instance loads several payloads independently."""
+        assert _GOAL_SCHEMA.load({'description': 'A'}) == {'description': 'A', 'weight': 1.0}
+        assert _GOAL_SCHEMA.load({'description': 'B', 'weight': 2.0}) == {'description': 'B', 'weight': 2.0}
+
+    @pytest.mark.parametrize('schema, payload', [
+        (_EVAL_SCHEMA, {'staff_id': 1, 'quarter': 'Q1', 'year': 2025, 'extra': 1}),
+        (_GOAL_SCHEMA, {'description': 'A', 'extra': 1}),
+        (_RATING_SCHEMA, {'goal_id': 1, 'rating': 3, 'extra': 1}),
+    ])
+    def test_unknown_fields_are_rejected(self, schema, payload):
+        """Test unknown fields are a validation error, not silently dropped."""
+        with pytest.raises(ValidationError) as excinfo:
+            schema.load(payload)
+
+        assert excinfo.value.messages == {'extra': ['Unknown field.']}
+
+    @pytest.mark.parametrize('rating', [0, 6])
+    def test_rating_out_of_range(self, rating):
+        """Test ratings outside 1-5 are rejected."""
+        with pytest.raises(ValidationError) as excinfo:
+            _RATING_SCHEMA.load({'goal_id': 1, 'rating': rating})
+
+        assert excinfo.value.messages == {'rating': ['Invalid value.']}
@@ -0,0 +1,108 @@
+from sqlalchemy import update
+
+from src.models.user import User, db
+from src.models.pms import PMSEvaluation, PMSStatusCounter, adjust_status_counters, status_counter_keys
+
+
+def _users(api_app, count):
+    with api_app.app_context():
+        users = [User(username=f'user{i}', email=f'user{i}@example.com', password_hash='x') for i in range(count)]
+        db.session.add_all(users)
+        db.session.commit()
+        return [user.id for user in users]
+
+
+def _counts(*scope):
+    """Counter values for a scope, leaving out statuses that dropped to zero."""
+    return {status: count for status, count in PMSStatusCounter.counts_for(*scope).items() if count}
+
+
+def _expected_counts(scope_type, scope_id=0):
+    """Aggregate the evaluation table the way the counters replace."""
+    query = db.session.query(PMSEvaluation.status, db.func.count()).group_by(PMSEvaluation.status)
+    if scope_type != 'system':
+        query = query.filter(getattr(PMSEvaluation, f'{scope_type}_id') == scope_id)
+    return dict(query.all())
+
+
+class TestPMSStatusCounter:
+    """Test the dashboard counters follow evaluation writes."""
+
+    def test_counts_follow_inserts_updates_and_deletes(self, api_app):
+        """Test every scope matches a fresh aggregate after ORM writes."""
+        first, second, supervisor = _users(api_app, 3)
+
+        with api_app.app_context():
+            evaluations = [
+                PMSEvaluation(staff_id=first, supervisor_id=supervisor, quarter='Q1', year=2025),
+                PMSEvaluation(staff_id=first, supervisor_id=supervisor, quarter='Q2', year=2025),
+                PMSEvaluation(staff_id=second, supervisor_id=supervisor, quarter='Q1', year=2025),
+            ]
+            db.session.add_all(evaluations)
+            db.session.commit()
+
+            evaluations[0].status = 'Completed'
+            # Reassigning an evaluation moves it between supervisor scopes
+            evaluations[2].supervisor_id = first
+            db.session.commit()
+            db.session.delete(evaluations[1])
+            db.session.commit()
+
+            assert _counts('system') == {'Completed': 1, 'Pending': 1}
+            assert _counts('staff', first) == {'Completed': 1}
+            assert _counts('supervisor', supervisor) == {'Completed': 1}
+            assert _counts('supervisor', first) == {'Pending': 1}
+            for scope in (('system',), ('staff', first), ('staff', second), ('supervisor', supervisor)):
+                assert _counts(*scope) == _expected_counts(*scope)
+
+    def test_core_update_adjusts_counters(self, api_app):
+        """Test a Core UPDATE stays counted when it calls adjust_status_counters."""
+        staff, supervisor = _users(api_app, 2)
+
+        with api_app.app_context():
+            evaluation = PMSEvaluation(staff_id=staff, supervisor_id=supervisor, quarter='Q1', year=2025)
+            db.session.add(evaluation)
+            db.session.commit()
+
+            db.session.execute(
+                update(PMSEvaluation).where(PMSEvaluation.id == evaluation.id).values(status='In Progress')
+            )
+            adjust_status_counters(
+                db.session.connection(),
+                status_counter_keys(staff, supervisor, 'Pending'),
+                status_counter_keys(staff, supervisor, 'In Progress')
+            )
+            db.session.commit()
+
+            assert _counts('system') == {'In Progress': 1}
+            assert _counts('supervisor', supervisor) == {'In Progress': 1}
+
+    def test_no_shared_system_row_is_written(self, api_app):
+        """Test writes only touch their own staff and supervisor rows."""
+        staff, supervisor = _users(api_app, 2)
+
+        with api_app.app_context():
+            db.session.add(PMSEvaluation(staff_id=staff, supervisor_id=supervisor, quarter='Q1', year=2025))
+            db.session.commit()
+
+            scopes = {scope for (scope,) in db.session.query(PMSStatusCounter.scope_type).distinct()}
+            assert scopes == {'staff', 'supervisor'}
+
+    def test_rebuild_matches_running_counts(self, api_app):
+        """Test rebuild() recomputes the counters the events maintain."""
+        first, second = _users(api_app, 2)
+
+        with api_app.app_context():
+            db.session.add_all([
+                PMSEvaluation(staff_id=first, supervisor_id=second, quarter='Q1', year=2025, status='Completed'),
+                PMSEvaluation(staff_id=second, supervisor_id=first, quarter='Q1', year=2025),
+            ])
+            db.session.commit()
+            running = {scope: _counts(*scope)
+                       for scope in (('system',), ('staff', first), ('supervisor', first))}
+
+            db.session.execute(db.delete(PMSStatusCounter))
+            PMSStatusCounter.rebuild()
+            db.session.commit()
+
+            assert {scope: _counts(*scope) for scope in running} == running
@@ -0,0 +1,89 @@
+from datetime import date
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from src.models import StepIncrementLog
+from src.models.user import User, Role, db
+from src.services import step_allocation_service
+
+
+@pytest.fixture
+def promotion_setup(api_app):
+    """HR admin headers plus two staff members at grade 7 step 3."""
+    with api_app.app_context():
+        hr = User(username='hr', email='hr@example.com', password_hash='x')
+        hr.roles.append(Role.query.filter_by(name='HR Admin').first())
+        staff = [
+            User(username=f'staff{i}', email=f'staff{i}@example.com', password_hash='x',
+                 conraiss_grade=7, conraiss_step=3, failed_promotion_attempts=1)
+            for i in range(2)
+        ]
+        db.session.add_all([hr] + staff)
+        db.session.commit()
+
+        return {
+            'headers': {'Authorization': f'Bearer {create_access_token(identity=str(hr.id))}'},
+            'hr_id': hr.id,
+            'staff_ids': [user.id for user in staff],
+        }
+
+
+class TestBulkPromotion:
+    """Test applying promotions in one batch."""
+
+    def test_bulk_apply(self, api_app, api_client, promotion_setup, monkeypatch):
+        """Test every user is promoted and logged, with one cache invalidation."""
+        invalidations = []
+        monkeypatch.setattr(step_allocation_service, 'invalidate_eligibility_cache',
+                            lambda *args: invalidations.append(args))
+        first, second = promotion_setup['staff_ids']
+
+        response = api_client.post('/api/promotion/apply', headers=promotion_setup['headers'], json={
+            'promotions': [
+                {'user_id': first, 'new_grade': 8, 'new_step': 2, 'effective_date': '2026-01-01'},
+                {'user_id': second, 'new_grade': 8, 'new_step': 1, 'notes': 'Merit'},
+                {'user_id': 9999, 'new_grade': 8, 'new_step': 1},
+            ]
+        })
+
+        assert response.status_code == 200
+        assert response.get_json()['promoted_count'] == 2
+        assert response.get_json()['not_found'] == [9999]
+        assert invalidations == [()]
+
+        with api_app.app_context():
+            promoted = db.session.get(User, first)
+            assert (promoted.conraiss_grade, promoted.conraiss_step) == (8, 2)
+            assert promoted.date_of_last_promotion == date(2026, 1, 1)
+            assert promoted.failed_promotion_attempts == 0
+
+            logs = {log.user_id: log for log in StepIncrementLog.query.all()}
+            assert logs[first].notes == 'Promoted from Grade 7 Step 3 to Grade 8 Step 2'
+            assert logs[first].processed_by == promotion_setup['hr_id']
+            assert logs[second].notes == 'Merit'
+
+    @pytest.mark.parametrize('promotions', [
+        [],
+        [{'user_id': 1, 'new_grade': 8}],
+        [{'user_id': 1, 'new_grade': 8, 'new_step': 16}],
+        [{'user_id': 1, 'new_grade': 8, 'new_step': 1, 'effective_date': 'soon'}],
+    ])
+    def test_invalid_batch_writes_nothing(self, api_app, api_client, promotion_setup, promotions):
+        """Test an invalid entry rejects the whole batch."""
+        response = api_client.post('/api/promotion/apply', headers=promotion_setup['headers'],
+                                   json={'promotions': promotions})
+
+        assert response.status_code == 400
+        with api_app.app_context():
+            assert StepIncrementLog.query.count() == 0
+
+    def test_requires_hr_admin(self, api_app, api_client, promotion_setup):
+        """Test only HR admins can apply promotions."""
+        with api_app.app_context():
+            token = create_access_token(identity=str(promotion_setup['staff_ids'][0]))
+
+        response = api_client.post('/api/promotion/apply', headers={'Authorization': f'Bearer {token}'},
+                                   json={'promotions': [{'user_id': 1, 'new_grade': 8, 'new_step': 1}]})
+
+        assert response.status_code == 403
@@ -0,0 +1,56 @@
+import time
+
+from src import security
+
+
+def _hit(api_client, address='10.0.0.1'):
+    return api_client.get('/api/health', environ_base={'REMOTE_ADDR': address}).status_code
+
+
+class TestDefaultRateLimits:
+    """Test the default limits behind the local token buckets."""
+
+    def test_burst_stops_at_minute_limit(self, api_client):
+        """Test a burst is cut off at the 20 per minute default limit."""
+        codes = [_hit(api_client) for _ in range(30)]
+
+        assert codes[:20] == [200] * 20
+        assert codes[20:] == [429] * 10
+
+    def test_slow_client_stops_at_hour_limit(self, api_client, monkeypatch):
+        """Test locally approved requests are all charged to the hourly limit."""
+        now = [1_000_000.0]
+        monkeypatch.setattr(time, 'time', lambda: now[0])
+        monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+
+        # One request every 3 s never empties the local bucket
+        passed = 0
+        for _ in range(600):
+            now[0] += 3
+            passed += _hit(api_client) == 200
+
+        assert passed == 100
+
+    def test_rejected_batch_stays_pending(self):
+        """Test a batch is only cleared once its charge is accepted."""
+        buckets = security._LocalTokenBuckets()
+        costs = [buckets.take('client') for _ in range(security.RATE_LIMIT_SYNC_EVERY)]
+        assert costs[-1] == security.RATE_LIMIT_SYNC_EVERY
+
+        # Not settled (the charge was rejected): the next check charges it again
+        assert buckets.take('client') == security.RATE_LIMIT_SYNC_EVERY
+
+        buckets.settle('client', security.RATE_LIMIT_SYNC_EVERY, direct=False)
+        assert buckets.take('client') == 0
+
+    def test_direct_mode_charges_each_request(self):
+        """Test a bucket near its limit sends every request to storage."""
+        buckets = security._LocalTokenBuckets()
+        buckets.settle('client', 1, direct=True)
+        assert buckets.take('client') == 0  # unknown keys are not settled
+
+        for _ in range(security.RATE_LIMIT_SYNC_EVERY):
+            cost = buckets.take('client')
+        buckets.settle('client', cost, direct=True)
+
+        assert [buckets.take('client') for _ in range(3)] == [1, 1, 1]
@@ -0,0 +1,130 @@
+from datetime import date
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from src.models.user import User, Role, db
+from src.models.rrr import RRRRecommendation
+
+
+@pytest.fixture
+def rrr_setup(api_app):
+    """HR admin headers plus two staff members with recommendations."""
+    with api_app.app_context():
+        hr_role = Role.query.filter_by(name='HR Admin').first()
+        hr = User(username='hr', email='hr@example.com', password_hash='x')
+        hr.roles.append(hr_role)
+        staff = [
+            User(username=f'staff{i}', email=f'staff{i}@example.com', password_hash='x',
+                 conraiss_grade=7, conraiss_step=3, failed_promotion_attempts=attempts)
+            for i, attempts in enumerate((2, 1))
+        ]
+        db.session.add_all([hr] + staff)
+        db.session.flush()
+
+        recommendations = [
+            # Promotion for staff0 in two cycles, plus a recognition for staff1
+            RRRRecommendation(user_id=staff[0].id, promotion_cycle='2025', conraiss_grade=7,
+                              is_promoted=True, promoted_to_grade=8, promoted_to_step=1,
+                              promotion_effective_date=date(2025, 1, 1)),
+            RRRRecommendation(user_id=staff[0].id, promotion_cycle='2026', conraiss_grade=7,
+                              is_promoted=True, promoted_to_grade=8, promoted_to_step=1),
+            RRRRecommendation(user_id=staff[1].id, promotion_cycle='2026', conraiss_grade=7,
+                              is_recognized=True),
+        ]
+        db.session.add_all(recommendations)
+        db.session.commit()
+
+        return {
+            'headers': {'Authorization': f'Bearer {create_access_token(identity=str(hr.id))}'},
+            'hr_id': hr.id,
+            'staff_ids': [user.id for user in staff],
+            'recommendation_ids': [recommendation.id for recommendation in recommendations],
+        }
+
+
+class TestRRRBulkReview:
+    """Test bulk approval and rejection of RRR recommendations."""
+
+    def test_bulk_approve(self, api_app, api_client, rrr_setup):
+        """Test approving several recommendations promotes the promoted users."""
+        first, _, recognition = rrr_setup['recommendation_ids']
+        response = api_client.put('/api/rrr/recommendations/approve',
+                                  headers=rrr_setup['headers'],
+                                  json={'recommendation_ids': [first, recognition]})
+
+        assert response.status_code == 200
+        assert response.get_json()['approved_count'] == 2
+        assert response.get_json()['recommendation_ids'] == [first, recognition]
+
+        with api_app.app_context():
+            for recommendation_id in (first, recognition):
+                recommendation = db.session.get(RRRRecommendation, recommendation_id)
+                assert recommendation.status == 'Approved'
+                assert recommendation.approved_by == rrr_setup['hr_id']
+                assert recommendation.approval_date is not None
+
+            promoted, recognized = (db.session.get(User, user_id) for user_id in rrr_setup['staff_ids'])
+            assert (promoted.conraiss_grade, promoted.conraiss_step) == (8, 1)
+            assert promoted.date_of_last_promotion == date(2025, 1, 1)
+            assert promoted.last_rrr_type == 'Promotion'
+            assert promoted.failed_promotion_attempts == 0
+            assert (recognized.conraiss_grade, recognized.conraiss_step) == (7, 3)
+
+    def test_bulk_reject_increments_failed_attempts(self, api_app, api_client, rrr_setup):
+        """Test each rejected promotion counts as one failed attempt."""
+        response = api_client.put('/api/rrr/recommendations/reject',
+                                  headers=rrr_setup['headers'],
+                                  json={'recommendation_ids': rrr_setup['recommendation_ids'],
+                                        'rejection_reason': 'Budget'})
+
+        assert response.status_code == 200
+        assert response.get_json()['rejected_count'] == 3
+
+        with api_app.app_context():
+            for recommendation_id in rrr_setup['recommendation_ids']:
+                recommendation = db.session.get(RRRRecommendation, recommendation_id)
+                assert recommendation.status == 'Rejected'
+                assert recommendation.rejection_reason == 'Budget'
+
+            promoted, recognized = (db.session.get(User, user_id) for user_id in rrr_setup['staff_ids'])
+            # Two rejected promotions on top of the two earlier failures
+            assert promoted.failed_promotion_attempts == 4
+            assert promoted.conraiss_grade == 7
+            # A rejected recognition is not a failed promotion attempt
+            assert recognized.failed_promotion_attempts == 1
+
+    @pytest.mark.parametrize('action', ['approve', 'reject'])
+    def test_unknown_ids_change_nothing(self, api_app, api_client, rrr_setup, action):
+        """Test a batch containing an unknown ID is rejected as a whole."""
+        first = rrr_setup['recommendation_ids'][0]
+        response = api_client.put(f'/api/rrr/recommendations/{action}',
+                                  headers=rrr_setup['headers'],
+                                  json={'recommendation_ids': [first, 9999]})
+
+        assert response.status_code == 404
+        assert '9999' in response.get_json()['error']
+
+        with api_app.app_context():
+            assert db.session.get(RRRRecommendation, first).status == 'Pending'
+            promoted = db.session.get(User, rrr_setup['staff_ids'][0])
+            assert (promoted.conraiss_grade, promoted.failed_promotion_attempts) == (7, 2)
+
+    @pytest.mark.parametrize('payload', [{}, {'recommendation_ids': []}, {'recommendation_ids': ['1']}])
+    def test_invalid_ids_are_rejected(self, api_client, rrr_setup, payload):
+        """Test recommendation_ids must be a non-empty list of integers."""
+        response = api_client.put('/api/rrr/recommendations/approve',
+                                  headers=rrr_setup['headers'], json=payload)
+
+        assert response.status_code == 400
+
+    def test_requires_reviewer_role(self, api_app, api_client, rrr_setup):
+        """Test staff without a reviewer role cannot approve."""
+        with api_app.app_context():
+            token = create_access_token(identity=str(rrr_setup['staff_ids'][0]))
+
+        response = api_client.put('/api/rrr/recommendations/approve',
+                                  headers={'Authorization': f'Bearer {token}'},
+                                  json={'recommendation_ids': rrr_setup['recommendation_ids']})
+
+        assert response.status_code == 403
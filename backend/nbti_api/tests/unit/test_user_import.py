@@ -0,0 +1,151 @@
+import io
+
+from src.models.user import User, Role, db
+from src.services import user_import_service
+from src.services.user_import_service import import_users_from_csv
+
+
+HEADER = 'employee_id,first_name,last_name,email,conraiss_grade,supervisor_employee_id'
+
+
+def _csv(*rows):
+    """Build an uploaded CSV file from row strings."""
+    return io.BytesIO('\n'.join((HEADER,) + rows).encode('utf-8'))
+
+
+def _import(api_app, *rows):
+    with api_app.app_context():
+        admin = User.query.filter_by(username='admin').first()
+        return import_users_from_csv(_csv(*rows), imported_by=admin.id)
+
+
+def _add_user(api_app, **kwargs):
+    with api_app.app_context():
+        user = User(password_hash='x', **kwargs)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+class TestUserImport:
+    """Test bulk user import from CSV."""
+
+    def test_import_creates_users_with_staff_role(self, api_app):
+        """Test valid rows are created with the Staff Member role."""
+        result = _import(
+            api_app,
+            'E001,Ada,Obi,ada@example.com,7,',
+            'E002,Bola,Ade,bola@example.com,8,'
+        )
+
+        assert result['statistics']['successful'] == 2
+        assert result['statistics']['skipped'] == 0
+        assert [u['username'] for u in result['created_users']] == ['e001', 'e002']
+
+        with api_app.app_context():
+            user = User.query.filter_by(employee_id='E002').first()
+            assert user.email == 'bola@example.com'
+            assert user.conraiss_grade == 8
+            assert user.conraiss_step == 1
+            assert [role.name for role in user.roles] == ['Staff Member']
+            assert user.check_password(result['created_users'][1]['temp_password'])
+
+    def test_in_file_duplicates_are_skipped(self, api_app):
+        """Test a repeated employee_id or email later in the file is rejected."""
+        result = _import(
+            api_app,
+            'E001,Ada,Obi,ada@example.com,7,',
+            'E001,Ada,Again,other@example.com,7,',
+            'E003,Chi,Eze,ADA@example.com,7,'
+        )
+
+        assert result['statistics']['successful'] == 1
+        assert result['statistics']['skipped'] == 2
+        assert any(error.startswith('Row 3:') and 'already exists' in error for error in result['errors'])
+        assert any(error.startswith('Row 4:') and 'already exists' in error for error in result['errors'])
+
+        with api_app.app_context():
+            assert User.query.filter(User.employee_id.in_(['E001', 'E003'])).count() == 1
+
+    def test_existing_users_are_skipped(self, api_app):
+        """Test rows matching a user already in the database are rejected."""
+        _add_user(api_app, username='taken', email='taken@example.com', employee_id='E009')
+
+        result = _import(
+            api_app,
+            'E009,Ada,Obi,ada@example.com,7,',
+            'E010,Bola,Ade,taken@example.com,7,'
+        )
+
+        assert result['statistics']['successful'] == 0
+        assert result['statistics']['skipped'] == 2
+
+    def test_invalid_rows_are_reported(self, api_app):
+        """Test validation errors are reported per row."""
+        result = _import(
+            api_app,
+            'E001,Ada,Obi,not-an-email,7,',
+            'E002,,Ade,bola@example.com,7,',
+            'E003,Chi,Eze,chi@example.com,20,'
+        )
+
+        assert result['statistics']['successful'] == 0
+        assert result['statistics']['skipped'] == 3
+        assert "Row 2: Invalid email format 'not-an-email'" in result['errors']
+        assert "Row 3: Missing required field 'first_name'" in result['errors']
+        assert 'Row 4: CONRAISS grade must be between 2 and 15' in result['errors']
+
+    def test_failing_chunk_is_rolled_back_alone(self, api_app, monkeypatch):
+        """Test a database error only loses the users in its own chunk."""
+        monkeypatch.setattr(user_import_service, 'IMPORT_BATCH_SIZE', 3)
+        # Usernames come from employee IDs, so this collides with row E005
+        _add_user(api_app, username='e005', email='someone@example.com', employee_id='X1')
+
+        result = _import(
+            api_app,
+            'E001,A,One,e1@example.com,7,',
+            'E002,B,Two,e2@example.com,7,',
+            'E003,C,Three,e3@example.com,7,',
+            'E004,D,Four,e4@example.com,7,',
+            'E005,E,Five,e5@example.com,7,',
+            'E006,F,Six,e6@example.com,7,',
+            'E007,G,Seven,e7@example.com,7,'
+        )
+
+        assert result['statistics']['successful'] == 4
+        assert result['statistics']['skipped'] == 3
+        assert len(result['errors']) == 1
+        assert result['errors'][0].startswith('Rows 5-7: Database error')
+        assert [u['employee_id'] for u in result['created_users']] == ['E001', 'E002', 'E003', 'E007']
+
+        with api_app.app_context():
+            imported = {employee_id for (employee_id,) in db.session.query(User.employee_id).filter(
+                User.employee_id.like('E%')
+            )}
+            assert imported == {'E001', 'E002', 'E003', 'E007'}
+            staff_role = Role.query.filter_by(name='Staff Member').first()
+            assert all(staff_role in user.roles for user in User.query.filter(User.employee_id.in_(imported)))
+
+    def test_supervisors_are_linked(self, api_app, monkeypatch):
+        """Test supervisors resolve against both the file and existing users."""
+        monkeypatch.setattr(user_import_service, 'IMPORT_BATCH_SIZE', 2)
+        existing_id = _add_user(api_app, username='boss', email='boss@example.com', employee_id='B001')
+
+        result = _import(
+            api_app,
+            'E001,Ada,Obi,ada@example.com,7,',
+            'E002,Bola,Ade,bola@example.com,7,E001',
+            'E003,Chi,Eze,chi@example.com,7,B001',
+            'E004,Dayo,Ola,dayo@example.com,7,NOPE'
+        )
+
+        assert result['statistics']['successful'] == 4
+        assert result['statistics']['supervisor_link_errors'] == 1
+        assert "User E004: Supervisor with employee_id 'NOPE' not found" in result['errors']
+
+        with api_app.app_context():
+            users = {user.employee_id: user for user in User.query.filter(User.employee_id.like('E%'))}
+            assert users['E001'].supervisor_id is None
+            assert users['E002'].supervisor_id == users['E001'].id
+            assert users['E003'].supervisor_id == existing_id
+            assert users['E004'].supervisor_id is None
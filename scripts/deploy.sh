@@ -219,7 +219,10 @@ fi
 # Run database migrations
 if [[ "$RUN_MIGRATIONS" == true ]]; then
     print_status "Running database migrations..."
-    docker-compose exec backend flask db upgrade || print_warning "Migration failed or no migrations to run"
+    if ! docker-compose exec backend flask db upgrade; then
+        print_error "Database migrations failed"
+        exit 1
+    fi
 fi
 
 # Initialize default data (for development)